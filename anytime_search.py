@@ -0,0 +1,230 @@
+"""
+Budgeted, anytime searches.
+
+Both searches accept ``max_ms`` and/or ``max_expansions`` and always
+return what they have when the budget runs out:
+
+    path, cost, expanded, bound = ara_star(start, goal, max_ms=50)
+
+``bound`` is a proven suboptimality factor: cost <= bound * optimal
+(1.0 means optimal, inf means no path was found in time).
+
+They use an admissible travel-time heuristic (straight-line distance at
+the fastest road speed, raised to the landmark bound when the pipeline's
+landmark tables are loaded), unlike a_star/greedy whose km-based
+heuristic is only a guide, so the bounds hold.
+"""
+import heapq
+import time
+
+from data_context import get_context
+from landmarks import goal_heuristic
+from search_algorithms import (
+    DEFAULT_ROAD_FACTOR, INTERSECTION_PENALTY, ROAD_TYPE_FACTOR, haversine
+)
+
+# Fastest speed in build_graph.SPEEDS (motorway), km/h
+MAX_SPEED_KMH = 100
+MIN_ROAD_FACTOR = min(min(ROAD_TYPE_FACTOR.values()), DEFAULT_ROAD_FACTOR)
+
+
+class Budget:
+    """Wall-clock and expansion limits shared by the anytime searches."""
+
+    def __init__(self, max_ms=None, max_expansions=None):
+        self.deadline = None if max_ms is None else time.perf_counter() + max_ms / 1000
+        self.max_expansions = max_expansions
+        self.expanded = 0
+
+    def spend(self):
+        """Count one expansion; False once the budget is exhausted."""
+        self.expanded += 1
+        if self.max_expansions is not None and self.expanded > self.max_expansions:
+            return False
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            return False
+        return True
+
+
+def time_heuristic(ctx, goal_node):
+    """
+    Admissible lower bound on travel time (minutes) to ``goal_node``:
+    straight-line at the fastest speed, or the ALT bound when larger.
+    """
+    coords = ctx.coords
+    goal_lat, goal_lon = coords[goal_node]
+    scale = 60 / MAX_SPEED_KMH * MIN_ROAD_FACTOR
+    alt = goal_heuristic(ctx, goal_node)
+    cache = {}
+
+    def h(node):
+        if node not in cache:
+            lat, lon = coords[node]
+            cache[node] = haversine(lat, lon, goal_lat, goal_lon) * scale
+            if alt:
+                cache[node] = max(cache[node], alt(node))
+        return cache[node]
+
+    return h
+
+
+def step_cost(edge):
+    factor = ROAD_TYPE_FACTOR.get(edge.get("road_type"), DEFAULT_ROAD_FACTOR)
+    return edge["cost"] * factor + INTERSECTION_PENALTY
+
+
+def _build_path(parent, goal_node):
+    path = [goal_node]
+    while parent[path[-1]] is not None:
+        path.append(parent[path[-1]])
+    return path[::-1]
+
+
+# ----------------------------------
+# ARA*: weighted A* with a shrinking weight
+# ----------------------------------
+def ara_star(start_node, goal_node, ctx=None, max_ms=None, max_expansions=None,
+             initial_weight=3.0, weight_step=0.5):
+    """
+    Finds a first path quickly with an inflated heuristic (w = initial_weight),
+    then lowers w and repairs the search, reusing earlier work, until w = 1
+    (optimal) or the budget runs out.
+    """
+    ctx = ctx or get_context()
+    edges = ctx.edges
+
+    if not ctx.components.reachable(start_node, goal_node):
+        return None, float("inf"), 0, float("inf")
+
+    h = time_heuristic(ctx, goal_node)
+    budget = Budget(max_ms, max_expansions)
+
+    g = {start_node: 0.0}
+    parent = {start_node: None}
+    weight = initial_weight
+
+    open_heap = [(weight * h(start_node), start_node)]
+    closed = set()
+    incons = set()
+
+    best_path, best_cost, bound = None, float("inf"), float("inf")
+
+    def improve_path():
+        """Weighted A* until the goal can't be improved at this weight."""
+        while open_heap:
+            f, node = open_heap[0]
+            if g.get(goal_node, float("inf")) <= f:
+                return True
+
+            heapq.heappop(open_heap)
+            if node in closed or f > g[node] + weight * h(node):
+                continue  # stale entry
+
+            if not budget.spend():
+                return False
+            closed.add(node)
+
+            for edge in edges.get(node, []):
+                nxt = edge["to"]
+                new_g = g[node] + step_cost(edge)
+                if new_g < g.get(nxt, float("inf")):
+                    g[nxt] = new_g
+                    parent[nxt] = node
+                    if nxt in closed:
+                        incons.add(nxt)
+                    else:
+                        heapq.heappush(open_heap, (new_g + weight * h(nxt), nxt))
+        return True
+
+    while True:
+        finished = improve_path()
+
+        if g.get(goal_node, float("inf")) < best_cost:
+            best_cost = g[goal_node]
+            best_path = _build_path(parent, goal_node)
+
+        if best_path is not None:
+            # Any node left in OPEN/INCONS bounds the optimum from below
+            frontier = [g[n] + h(n) for _, n in open_heap if n not in closed]
+            frontier += [g[n] + h(n) for n in incons]
+            lower = min(frontier, default=best_cost)
+            candidate = best_cost / lower if lower > 0 else float("inf")
+            if finished:
+                candidate = min(candidate, weight)
+            bound = max(1.0, min(bound, candidate))
+
+        if not finished or weight <= 1.0 or not open_heap and not incons:
+            break
+
+        # Tighten: lower w, move INCONS back to OPEN and re-key everything
+        weight = max(1.0, weight - weight_step)
+        pending = {n for _, n in open_heap if n not in closed} | incons
+        open_heap[:] = [(g[n] + weight * h(n), n) for n in pending]
+        heapq.heapify(open_heap)
+        incons.clear()
+        closed.clear()
+
+    if best_path is None:
+        return None, float("inf"), budget.expanded, float("inf")
+
+    # A path found only via the loose start bound is still a valid bound
+    start_bound = best_cost / h(start_node) if h(start_node) > 0 else float("inf")
+    return best_path, best_cost, budget.expanded, min(bound, start_bound)
+
+
+# ----------------------------------
+# Beam greedy: best-first with a bounded open list
+# ----------------------------------
+def beam_greedy(start_node, goal_node, ctx=None, beam_width=64,
+                max_ms=None, max_expansions=None):
+    """
+    Greedy best-first that keeps only the ``beam_width`` most promising
+    entries in the open list. The open list stays O(beam_width), but the
+    costs, parents and closed set grow with the nodes reached, so memory
+    is O(expanded nodes) overall (cap it with ``max_expansions``). It may
+    miss a path that exists; the bound is cost / h(start).
+    """
+    ctx = ctx or get_context()
+    edges = ctx.edges
+
+    if not ctx.components.reachable(start_node, goal_node):
+        return None, float("inf"), 0, float("inf")
+
+    h = time_heuristic(ctx, goal_node)
+    budget = Budget(max_ms, max_expansions)
+
+    g = {start_node: 0.0}
+    parent = {start_node: None}
+    closed = set()
+    open_heap = [(h(start_node), start_node)]
+
+    while open_heap:
+        _, node = heapq.heappop(open_heap)
+        if node in closed:
+            continue
+
+        if node == goal_node:
+            cost = g[node]
+            lower = h(start_node)
+            bound = max(1.0, cost / lower) if lower > 0 else float("inf")
+            return _build_path(parent, node), cost, budget.expanded, bound
+
+        if not budget.spend():
+            break
+        closed.add(node)
+
+        for edge in edges.get(node, []):
+            nxt = edge["to"]
+            if nxt in closed:
+                continue
+            new_g = g[node] + step_cost(edge)
+            if new_g < g.get(nxt, float("inf")):
+                g[nxt] = new_g
+                parent[nxt] = node
+                heapq.heappush(open_heap, (h(nxt), nxt))
+
+        if len(open_heap) > beam_width:
+            open_heap = heapq.nsmallest(beam_width, open_heap)
+            heapq.heapify(open_heap)
+
+    return None, float("inf"), budget.expanded, float("inf")
@@ -1,6 +1,23 @@
-import json
-from flask import Flask, render_template, request, send_from_directory
+import contextlib
+import functools
+import math
+import os
+import time
+
+import numpy as np
+from flask import Flask, jsonify, make_response, render_template, request, send_from_directory
 from search_algorithms import ucs, greedy, a_star, bidirectional_ucs
+from anytime_search import ara_star, beam_greedy
+from compact_graph import ROAD_CLASSES
+from crp import crp_search
+from data_context import get_context
+from edge_buffer import buffer_version
+from query_profiler import PROFILE_DIR, QueryProfile
+from pareto_search import DEFAULT_AVOID, DEFAULT_EPSILON, DEFAULT_MAX_LABELS, pareto_search
+from route_encoding import ENCODERS, encode_polyline, simplify
+from search_backends import DEFAULT_BACKEND, available_backends, get_backend, validate_limit
+from search_cache import SearchTreeCache
+from tour_planner import DEFAULT_TIME_LIMIT_MS, TravelTimeMatrix, plan_tour
 
 ALGORITHMS = {
     "ucs": ("Uniform Cost Search", ucs),
@@ -9,20 +26,81 @@ ALGORITHMS = {
     "bidir": ("Bidirectional UCS", bidirectional_ucs)
 }
 
+# Budgeted searches for "speed" mode with a latency SLA
+ANYTIME_ALGORITHMS = {
+    "ara": ("ARA* (anytime)", ara_star),
+    "beam": ("Beam Greedy Search", beam_greedy)
+}
+
 app = Flask(__name__)
 
-# Load places with node ids
-with open("data/processed/places_with_nodes.json", encoding="utf-8") as f:
-    places_data = json.load(f)
+CONTEXT = get_context()
+
+# Arc flags (pipeline "arcflags" stage): CITY_ARC_FLAGS=1 makes UCS and A*
+# skip edges that lead nowhere near the goal's cell. Same routes; without
+# a fresh arc_flags.npz they run unpruned.
+ARC_FLAGS = os.environ.get("CITY_ARC_FLAGS", "0") == "1"
+if ARC_FLAGS:
+    ALGORITHMS["ucs"] = ("Uniform Cost Search", functools.partial(ucs, arc_flags=True))
+    ALGORITHMS["astar"] = ("A* Search", functools.partial(a_star, arc_flags=True))
+
+# Multi-level overlay (crp.py, partition from the pipeline's "crp" stage):
+# CITY_CRP=1 adds it to the compared algorithms. Customized for the default
+# profile during warm-up (or on the first CRP search with CITY_WARM_UP=0).
+WARM_UP_STEPS = CONTEXT.WARM_UP_STEPS
+if os.environ.get("CITY_CRP", "0") == "1":
+    ALGORITHMS["crp"] = ("CRP Overlay Search", crp_search)
+    WARM_UP_STEPS += ("crp",)
+
+# Resumable per-origin UCS trees. CITY_ORIGIN_CACHE_MB > 0 serves "ucs"
+# from the cache (same paths and costs, fewer expansions on repeat origins).
+# With CITY_ARC_FLAGS=1 the cached trees are arc-flag pruned as well.
+ORIGIN_CACHE = None
+if float(os.environ.get("CITY_ORIGIN_CACHE_MB", "0")) > 0:
+    ORIGIN_CACHE = SearchTreeCache(int(float(os.environ["CITY_ORIGIN_CACHE_MB"]) * 1024 * 1024),
+                                   arc_flags=ARC_FLAGS)
+    ALGORITHMS["ucs"] = ("Uniform Cost Search", ORIGIN_CACHE.ucs)
+
+# Prefetch graph, heuristic coordinates and indexes before serving.
+# Set CITY_WARM_UP=0 to defer loading to the first request instead.
+if os.environ.get("CITY_WARM_UP", "1") != "0":
+    timings = CONTEXT.warm_up(WARM_UP_STEPS)
+    app.logger.info(
+        "warm-up %.3fs (%s)",
+        sum(timings.values()),
+        ", ".join(f"{k}={v:.3f}s" for k, v in timings.items())
+    )
 
-PLACES = places_data["places"]
+MAX_PLACE_RESULTS = 25
+
+# /api/tour: one-to-all trees of recent stops, reused across tours
+TOUR_MATRIX = TravelTimeMatrix()
+MAX_TOUR_STOPS = 60
+MAX_TOUR_TIME_LIMIT_MS = 10000
+
+# /api/nearest: k nearest facilities of a place type
+MAX_NEAREST = 20
+
+# /api/matrix: travel times between places on a selectable backend
+MAX_MATRIX_PLACES = 100
+
+# ?profile=1 on /find-path captures cProfile/tracemalloc for that query.
+# Debug only: off unless CITY_PROFILING=1 (files go to CITY_PROFILE_DIR).
+PROFILING = os.environ.get("CITY_PROFILING", "0") == "1"
+MAX_PARETO_LABELS = 64
+
+
+@app.context_processor
+def graph_version():
+    # Lets the page request /graph.bin under a versioned, cacheable URL
+    return {"graph_version": buffer_version(CONTEXT.edge_buffer)}
 
 
 @app.route("/")
 def index():
     return render_template(
         "index.html",
-        places=PLACES,
+        place_types=CONTEXT.place_index.types(),
         preferred=None,
         results=None,
         cost=None,
@@ -30,44 +108,115 @@ def index():
     )
 
 
+@app.route("/api/places")
+def api_places():
+    query = request.args.get("q", "")
+    place_type = request.args.get("type") or None
+    limit = min(max(request.args.get("limit", 10, type=int), 1), MAX_PLACE_RESULTS)
+
+    matches = CONTEXT.place_index.search(query, place_type, limit) if query else []
+
+    return jsonify([
+        {
+            "name": p["name"],
+            "type": p["type"],
+            "lat": p["lat"],
+            "lon": p["lon"],
+            "node_id": p["node_id"]
+        }
+        for p in matches
+    ])
+
+
+@app.route("/api/origin-cache")
+def api_origin_cache():
+    if ORIGIN_CACHE is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **ORIGIN_CACHE.stats()})
+
+
 @app.route("/graph.json")
 def graph():
-    return send_from_directory("data/processed", "road_graph.json")
+    return send_from_directory(CONTEXT.data_dir, CONTEXT.graph_file)
 
-@app.route("/find-path", methods=["POST"])
-def find_path():
-    start_name = request.form.get("start")
-    goal_name = request.form.get("goal")
-    mode = request.form.get("mode")          # manual | optimal | speed
-    algo_key = request.form.get("algorithm") # used only if manual
 
-    # map place names → node ids
-    start_node = next(p["node_id"] for p in PLACES if p["name"] == start_name)
-    goal_node = next(p["node_id"] for p in PLACES if p["name"] == goal_name)
+@app.route("/graph.bin")
+def graph_bin():
+    """Packed road segments for the map; the ETag is the graph version."""
+    data = CONTEXT.edge_buffer
+    version = buffer_version(data)
 
-    # -------------------------------------------------
-    # Run ALL algorithms
-    # -------------------------------------------------
+    response = make_response(data)
+    response.mimetype = "application/octet-stream"
+    response.set_etag(version)
+    if request.args.get("v") == version:
+        # Versioned URL from the page: safe to cache forever
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+# ----------------------------------
+# Shared search helpers
+# ----------------------------------
+def run_searches(start_node, goal_node, mode, sla_ms=None, anytime_key="ara"):
     results = {}
 
-    for key, (name, algo_func) in ALGORITHMS.items():
-        path, cost, expanded = algo_func(start_node, goal_node)
+    if mode == "speed" and sla_ms and sla_ms > 0:
+        # -------------------------------------------------
+        # Hard latency SLA: run only the budgeted search
+        # -------------------------------------------------
+        if anytime_key not in ANYTIME_ALGORITHMS:
+            anytime_key = "ara"
+        name, algo_func = ANYTIME_ALGORITHMS[anytime_key]
+        path, cost, expanded, bound = algo_func(start_node, goal_node, max_ms=sla_ms)
 
-        results[key] = {
+        results[anytime_key] = {
             "name": name,
             "path": path,
             "cost": cost,
-            "expanded": expanded
+            "expanded": expanded,
+            "bound": bound
         }
 
-    # -------------------------------------------------
-    # Select algorithm based on MODE
-    # -------------------------------------------------
-    if mode == "manual":
+    else:
+        # -------------------------------------------------
+        # Run ALL algorithms
+        # -------------------------------------------------
+        for key, (name, algo_func) in ALGORITHMS.items():
+            path, cost, expanded = algo_func(start_node, goal_node)
+
+            results[key] = {
+                "name": name,
+                "path": path,
+                "cost": cost,
+                "expanded": expanded
+            }
+
+    return results
+
+
+def budget_exceeded(results, start_node, goal_node):
+    """
+    The anytime result when the SLA ran out before any path was found
+    although the goal is reachable (a 504, not a 404), else None.
+    """
+    if any(r["path"] is not None for r in results.values()):
+        return None
+    timed_out = [r for r in results.values() if "bound" in r]
+    if timed_out and CONTEXT.components.reachable(start_node, goal_node):
+        return timed_out[0]
+    return None
+
+
+def select_preferred(results, mode, algo_key):
+    if mode == "manual" and algo_key in results:
         # User explicitly chooses algorithm
-        preferred = results[algo_key]
+        return results[algo_key]
 
-    elif mode == "optimal":
+    if mode == "optimal":
         # Optimal cost, then fewest expanded nodes
         min_cost = min(r["cost"] for r in results.values())
 
@@ -76,35 +225,107 @@ def find_path():
             if abs(r["cost"] - min_cost) < 1e-6
         ]
 
-        preferred = min(optimal_algos, key=lambda r: r["expanded"])
+        return min(optimal_algos, key=lambda r: r["expanded"])
 
-    elif mode == "speed":
+    if mode == "speed":
         # Fewest expanded nodes only
-        preferred = min(results.values(), key=lambda r: r["expanded"])
+        return min(results.values(), key=lambda r: r["expanded"])
 
-    else:
-        # Safety fallback
-        preferred = results["astar"]
+    # Safety fallback
+    return results.get("astar") or next(iter(results.values()))
+
+
+def path_coordinates(path_nodes):
+    nodes = CONTEXT.graph["nodes"]
+    return [[nodes[nid]["lat"], nodes[nid]["lng"]] for nid in path_nodes]
+
+
+@app.route("/find-path", methods=["POST"])
+def find_path():
+    start_name = request.form.get("start")
+    goal_name = request.form.get("goal")
+    mode = request.form.get("mode")          # manual | optimal | speed
+    algo_key = request.form.get("algorithm") # used only if manual
+    sla_ms = request.form.get("sla_ms", type=float)          # speed mode only
+    anytime_key = request.form.get("anytime") or "ara"       # speed mode only
+
+    # map place names → node ids
+    start_node = CONTEXT.place_index.node_id(start_name)
+    goal_node = CONTEXT.place_index.node_id(goal_name)
+
+    unknown = [n for n, nid in ((start_name, start_node), (goal_name, goal_node)) if nid is None]
+    if unknown:
+        suggestions = [p["name"] for p in CONTEXT.place_index.fuzzy(unknown[0], limit=3)]
+        return render_template(
+            "index.html",
+            place_types=CONTEXT.place_index.types(),
+            error=f"Unknown place: {unknown[0]}",
+            suggestions=suggestions,
+            preferred=None,
+            results=None,
+            cost=None,
+            expanded=None,
+            selected_start=start_name,
+            selected_goal=goal_name,
+            selected_mode=mode,
+            selected_algorithm=algo_key
+        ), 400
+
+    # Debug profiling of this one query (only when CITY_PROFILING=1)
+    profiling = PROFILING and request.args.get("profile") == "1"
+    profiler = QueryProfile() if profiling else contextlib.nullcontext()
+
+    with profiler:
+        results = run_searches(start_node, goal_node, mode, sla_ms, anytime_key)
+
+    profile = None
+    if profiling:
+        label = f"{time.strftime('%Y%m%d-%H%M%S')}-{start_name}-{goal_name}"
+        profile = dict(profiler.summary(), files=profiler.save(PROFILE_DIR, label))
+
+    if all(r["path"] is None for r in results.values()):
+        timed_out = budget_exceeded(results, start_node, goal_node)
+        if timed_out:
+            error = (f"No route from {start_name} to {goal_name} found within {sla_ms:g} ms "
+                     f"({timed_out['expanded']} nodes expanded); raise the time limit")
+        else:
+            error = f"No route from {start_name} to {goal_name}"
+        return render_template(
+            "index.html",
+            place_types=CONTEXT.place_index.types(),
+            profile=profile,
+            error=error,
+            preferred=None,
+            results=None,
+            cost=None,
+            expanded=None,
+            selected_start=start_name,
+            selected_goal=goal_name,
+            selected_mode=mode,
+            selected_algorithm=algo_key,
+            selected_sla=sla_ms,
+            selected_anytime=anytime_key
+        ), 504 if timed_out else 404
 
     # -------------------------------------------------
-    # Build path coordinates for map
+    # Select algorithm based on MODE
     # -------------------------------------------------
-    with open("data/processed/road_graph.json", encoding="utf-8") as f:
-        graph = json.load(f)
+    preferred = select_preferred(results, mode, algo_key)
 
-    path_nodes = preferred["path"]
-    path_coords = [
-        [graph["nodes"][nid]["lat"], graph["nodes"][nid]["lng"]]
-        for nid in path_nodes
-    ]
+    # -------------------------------------------------
+    # Encode path geometry for the map (decoded in JS)
+    # -------------------------------------------------
+    path_polyline = encode_polyline(path_coordinates(preferred["path"]))
 
     # -------------------------------------------------
     # Render result
     # -------------------------------------------------
     return render_template(
         "index.html",
-        places=PLACES,
-        path_coords=path_coords,
+        place_types=CONTEXT.place_index.types(),
+        path_polyline=path_polyline,
+        path_length=len(preferred["path"]),
+        profile=profile,
         results=results,
         preferred=preferred,
         cost=round(preferred["cost"], 2),
@@ -112,9 +333,342 @@ def find_path():
         selected_start=start_name,
         selected_goal=goal_name,
         selected_mode=mode,
-        selected_algorithm=algo_key
+        selected_algorithm=algo_key,
+        selected_sla=sla_ms,
+        selected_anytime=anytime_key
     )
 
 
+@app.route("/api/route")
+def api_route():
+    """
+    JSON route for API clients. The geometry of the preferred path is sent
+    encoded (``encoding=polyline|varint|coords``) and optionally simplified
+    (``tolerance`` in meters). Per-algorithm node lists are only included
+    with ``include_paths=1``.
+    """
+    start_name = request.args.get("start")
+    goal_name = request.args.get("goal")
+    mode = request.args.get("mode", "optimal")
+    algo_key = request.args.get("algorithm")
+    sla_ms = request.args.get("sla_ms", type=float)
+    anytime_key = request.args.get("anytime") or "ara"
+    encoding = request.args.get("encoding", "polyline")
+    tolerance = max(request.args.get("tolerance", 0.0, type=float), 0.0)
+    include_paths = request.args.get("include_paths", "0") == "1"
+
+    if encoding not in ENCODERS and encoding != "coords":
+        return jsonify({"error": f"Unknown encoding: {encoding}"}), 400
+
+    start_node = CONTEXT.place_index.node_id(start_name)
+    goal_node = CONTEXT.place_index.node_id(goal_name)
+
+    unknown = [n for n, nid in ((start_name, start_node), (goal_name, goal_node)) if nid is None]
+    if unknown:
+        suggestions = [p["name"] for p in CONTEXT.place_index.fuzzy(unknown[0] or "", limit=3)]
+        return jsonify({"error": f"Unknown place: {unknown[0]}", "suggestions": suggestions}), 400
+
+    results = run_searches(start_node, goal_node, mode, sla_ms, anytime_key)
+    if all(r["path"] is None for r in results.values()):
+        timed_out = budget_exceeded(results, start_node, goal_node)
+        if timed_out:
+            # A route exists; the anytime search just ran out of time
+            return jsonify({
+                "error": "budget exceeded",
+                "sla_ms": sla_ms,
+                "expanded": timed_out["expanded"],
+                # inf (no path yet, so no proven bound) is sent as null
+                "bound": timed_out["bound"] if math.isfinite(timed_out["bound"]) else None,
+            }), 504
+        return jsonify({"error": f"No route from {start_name} to {goal_name}"}), 404
+
+    preferred = select_preferred(results, mode, algo_key)
+    coords = simplify(path_coordinates(preferred["path"]), tolerance)
+
+    algorithms = {}
+    for key, r in results.items():
+        entry = {
+            "name": r["name"],
+            "cost": round(r["cost"], 4) if r["path"] is not None else None,
+            "expanded": r["expanded"],
+            "nodes": len(r["path"]) if r["path"] is not None else 0
+        }
+        if "bound" in r:
+            entry["bound"] = r["bound"]
+        if include_paths:
+            entry["path"] = r["path"]
+        algorithms[key] = entry
+
+    return jsonify({
+        "preferred": next(k for k, r in results.items() if r is preferred),
+        "cost": round(preferred["cost"], 4),
+        "expanded": preferred["expanded"],
+        "encoding": encoding,
+        "tolerance": tolerance,
+        "points": len(coords),
+        "geometry": coords if encoding == "coords" else ENCODERS[encoding](coords),
+        "algorithms": algorithms
+    })
+
+
+
+@app.route("/api/pareto")
+def api_pareto():
+    """
+    Pareto front between two places over (time, distance, minutes on
+    ``avoid`` road classes). ``epsilon`` and ``max_labels`` trade
+    completeness for speed; the label statistics are returned with it.
+    """
+    start_name = request.args.get("start")
+    goal_name = request.args.get("goal")
+    epsilon = max(request.args.get("epsilon", DEFAULT_EPSILON, type=float), 0.0)
+    max_labels = min(max(request.args.get("max_labels", DEFAULT_MAX_LABELS, type=int), 1),
+                     MAX_PARETO_LABELS)
+    avoid = [rt for rt in request.args.get("avoid", ",".join(DEFAULT_AVOID)).split(",") if rt]
+    tolerance = max(request.args.get("tolerance", 0.0, type=float), 0.0)
+
+    bad = [rt for rt in avoid if rt not in ROAD_CLASSES]
+    if bad:
+        return jsonify({"error": f"Unknown road type: {bad[0]}", "road_types": list(ROAD_CLASSES)}), 400
+
+    start_node = CONTEXT.place_index.node_id(start_name)
+    goal_node = CONTEXT.place_index.node_id(goal_name)
+
+    unknown = [n for n, nid in ((start_name, start_node), (goal_name, goal_node)) if nid is None]
+    if unknown:
+        suggestions = [p["name"] for p in CONTEXT.place_index.fuzzy(unknown[0] or "", limit=3)]
+        return jsonify({"error": f"Unknown place: {unknown[0]}", "suggestions": suggestions}), 400
+
+    stats = {}
+    front = pareto_search(start_node, goal_node, epsilon=epsilon, max_labels=max_labels,
+                          avoid=avoid, stats=stats)
+    if not front:
+        return jsonify({"error": f"No route from {start_name} to {goal_name}", "stats": stats}), 404
+
+    return jsonify({
+        "criteria": {"time": "minutes", "distance": "km", "avoid": f"minutes on {', '.join(avoid) or '-'}"},
+        "routes": [
+            {
+                "time": round(r["time"], 4),
+                "distance": round(r["distance"], 4),
+                "avoid": round(r["avoid"], 4),
+                "nodes": len(r["path"]),
+                "geometry": encode_polyline(simplify(path_coordinates(r["path"]), tolerance))
+            }
+            for r in front
+        ],
+        "stats": stats
+    })
+
+
+@app.route("/api/tour", methods=["GET", "POST"])
+def api_tour():
+    """
+    Best order to visit several places, starting at the first one.
+
+    GET:  ?stop=A&stop=B&stop=C[&roundtrip=0][&time_limit_ms=][&tolerance=]
+    POST: {"stops": ["A", {"name": "B", "earliest": 10, "latest": 30,
+           "service": 5}, ...], "roundtrip": true, "time_limit_ms": 1000}
+
+    Window and service times are minutes after leaving the first stop.
+    Matrix and solve times are reported separately.
+    """
+    if request.method == "POST":
+        body = request.get_json(silent=True) or {}
+        stops = [s if isinstance(s, dict) else {"name": s} for s in body.get("stops", [])]
+        options = body
+    else:
+        stops = [{"name": name} for name in request.args.getlist("stop")]
+        options = request.args
+
+    roundtrip = str(options.get("roundtrip", "1")).lower() not in ("0", "false")
+    try:
+        time_limit_ms = float(options.get("time_limit_ms", DEFAULT_TIME_LIMIT_MS))
+        tolerance = max(float(options.get("tolerance", 0.0)), 0.0)
+    except (TypeError, ValueError):
+        return jsonify({"error": "time_limit_ms and tolerance must be numbers"}), 400
+    if not math.isfinite(time_limit_ms) or not math.isfinite(tolerance):
+        return jsonify({"error": "time_limit_ms and tolerance must be finite"}), 400
+    # 0 (or less) keeps the construction heuristic's tour without improving it
+    time_limit_ms = min(max(time_limit_ms, 0.0), MAX_TOUR_TIME_LIMIT_MS)
+
+    if not 2 <= len(stops) <= MAX_TOUR_STOPS:
+        return jsonify({"error": f"Give between 2 and {MAX_TOUR_STOPS} stops"}), 400
+
+    node_ids = [CONTEXT.place_index.node_id(stop.get("name")) for stop in stops]
+    for stop, nid in zip(stops, node_ids):
+        if nid is None:
+            suggestions = [p["name"] for p in CONTEXT.place_index.fuzzy(stop.get("name") or "", limit=3)]
+            return jsonify({"error": f"Unknown place: {stop.get('name')}", "suggestions": suggestions}), 400
+
+    windows = service = None
+    try:
+        if any("earliest" in s or "latest" in s for s in stops):
+            windows = [[float(s.get("earliest", 0.0)), float(s.get("latest", float("inf")))] for s in stops]
+        if any("service" in s for s in stops):
+            service = [float(s.get("service", 0.0)) for s in stops]
+    except (TypeError, ValueError):
+        return jsonify({"error": "earliest, latest and service must be numbers"}), 400
+
+    t0 = time.perf_counter()
+    matrix = TOUR_MATRIX.matrix(node_ids)
+    matrix_ms = (time.perf_counter() - t0) * 1000
+
+    unreachable = np.argwhere(~np.isfinite(matrix))
+    if len(unreachable):
+        a, b = unreachable[0]
+        return jsonify({"error": f"No route from {stops[a]['name']} to {stops[b]['name']}"}), 404
+
+    stats = {}
+    tour = plan_tour(matrix, roundtrip, windows, service, time_limit_ms, stats)
+
+    # Stitch the legs into one path
+    t0 = time.perf_counter()
+    graph = TOUR_MATRIX.graph
+    path = [graph.index_of[node_ids[tour["route"][0]]]]
+    for a, b in zip(tour["route"], tour["route"][1:]):
+        path.extend(TOUR_MATRIX.leg(node_ids[a], node_ids[b])[1:])
+    coords = simplify([[float(graph.lat[i]), float(graph.lng[i])] for i in path], tolerance)
+    geometry_ms = (time.perf_counter() - t0) * 1000
+
+    visits = []
+    for index, arrival in zip(tour["route"], tour["arrival"]):
+        visit = {"name": stops[index]["name"], "stop": index, "arrival": round(arrival, 4)}
+        if windows is not None:
+            visit["late"] = round(max(0.0, arrival - windows[index][1]), 4)
+        visits.append(visit)
+
+    return jsonify({
+        "roundtrip": roundtrip,
+        "travel_time": round(tour["travel"], 4),
+        "total_time": round(tour["arrival"][-1], 4),
+        "feasible": tour["feasible"],
+        "visits": visits,
+        "nodes": len(path),
+        "points": len(coords),
+        "geometry": encode_polyline(coords),
+        "timing": {
+            "matrix_ms": round(matrix_ms, 3),
+            "solve_ms": stats["solve_ms"],
+            "geometry_ms": round(geometry_ms, 3)
+        },
+        "stats": stats,
+        "matrix_cache": TOUR_MATRIX.stats()
+    })
+
+
+@app.route("/api/nearest")
+def api_nearest():
+    """
+    Closest places of a type by travel time from a point:
+    ?type=bus_stop&lat=&lon=[&k=1][&geometry=1][&tolerance=]
+
+    The point snaps to the nearest routable node. k = 1 is read from the
+    precomputed service areas when present; otherwise (or with geometry)
+    a search stops at the k-th facility.
+    """
+    place_type = request.args.get("type")
+    lat = request.args.get("lat", type=float)
+    lon = request.args.get("lon", type=float)
+    k = min(max(request.args.get("k", 1, type=int), 1), MAX_NEAREST)
+    geometry = request.args.get("geometry", "0") == "1"
+    tolerance = max(request.args.get("tolerance", 0.0, type=float), 0.0)
+
+    if lat is None or lon is None:
+        return jsonify({"error": "lat and lon are required"}), 400
+    facilities = CONTEXT.facilities
+    if place_type not in facilities.by_type:
+        return jsonify({"error": f"Unknown place type: {place_type}", "types": facilities.types()}), 400
+
+    t0 = time.perf_counter()
+    node, snap_km = facilities.snap(lat, lon)
+    snap_ms = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    found = facilities.nearest(place_type, node, k, paths=geometry)
+    lookup_ms = (time.perf_counter() - t0) * 1000
+    if not found:
+        return jsonify({"error": f"No {place_type} reachable from there"}), 404
+
+    graph = facilities.graph
+    results = []
+    for facility, places, minutes, path in found:
+        entry = {
+            "node_id": graph.node_id(facility),
+            "minutes": round(minutes, 4),
+            "places": [
+                {"id": p["id"], "name": p["name"], "type": p["type"], "lat": p["lat"], "lon": p["lon"]}
+                for p in places
+            ]
+        }
+        if path is not None and geometry:
+            coords = [[float(graph.lat[i]), float(graph.lng[i])] for i in path]
+            entry["geometry"] = encode_polyline(simplify(coords, tolerance))
+        results.append(entry)
+
+    return jsonify({
+        "type": place_type,
+        "from": {
+            "node_id": graph.node_id(node),
+            "lat": float(graph.lat[node]),
+            "lon": float(graph.lng[node]),
+            "snap_km": round(snap_km, 4)
+        },
+        "method": "search" if found[0][3] is not None else "service_area",
+        "results": results,
+        "timing": {"snap_ms": round(snap_ms, 3), "lookup_ms": round(lookup_ms, 3)}
+    })
+
+
+@app.route("/api/matrix")
+def api_matrix():
+    """
+    Travel times (minutes) between places:
+    ?origin=A&origin=B[&destination=C...][&backend=python|scipy][&limit=]
+
+    Destinations default to the origins. Pairs that are unreachable or
+    farther than ``limit`` minutes are null. ``backend`` picks the
+    search engine (search_backends.py); all give the same times.
+    """
+    origins = request.args.getlist("origin")
+    destinations = request.args.getlist("destination") or origins
+    backend_name = request.args.get("backend", DEFAULT_BACKEND)
+    limit = request.args.get("limit", "inf")
+
+    if backend_name not in available_backends():
+        return jsonify({"error": f"Unknown backend: {backend_name}", "backends": available_backends()}), 400
+    try:
+        limit = validate_limit(limit)
+    except ValueError:
+        return jsonify({"error": "limit must be a number of minutes >= 0"}), 400
+    if not origins or len(origins) > MAX_MATRIX_PLACES or len(destinations) > MAX_MATRIX_PLACES:
+        return jsonify({"error": f"Give between 1 and {MAX_MATRIX_PLACES} origins and destinations"}), 400
+
+    names = list(dict.fromkeys(origins + destinations))
+    node_ids = {name: CONTEXT.place_index.node_id(name) for name in names}
+    for name, nid in node_ids.items():
+        if nid is None:
+            suggestions = [p["name"] for p in CONTEXT.place_index.fuzzy(name or "", limit=3)]
+            return jsonify({"error": f"Unknown place: {name}", "suggestions": suggestions}), 400
+
+    t0 = time.perf_counter()
+    backend = get_backend(backend_name, CONTEXT)
+    setup_ms = (time.perf_counter() - t0) * 1000
+
+    graph = backend.graph
+    t0 = time.perf_counter()
+    minutes = backend.matrix([graph.index_of[node_ids[n]] for n in origins],
+                             [graph.index_of[node_ids[n]] for n in destinations], limit)
+    matrix_ms = (time.perf_counter() - t0) * 1000
+
+    return jsonify({
+        "backend": backend_name,
+        "origins": origins,
+        "destinations": destinations,
+        "minutes": [[round(float(m), 4) if np.isfinite(m) else None for m in row] for row in minutes],
+        "timing": {"setup_ms": round(setup_ms, 3), "matrix_ms": round(matrix_ms, 3)}
+    })
+
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,265 @@
+"""
+Arc flags: prune edges that cannot lead into the goal's cell.
+
+The nodes are split into k cells by position (no costs involved). Edge
+e gets one flag per cell c, set when e lies on some shortest path into
+c. A search towards a goal in cell c then only relaxes edges whose flag
+c is set, and still finds an optimal route.
+
+Flags of cell c, computed from its boundary nodes (nodes of c with an
+in-edge from outside c):
+
+- every edge inside c is flagged
+- for each boundary node b, a backward one-to-all search gives d(v, b);
+  an edge u -> v with d(u, b) == w + d(v, b) is on a shortest path to b
+  and is flagged (all ties, so any optimal route survives)
+
+Any route into c enters through a boundary node, and its part up to
+there is a shortest path to that node. Cells are independent, so the
+backward searches run in worker processes. Flags are stored as
+uint8[m, ceil(k / 8)]: bit c % 8 of byte c // 8 is edge e's flag for
+cell c. Only the flags depend on costs: a new cost profile reuses the
+partition (``compute_flags(graph, table.cells, ...)``).
+
+Partitions:
+
+- grid:     rows x cols cells cut at coordinate quantiles (equal sizes)
+- inertial: recursive bisection; each cut is at a size quantile along
+            whichever of four directions crosses the fewest edges
+"""
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from compact_graph import DEFAULT_PROFILE
+from delta_stepping import delta_stepping
+
+DEFAULT_CELLS = 16
+DEFAULT_PARTITION = "inertial"
+TIGHT_EPS = 1e-9
+INERTIAL_DIRECTIONS = 4
+
+
+# ----------------------------------
+# Partitions (each returns int32[n] cell of every node)
+# ----------------------------------
+def grid_partition(graph, k):
+    rows = max(d for d in range(1, int(math.isqrt(k)) + 1) if k % d == 0)
+    cols = k // rows
+    n = graph.num_nodes
+
+    cells = np.zeros(n, dtype=np.int32)
+    by_lat = np.argsort(graph.lat, kind="stable")
+    for r, row in enumerate(np.array_split(by_lat, rows)):
+        by_lng = row[np.argsort(graph.lng[row], kind="stable")]
+        for c, cell in enumerate(np.array_split(by_lng, cols)):
+            cells[cell] = r * cols + c
+    return cells
+
+
+def inertial_partition(graph, k):
+    sources = np.repeat(np.arange(graph.num_nodes), np.diff(graph.indptr))
+    targets = graph.indices.astype(np.int64)
+    loops = sources == targets
+    angles = np.arange(INERTIAL_DIRECTIONS) * math.pi / INERTIAL_DIRECTIONS
+
+    cells = np.zeros(graph.num_nodes, dtype=np.int32)
+    side = np.zeros(graph.num_nodes, dtype=bool)
+    # Each piece carries its internal edges, so a level of the recursion
+    # costs O(n + m) in total however many pieces it has
+    pending = [(np.arange(graph.num_nodes), sources[~loops], targets[~loops], k, 0)]
+    while pending:
+        nodes, u, v, parts, first = pending.pop()
+        if parts == 1:
+            cells[nodes] = first
+            continue
+        left_parts = parts // 2
+        split = len(nodes) * left_parts // parts
+
+        best = None
+        for angle in angles:
+            projection = graph.lng[nodes] * math.cos(angle) + graph.lat[nodes] * math.sin(angle)
+            order = nodes[np.argsort(projection, kind="stable")]
+            side[nodes] = False
+            side[order[:split]] = True
+            cut = int(np.count_nonzero(side[u] != side[v]))
+            if best is None or cut < best[0]:
+                best = (cut, order)
+
+        order = best[1]
+        side[nodes] = False
+        side[order[:split]] = True
+        left = side[u] & side[v]
+        right = ~side[u] & ~side[v]
+        pending.append((order[:split], u[left], v[left], left_parts, first))
+        pending.append((order[split:], u[right], v[right], parts - left_parts, first + left_parts))
+    return cells
+
+
+PARTITIONS = {
+    "grid": grid_partition,
+    "inertial": inertial_partition,
+}
+
+
+def boundary_nodes(graph, cells, cell):
+    """Nodes of ``cell`` with an incoming edge from another cell."""
+    sources = np.repeat(np.arange(graph.num_nodes), np.diff(graph.indptr))
+    entering = (cells[graph.indices] == cell) & (cells[sources] != cell)
+    return np.unique(graph.indices[entering])
+
+
+# ----------------------------------
+# Flag computation
+# ----------------------------------
+_worker = {}
+
+
+def _init_worker(graph, cells, profile):
+    _worker["graph"] = graph
+    _worker["cells"] = cells
+    _worker["backward"] = graph.reversed()
+    _worker["profile"] = profile
+
+
+def _cell_flags(cell):
+    """bool[m] flags of one cell, packed (little bit order)."""
+    graph = _worker["graph"]
+    cells = _worker["cells"]
+    backward = _worker["backward"]
+    profile = _worker["profile"]
+
+    weights = graph.weights(profile)
+    sources = np.repeat(np.arange(graph.num_nodes), np.diff(graph.indptr))
+    targets = graph.indices
+
+    flags = (cells[sources] == cell) & (cells[targets] == cell)
+    for b in boundary_nodes(graph, cells, cell):
+        d, _ = delta_stepping(backward, int(b), profile)
+        head = d[targets]
+        with np.errstate(invalid="ignore"):
+            flags |= np.isfinite(head) & (d[sources] >= weights + head - TIGHT_EPS)
+    return cell, np.packbits(flags, bitorder="little")
+
+
+def compute_flags(graph, cells, profile=DEFAULT_PROFILE, jobs=1):
+    """uint8[m, ceil(k / 8)] arc flags for a partition (cells processed in parallel)."""
+    k = int(cells.max()) + 1 if len(cells) else 0
+    flags = np.zeros((graph.num_edges, (k + 7) // 8), dtype=np.uint8)
+
+    def collect(cell, packed):
+        bits = np.unpackbits(packed, count=graph.num_edges, bitorder="little")
+        flags[:, cell >> 3] |= bits << (cell & 7)
+
+    if jobs <= 1:
+        _init_worker(graph, cells, profile)
+        try:
+            for cell in range(k):
+                collect(*_cell_flags(cell))
+        finally:
+            _worker.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(graph, cells, profile)) as pool:
+            for cell, packed in pool.map(_cell_flags, range(k)):
+                collect(cell, packed)
+    return flags
+
+
+# ----------------------------------
+# Table
+# ----------------------------------
+class ArcFlags:
+
+    def __init__(self, cells, flags, partition=DEFAULT_PARTITION, profile=None):
+        self.cells = cells            # int32[n] cell of every node
+        self.flags = flags            # uint8[m, ceil(k / 8)]
+        self.partition = partition
+        self.profile = profile        # CostProfile.fingerprint() of the weights, None if unknown
+        self._masks = {}
+
+    @classmethod
+    def build(cls, graph, k=DEFAULT_CELLS, partition=DEFAULT_PARTITION,
+              profile=DEFAULT_PROFILE, jobs=1):
+        cells = PARTITIONS[partition](graph, k)
+        return cls(cells, compute_flags(graph, cells, profile, jobs), partition,
+                   profile.fingerprint())
+
+    @property
+    def num_cells(self):
+        return int(self.cells.max()) + 1 if len(self.cells) else 0
+
+    def mask(self, cell):
+        """Flags of one cell as bytes (mask[e] is 0 or 1), unpacked once per cell."""
+        mask = self._masks.get(cell)
+        if mask is None:
+            column = (self.flags[:, cell >> 3] >> (cell & 7)) & 1
+            mask = self._masks[cell] = column.astype(np.uint8).tobytes()
+        return mask
+
+    def density(self):
+        """Fraction of edges flagged, per cell."""
+        bits = np.unpackbits(self.flags, axis=1, count=self.num_cells, bitorder="little")
+        return bits.mean(axis=0)
+
+    def save(self, path):
+        np.savez(path, cells=self.cells, flags=self.flags, partition=np.array(self.partition),
+                 profile=np.array(self.profile or ""))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            profile = str(data["profile"]) if "profile" in data.files else None
+            return cls(data["cells"], data["flags"], str(data["partition"]), profile or None)
+
+    def arrays(self):
+        """Tables for CompactGraph.extras (shared with the graph)."""
+        return {
+            "arc_cells": self.cells,
+            "arc_flags": self.flags,
+            # Strings as 1-element arrays (the shared segment stores no 0-d arrays)
+            "arc_partition": np.array([self.partition]),
+            "arc_profile": np.array([self.profile or ""]),
+        }
+
+    @classmethod
+    def from_extras(cls, extras):
+        if "arc_flags" not in extras:
+            return None
+        profile = str(extras["arc_profile"][0]) if "arc_profile" in extras else None
+        return cls(extras["arc_cells"], extras["arc_flags"], str(extras["arc_partition"][0]),
+                   profile or None)
+
+
+def goal_cell(ctx, goal_node):
+    """The goal's arc-flag cell, or None without a usable table."""
+    table = ctx.arc_flags
+    graph = ctx.compact
+    # Missing, or made for another graph (e.g. before a shared-graph reload)
+    if table is None or len(table.flags) != graph.num_edges:
+        return None
+    return int(table.cells[graph.index_of[goal_node]])
+
+
+def edge_filter(ctx, goal_node, cell=None):
+    """
+    For the dict-based searches: a function (node, edge list) -> the
+    edges flagged for the goal's cell (or ``cell`` if given, from
+    goal_cell()), or None without a usable table.
+    Edge j of a node is CSR slot indptr[node] + j (same order as the JSON).
+    """
+    if cell is None:
+        cell = goal_cell(ctx, goal_node)
+        if cell is None:
+            return None
+    graph = ctx.compact
+    index_of = graph.index_of
+    indptr = graph.indptr
+    mask = ctx.arc_flags.mask(cell)
+
+    def flagged(node, edge_list):
+        base = int(indptr[index_of[node]])
+        return [edge for j, edge in enumerate(edge_list) if mask[base + j]]
+
+    return flagged
@@ -0,0 +1,99 @@
+"""
+Arc flags: preprocessing cost and query speedup by number of cells.
+
+For every partition and k, builds the flags (timed, with --jobs worker
+processes), then routes the same random pairs with plain UCS / A* and
+with arc_flags=True. Costs are checked to be identical; expansions and
+time per query are compared.
+
+Runs on the city graph, or on a generated one with --nodes.
+
+    python benchmarks/bench_arc_flags.py --cells 4 16 64 --nodes 5000 --jobs 4
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from arc_flags import PARTITIONS, ArcFlags  # noqa: E402
+from data_context import DataContext  # noqa: E402
+from search_algorithms import a_star, ucs  # noqa: E402
+
+SEARCHES = {"ucs": ucs, "astar": a_star}
+
+
+def measure(search, pairs, ctx, arc_flags):
+    expanded = 0
+    costs = []
+    t0 = time.perf_counter()
+    for a, b in pairs:
+        _, cost, n = search(a, b, ctx, arc_flags=arc_flags)
+        expanded += n
+        costs.append(cost)
+    return expanded / len(pairs), (time.perf_counter() - t0) / len(pairs) * 1000, costs
+
+
+def run(ctx, cells, partitions, queries, jobs, seed):
+    graph = ctx.compact
+    rng = random.Random(seed)
+    nodes = [nid for nid in ctx.nodes if ctx.components.in_largest(nid)]
+    pairs = [tuple(rng.sample(nodes, 2)) for _ in range(queries)]
+    print(f"{graph.num_nodes} nodes, {graph.num_edges} edges, {queries} queries, {jobs} jobs\n")
+
+    ctx.arc_flags = None
+    plain = {name: measure(search, pairs, ctx, False) for name, search in SEARCHES.items()}
+    for name, (expanded, ms, _) in plain.items():
+        print(f"{name} without flags: {expanded:.0f} expanded, {ms:.2f} ms/query")
+
+    print(f"\n{'partition':<9} {'k':>4} {'build s':>8} {'KB':>7} {'flagged':>8} "
+          + " ".join(f"{name + ' exp':>10} {name + ' x':>8}" for name in SEARCHES))
+    for partition in partitions:
+        for k in cells:
+            t0 = time.perf_counter()
+            table = ArcFlags.build(graph, k, partition, jobs=jobs)
+            seconds = time.perf_counter() - t0
+            ctx.arc_flags = table
+
+            row = f"{partition:<9} {k:>4} {seconds:>8.2f} {table.flags.nbytes / 1024:>7.1f} " \
+                  f"{table.density().mean():>7.1%} "
+            for name, search in SEARCHES.items():
+                expanded, ms, costs = measure(search, pairs, ctx, True)
+                assert all(abs(a - b) < 1e-6 for a, b in zip(costs, plain[name][2])), \
+                    f"{name} with {partition} k={k}: costs differ"
+                row += f"{expanded:>10.0f} {plain[name][1] / ms:>7.1f}x "
+            print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arc flags benchmark")
+    parser.add_argument("--cells", type=int, nargs="+", default=[4, 8, 16, 32, 64])
+    parser.add_argument("--partition", nargs="+", choices=sorted(PARTITIONS),
+                        default=sorted(PARTITIONS))
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument("--nodes", type=int, help="use a generated grid city of this size")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if not args.nodes:
+        run(DataContext(), args.cells, args.partition, args.queries, args.jobs, args.seed)
+        return
+
+    from generate_city import generate
+    with tempfile.TemporaryDirectory() as tmp:
+        graph, places = generate("grid", args.nodes, num_places=10, seed=args.seed)
+        with open(Path(tmp) / "road_graph.json", "w", encoding="utf-8") as f:
+            json.dump(graph, f)
+        with open(Path(tmp) / "places_with_nodes.json", "w", encoding="utf-8") as f:
+            json.dump({"places": places}, f)
+        run(DataContext(tmp), args.cells, args.partition, args.queries, args.jobs, args.seed)
+
+
+if __name__ == "__main__":
+    main()
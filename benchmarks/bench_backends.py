@@ -0,0 +1,128 @@
+"""
+Search backends side by side: setup, single-pair, one-to-many and matrix.
+
+Every installed backend (search_backends.py) answers the same queries;
+costs are checked against the pure-Python one (and single pairs against
+Dijkstra over the arrays), paths are checked to add up to their cost.
+limit=0 must keep only the zero diagonal; a negative or NaN limit must
+be rejected by every backend.
+
+Runs on the city graph, or on a generated one with --nodes.
+
+    python benchmarks/bench_backends.py --nodes 20000 --matrix 50
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from data_context import DataContext  # noqa: E402
+from delta_stepping import dijkstra_arrays  # noqa: E402
+from search_backends import BACKENDS, available_backends  # noqa: E402
+
+
+def path_cost(graph, weights, path):
+    total = 0.0
+    for u, v in zip(path, path[1:]):
+        edges = range(graph.indptr[u], graph.indptr[u + 1])
+        total += min(weights[e] for e in edges if graph.indices[e] == v)
+    return total
+
+
+def run(ctx, queries, size, limit, seed):
+    graph = ctx.compact
+    weights = graph.weights()
+    rng = random.Random(seed)
+    nodes = [i for i in range(graph.num_nodes) if ctx.components.in_largest(graph.node_id(i))]
+    pairs = [tuple(rng.sample(nodes, 2)) for _ in range(queries)]
+    targets = rng.sample(nodes, size)
+    sources = rng.sample(nodes, size)
+    print(f"{graph.num_nodes} nodes, {graph.num_edges} edges; {queries} pairs, "
+          f"one-to-{size}, {size}x{size} matrix, limit {limit} min\n")
+
+    reference = [dijkstra_arrays(graph, s)[0][t] for s, t in pairs]
+    print(f"{'backend':<8} {'setup ms':>9} {'pair ms':>9} {'1:N ms':>9} {'1:N lim ms':>11} "
+          f"{'NxN ms':>9}")
+    answers = {}
+    for name in available_backends():
+        t0 = time.perf_counter()
+        backend = BACKENDS[name](graph)
+        setup = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        routes = [backend.shortest_path(s, t) for s, t in pairs]
+        pair_s = (time.perf_counter() - t0) / len(pairs)
+        for (path, cost), expected in zip(routes, reference):
+            assert abs(cost - expected) < 1e-9, f"{name}: {cost} != {expected}"
+            assert abs(path_cost(graph, weights, path) - cost) < 1e-9, f"{name}: bad path"
+
+        t0 = time.perf_counter()
+        many = backend.one_to_many(sources[0], targets)
+        many_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        bounded = backend.one_to_many(sources[0], targets, limit)
+        bounded_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        matrix = backend.matrix(sources, targets)
+        matrix_s = time.perf_counter() - t0
+        zero = backend.matrix(sources[:3], sources[:3], 0.0)
+        assert np.array_equal(zero, np.where(np.eye(3, dtype=bool), 0.0, np.inf)), \
+            f"{name}: limit=0 should keep only the diagonal"
+        answers[name] = (many, bounded, matrix, zero)
+
+        for bad in (-1.0, float("nan")):
+            for call in (lambda: backend.one_to_many(sources[0], targets, bad),
+                         lambda: backend.matrix(sources[:2], targets, bad)):
+                try:
+                    call()
+                except ValueError:
+                    continue
+                raise AssertionError(f"{name}: limit={bad} was accepted")
+
+        print(f"{name:<8} {setup * 1000:>9.1f} {pair_s * 1000:>9.2f} {many_s * 1000:>9.2f} "
+              f"{bounded_s * 1000:>11.2f} {matrix_s * 1000:>9.1f}")
+
+    base = answers["python"]
+    for name, got in answers.items():
+        for a, b in zip(got, base):
+            assert np.array_equal(np.isfinite(a), np.isfinite(b)), f"{name}: reachability differs"
+            assert np.allclose(a[np.isfinite(a)], b[np.isfinite(b)], rtol=0, atol=1e-9), \
+                f"{name}: costs differ"
+    skipped = sorted(set(BACKENDS) - set(available_backends()))
+    print(f"\ncosts identical across {', '.join(answers)}"
+          + (f" ({', '.join(skipped)} not installed)" if skipped else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search backend benchmark")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--matrix", type=int, default=20, help="sources and targets per side")
+    parser.add_argument("--limit", type=float, default=10.0, help="minutes, for the bounded run")
+    parser.add_argument("--nodes", type=int, help="use a generated grid city of this size")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if not args.nodes:
+        run(DataContext(), args.queries, args.matrix, args.limit, args.seed)
+        return
+
+    from generate_city import generate
+    with tempfile.TemporaryDirectory() as tmp:
+        graph, places = generate("grid", args.nodes, num_places=10, seed=args.seed)
+        with open(Path(tmp) / "road_graph.json", "w", encoding="utf-8") as f:
+            json.dump(graph, f)
+        with open(Path(tmp) / "places_with_nodes.json", "w", encoding="utf-8") as f:
+            json.dump({"places": places}, f)
+        run(DataContext(tmp), args.queries, args.matrix, args.limit, args.seed)
+
+
+if __name__ == "__main__":
+    main()
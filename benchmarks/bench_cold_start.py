@@ -0,0 +1,68 @@
+"""
+Cold-start cost of a worker: module import time and warm-up time.
+
+Each measurement runs in a fresh interpreter so nothing is cached.
+
+    python benchmarks/bench_cold_start.py [--runs 5]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+IMPORT_SNIPPET = """
+import time, json
+t0 = time.perf_counter()
+import {module}
+t1 = time.perf_counter()
+print(json.dumps({{"import": t1 - t0}}))
+"""
+
+WARM_UP_SNIPPET = """
+import time, json
+t0 = time.perf_counter()
+from data_context import get_context
+t1 = time.perf_counter()
+timings = get_context().warm_up()
+timings["import"] = t1 - t0
+print(json.dumps(timings))
+"""
+
+
+def run_snippet(code, env=None):
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True, env=env
+    )
+    # Last line is ours, anything before it is noise from the module
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def summarize(label, samples):
+    keys = samples[0].keys()
+    print(f"\n{label}")
+    for key in keys:
+        values = [s[key] * 1000 for s in samples]
+        print(f"  {key:<15} median {statistics.median(values):8.2f} ms   "
+              f"min {min(values):8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    summarize("import search_algorithms",
+              [run_snippet(IMPORT_SNIPPET.format(module="search_algorithms"))
+               for _ in range(args.runs)])
+
+    summarize("warm-up (graph, heuristics, indexes)",
+              [run_snippet(WARM_UP_SNIPPET) for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()
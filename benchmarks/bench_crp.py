@@ -0,0 +1,130 @@
+"""
+CRP overlay: the three preprocessing phases and query speed.
+
+Times partition, topology and metric customization (with --jobs worker
+processes, against one), then a traffic incident: costs of the edges
+around one node go up and only the affected cells are re-customized
+(checked against a full customization). Routes the same random pairs
+with UCS, A* and the overlay; costs must match Dijkstra.
+
+Runs on the city graph, or on a generated one with --nodes.
+
+    python benchmarks/bench_crp.py --nodes 20000 --jobs 4
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from crp import CRP, default_levels, multilevel_partition  # noqa: E402
+from data_context import DataContext  # noqa: E402
+from delta_stepping import dijkstra_arrays  # noqa: E402
+from search_algorithms import a_star, ucs  # noqa: E402
+
+
+def timed(func, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+
+def incident(graph, rng, radius, factor):
+    """(multipliers, changed edge ids): edges within ``radius`` hops of a random node, slowed down."""
+    frontier = {rng.randrange(graph.num_nodes)}
+    seen = set(frontier)
+    for _ in range(radius):
+        frontier = {int(v) for u in frontier
+                    for v in graph.indices[graph.indptr[u]:graph.indptr[u + 1]]} - seen
+        seen |= frontier
+    changed = np.array([e for u in seen for e in range(graph.indptr[u], graph.indptr[u + 1])],
+                       dtype=np.int64)
+    multipliers = np.ones(graph.num_edges)
+    multipliers[changed] = factor
+    return multipliers, changed
+
+
+def run(ctx, levels, queries, jobs, seed):
+    graph = ctx.compact
+    levels = levels or default_levels(graph.num_nodes)
+    print(f"{graph.num_nodes} nodes, {graph.num_edges} edges, cells per level {levels}\n")
+
+    cells, partition_s = timed(multilevel_partition, graph, levels)
+    overlay, topology_s = timed(CRP, graph, cells)
+    print(f"{'partition':<24} {partition_s:>8.3f} s")
+    print(f"{'topology':<24} {topology_s:>8.3f} s  "
+          f"({sum(len(level.clique_tail) for level in overlay.levels)} clique arcs)")
+    for n in sorted({1, jobs}):
+        stats = {}
+        _, seconds = timed(overlay.customize, jobs=n, stats=stats)
+        per_level = ", ".join(f"{stats[f'level{i}_s']:.2f}" for i in range(len(levels)))
+        print(f"{f'customize, {n} jobs':<24} {seconds:>8.3f} s  (per level: {per_level})")
+
+    rng = random.Random(seed)
+    multipliers, changed = incident(graph, rng, radius=3, factor=4.0)
+    stats = {}
+    _, seconds = timed(overlay.customize, multipliers=multipliers, changed_edges=changed,
+                       jobs=jobs, stats=stats)
+    redone = ", ".join(f"{stats[f'level{i}_cells']}/{overlay.levels[i].num_cells}"
+                       for i in range(len(levels)))
+    print(f"{'incident re-customize':<24} {seconds:>8.3f} s  "
+          f"({len(changed)} edges, cells redone per level: {redone})")
+    partial = overlay.clique_weights
+    full = CRP(graph, cells).customize(multipliers=multipliers).clique_weights
+    assert all(np.array_equal(a, b) for a, b in zip(partial, full)), "partial customization differs"
+    overlay.customize(jobs=jobs)
+
+    nodes = [i for i in range(graph.num_nodes) if ctx.components.in_largest(graph.node_id(i))]
+    pairs = [tuple(rng.sample(nodes, 2)) for _ in range(queries)]
+    reference = [dijkstra_arrays(graph, s)[0][t] for s, t in pairs]
+
+    print(f"\n{'search':<12} {'settled':>9} {'ms/query':>9}")
+    searches = {
+        "ucs": lambda s, t: ucs(graph.node_id(s), graph.node_id(t), ctx),
+        "a_star": lambda s, t: a_star(graph.node_id(s), graph.node_id(t), ctx),
+        "crp overlay": lambda s, t: overlay.query(s, t),
+    }
+    for name, search in searches.items():
+        settled = 0
+        t0 = time.perf_counter()
+        for (s, t), expected in zip(pairs, reference):
+            _, cost, n = search(s, t)
+            settled += n
+            assert abs(cost - expected) < 1e-6, f"{name}: {cost} != {expected}"
+        ms = (time.perf_counter() - t0) / len(pairs) * 1000
+        print(f"{name:<12} {settled / len(pairs):>9.0f} {ms:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CRP overlay benchmark")
+    parser.add_argument("--levels", type=int, nargs="+",
+                        help="cells per level, finest first (powers of two)")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument("--nodes", type=int, help="use a generated grid city of this size")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if not args.nodes:
+        run(DataContext(), args.levels, args.queries, args.jobs, args.seed)
+        return
+
+    from generate_city import generate
+    with tempfile.TemporaryDirectory() as tmp:
+        graph, places = generate("grid", args.nodes, num_places=10, seed=args.seed)
+        with open(Path(tmp) / "road_graph.json", "w", encoding="utf-8") as f:
+            json.dump(graph, f)
+        with open(Path(tmp) / "places_with_nodes.json", "w", encoding="utf-8") as f:
+            json.dump({"places": places}, f)
+        run(DataContext(tmp), args.levels, args.queries, args.jobs, args.seed)
+
+
+if __name__ == "__main__":
+    main()
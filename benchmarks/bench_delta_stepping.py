@@ -0,0 +1,100 @@
+"""
+One-to-all: heap Dijkstra vs NumPy delta-stepping as the graph grows.
+
+Runs both engines on the city graph and on square grid graphs of
+increasing size, checks that distances and parents are identical, and
+prints the timings.
+
+    python benchmarks/bench_delta_stepping.py --sizes 50 100 200 400
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from compact_graph import ARRAY_FIELDS, CompactGraph, build_reverse  # noqa: E402
+from data_context import DataContext  # noqa: E402
+from delta_stepping import default_delta, delta_stepping, dijkstra_arrays  # noqa: E402
+
+
+def grid_graph(side, seed=0):
+    """side x side two-way grid with random base costs and road classes."""
+    rng = np.random.default_rng(seed)
+    n = side * side
+    r, c = np.divmod(np.arange(n), side)
+
+    pairs = []
+    right = np.flatnonzero(c < side - 1)
+    down = np.flatnonzero(r < side - 1)
+    pairs.append(np.stack([right, right + 1], 1))
+    pairs.append(np.stack([down, down + side], 1))
+    pairs = np.concatenate(pairs)
+    pairs = np.concatenate([pairs, pairs[:, ::-1]])
+
+    order = np.lexsort((pairs[:, 1], pairs[:, 0]))
+    src, dst = pairs[order, 0], pairs[order, 1]
+    m = len(src)
+
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    indices = dst.astype(np.int32)
+
+    arrays = {
+        "lat": 25.70 + r * 1e-3,
+        "lng": -80.30 + c * 1e-3,
+        "node_ids": np.arange(n, dtype=np.int64),
+        "indptr": indptr,
+        "indices": indices,
+        "cost": rng.uniform(0.05, 0.5, m),
+        "road_class": rng.integers(0, 6, m).astype(np.uint8),
+    }
+    arrays.update(build_reverse(indptr, indices, n))
+    assert set(arrays) == set(ARRAY_FIELDS)
+    return CompactGraph(arrays)
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+
+def compare(label, graph, delta_scale):
+    delta = default_delta(graph) * delta_scale
+    source = 0
+
+    (d1, p1), t_heap = timed(dijkstra_arrays, graph, source)
+    stats = {}
+    (d2, p2), t_delta = timed(delta_stepping, graph, source, delta=delta, stats=stats)
+
+    same = np.array_equal(d1, d2) and np.array_equal(p1, p2)
+    print(f"{label:<14} {graph.num_nodes:>9} {t_heap * 1000:>10.1f} {t_delta * 1000:>10.1f} "
+          f"{t_heap / t_delta:>8.2f}x {stats['phases']:>7} {'yes' if same else 'NO':>6}")
+    return same
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 200, 400],
+                        help="grid side lengths (nodes = side^2)")
+    parser.add_argument("--delta-scale", type=float, default=8.0,
+                        help="bucket width as a multiple of the mean edge weight")
+    args = parser.parse_args()
+
+    print(f"{'graph':<14} {'nodes':>9} {'heap ms':>10} {'delta ms':>10} "
+          f"{'speedup':>9} {'phases':>7} {'same':>6}")
+
+    ok = compare("city", DataContext().compact, args.delta_scale)
+    for side in args.sizes:
+        ok &= compare(f"grid {side}x{side}", grid_graph(side), args.delta_scale)
+
+    if not ok:
+        sys.exit("engines disagree")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Map payload: /graph.json vs the packed /graph.bin segment buffer.
+
+For the city graph and synthetic grids of increasing size, reports what
+the page has to download (raw and gzipped), how long decoding takes
+(json.loads + walking every edge vs typed-array views), how many map
+objects end up being drawn, and checks the buffer decodes to exactly
+the graph's segments.
+
+    python benchmarks/bench_edge_buffer.py --sizes 50 100 200
+"""
+import argparse
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_delta_stepping import grid_graph  # noqa: E402
+from data_context import DataContext  # noqa: E402
+from edge_buffer import build_edge_buffer, read_edge_buffer, segments  # noqa: E402
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, (time.perf_counter() - t0) * 1000
+
+
+def json_path(text):
+    """What the old page did: parse, then one polyline per directed edge."""
+    graph = json.loads(text)
+    nodes = graph["nodes"]
+    lines = []
+    for from_id, edges in graph["edges"].items():
+        a = nodes[from_id]
+        for edge in edges:
+            b = nodes[edge["to"]]
+            lines.append(((a["lat"], a["lng"]), (b["lat"], b["lng"])))
+    return lines
+
+
+def check(graph, data):
+    """The buffer holds every undirected segment once, in float32."""
+    _, coords, classes = read_edge_buffer(data)
+    a, b, expected_classes = segments(graph)
+    expected = np.stack([graph.lat[a], graph.lng[a], graph.lat[b], graph.lng[b]], 1)
+    assert np.array_equal(coords, expected.astype(np.float32))
+    assert np.array_equal(classes, expected_classes)
+
+    pairs = {(min(u, v), max(u, v))
+             for u in range(graph.num_nodes) for v in graph.neighbors(u).tolist() if u != v}
+    assert len(pairs) == len(coords)
+
+
+def report(label, graph, json_text):
+    data, build_ms = timed(build_edge_buffer, graph)
+    check(graph, data)
+
+    raw_json = json_text.encode("utf-8")
+    lines, json_ms = timed(json_path, json_text)
+    (_, _, classes), bin_ms = timed(read_edge_buffer, data)
+
+    print(f"{label:<12} {graph.num_edges:>8} "
+          f"{len(raw_json) / 1024:>9.1f} {len(gzip.compress(raw_json)) / 1024:>8.1f} "
+          f"{json_ms:>8.2f} {len(lines):>8} | "
+          f"{len(data) / 1024:>9.1f} {len(gzip.compress(data)) / 1024:>8.1f} "
+          f"{build_ms:>8.2f} {bin_ms:>7.3f} {len(np.unique(classes)):>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Map payload: JSON vs binary edge buffer")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 200],
+                        help="grid side lengths")
+    args = parser.parse_args()
+
+    print(f"{'graph':<12} {'edges':>8} "
+          f"{'json KB':>9} {'gzip KB':>8} {'parse ms':>8} {'objects':>8} | "
+          f"{'bin KB':>9} {'gzip KB':>8} {'build ms':>8} {'read ms':>7} {'layers':>6}")
+
+    ctx = DataContext()
+    with open(ctx.path(ctx.graph_file), "r", encoding="utf-8") as f:
+        report("city", ctx.compact, f.read())
+
+    for side in args.sizes:
+        graph = grid_graph(side)
+        report(f"grid {side}", graph, json.dumps(graph.to_json()))
+
+
+if __name__ == "__main__":
+    main()
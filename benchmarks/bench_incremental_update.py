@@ -0,0 +1,216 @@
+"""
+Incremental graph update vs full rebuild, by size of the change.
+
+Mutates the road extract (drops, retags, reshapes and adds features),
+then brings graph, SCC index, snapped places and landmark tables up to
+date both ways: scripts/update_graph.py's patching, and build_graph +
+snapping + landmark tables from scratch. Both results are compared by
+coordinates (node ids differ between the two) before timing is shown.
+
+Runs on the city extract and on a synthetic grid extract, since the
+gap grows with the city while the patch cost follows the change.
+
+    python benchmarks/bench_incremental_update.py --changes 3 30 300 --grid 150
+"""
+import argparse
+import copy
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from build_graph import ROADS_FILE, build_graph  # noqa: E402
+from compact_graph import CompactGraph  # noqa: E402
+from delta_stepping import delta_stepping  # noqa: E402
+from graph_components import ComponentIndex  # noqa: E402
+from landmarks import LandmarkTable  # noqa: E402
+from map_places_to_nodes import resnap_places, snap_places  # noqa: E402
+from update_graph import patch_graph, update_components  # noqa: E402
+
+BLOCK_DEG = 0.001
+HIGHWAYS = ("primary", "secondary", "tertiary", "residential")
+
+
+def grid_extract(side):
+    """A side x side street grid as OSM-style LineString features."""
+    features = []
+
+    def street(osm_id, coords, highway):
+        features.append({
+            "type": "Feature",
+            "properties": {"osm_id": str(osm_id), "highway": highway, "name": f"Street {osm_id}"},
+            "geometry": {"type": "LineString", "coordinates": coords},
+        })
+
+    lat0, lng0 = 25.7, -80.3
+    for i in range(side):
+        highway = HIGHWAYS[0 if i % 10 == 0 else 3]
+        # Short features (10 blocks) like real OSM ways
+        for j0 in range(0, side - 1, 10):
+            js = range(j0, min(j0 + 11, side))
+            street(len(features) + 1, [[lng0 + j * BLOCK_DEG, lat0 + i * BLOCK_DEG] for j in js], highway)
+            street(len(features) + 1, [[lng0 + i * BLOCK_DEG, lat0 + j * BLOCK_DEG] for j in js], highway)
+    return {"type": "FeatureCollection", "features": features}
+
+
+def mutate(geo, count, rng, keep=()):
+    """
+    Drop, retag, reshape and add about ``count`` features in total.
+    Features through a ``keep`` coordinate (the landmarks) are left alone.
+    """
+    geo = copy.deepcopy(geo)
+    keep = set(keep)
+    features = [f for f in geo["features"] if f["properties"].get("highway") in HIGHWAYS
+                or f["properties"].get("highway") in ("motorway", "motorway_link")]
+    features = [f for f in features
+                if not any(tuple(c) in keep for c in f["geometry"]["coordinates"])]
+    picked = rng.sample(features, min(len(features), count))
+    quarter = max(1, len(picked) // 4)
+
+    dropped = {id(f) for f in picked[:quarter]}
+    for f in picked[quarter:2 * quarter]:
+        f["properties"]["highway"] = rng.choice(HIGHWAYS)
+        f["properties"]["other_tags"] = '"oneway"=>"yes"' if rng.random() < 0.5 else None
+    for f in picked[2 * quarter:3 * quarter]:
+        coords = f["geometry"]["coordinates"]
+        k = rng.randrange(len(coords))
+        coords[k] = [coords[k][0] + 0.00003, coords[k][1] + 0.00002]
+
+    # New roads connect two nearby existing points, like a new side street
+    coords = [c for f in features for c in f["geometry"]["coordinates"]]
+    for n in range(len(picked) - 3 * quarter):
+        a = rng.choice(coords)
+        near = [c for c in rng.sample(coords, min(len(coords), 2000))
+                if c != a and abs(c[0] - a[0]) + abs(c[1] - a[1]) < 0.005]
+        b = rng.choice(near) if near else rng.choice(coords)
+        mid = [(a[0] + b[0]) / 2 + 0.00001, (a[1] + b[1]) / 2]
+        geo["features"].append({
+            "type": "Feature",
+            "properties": {"osm_id": f"new{n}", "highway": "residential", "name": None},
+            "geometry": {"type": "LineString", "coordinates": [a, mid, b]},
+        })
+    geo["features"] = [f for f in geo["features"] if id(f) not in dropped]
+    return geo
+
+
+def make_places(graph, count, rng):
+    nodes = list(graph["nodes"].values())
+    return [
+        {"id": str(i), "name": f"Place {i}", "type": "unknown",
+         "lat": node["lat"] + rng.uniform(-2e-4, 2e-4), "lon": node["lng"] + rng.uniform(-2e-4, 2e-4)}
+        for i, node in enumerate(rng.sample(nodes, min(count, len(nodes))))
+    ]
+
+
+# ----------------------------------
+# Both ways
+# ----------------------------------
+def full_rebuild(geo, places, landmark_coords):
+    """Same landmarks (by position) as the patched table, computed from scratch."""
+    t0 = time.perf_counter()
+    graph = build_graph(geo)
+    snapped = snap_places(places, graph)
+    compact = CompactGraph.from_json(graph)
+    backward = compact.reversed()
+    coord_to_id = {(node["lng"], node["lat"]): nid for nid, node in graph["nodes"].items()}
+    ix = [compact.index_of[coord_to_id[c]] for c in landmark_coords]
+    table = LandmarkTable(
+        np.array(ix),
+        np.vstack([delta_stepping(compact, i)[0] for i in ix]),
+        np.vstack([delta_stepping(backward, i)[0] for i in ix]),
+    )
+    return graph, snapped, table, time.perf_counter() - t0
+
+
+def incremental(graph, geo, places, table):
+    t0 = time.perf_counter()
+    changes = patch_graph(graph, geo)
+    summary, gained, lost = update_components(graph, changes)
+    if gained is None:
+        snapped = snap_places(places, graph)
+    else:
+        snapped, _ = resnap_places(places, graph, gained, lost)
+    compact = CompactGraph.from_json(graph)
+    ix = compact.index_of
+    table.update(compact,
+                 [(ix[u], ix[v], w) for u, v, w in changes["edges_removed"]],
+                 [(ix[u], ix[v], w) for u, v, w in changes["edges_added"]])
+    return changes, snapped, time.perf_counter() - t0
+
+
+def by_coords(graph, snapped, table):
+    """Id-free view of a result for comparison."""
+    nodes = graph["nodes"]
+    at = lambda nid: (nodes[nid]["lng"], nodes[nid]["lat"])  # noqa: E731
+    edges = sorted(
+        (at(u), at(e["to"]), round(e["cost"], 9), e["road_type"])
+        for u, out in graph["edges"].items() for e in out
+    )
+    used = {at(u) for u, out in graph["edges"].items() if out} | \
+           {at(e["to"]) for out in graph["edges"].values() for e in out}
+    comps = ComponentIndex.from_json(graph["components"])
+    groups = {}
+    for nid in nodes:
+        if at(nid) in used:
+            groups.setdefault(comps.component[nid], set()).add(at(nid))
+    partition = sorted(sorted(g) for g in groups.values())
+    places = [at(p["node_id"]) for p in snapped]
+    ids = list(nodes)
+    dist = {at(ids[i]): (round(float(table.dist_from[0][i]), 6), round(float(table.dist_to[0][i]), 6))
+            for i in range(len(ids)) if at(ids[i]) in used}
+    return edges, partition, places, dist
+
+
+def run(label, geo, sizes, rng):
+    graph = build_graph(geo)
+    places = snap_places(make_places(graph, 200, rng), graph)
+    table = LandmarkTable.build(CompactGraph.from_json(graph))
+    ids = list(graph["nodes"])
+    landmark_coords = [(graph["nodes"][ids[i]]["lng"], graph["nodes"][ids[i]]["lat"])
+                       for i in table.landmarks]
+    print(f"\n{label}: {len(graph['nodes'])} nodes, {len(graph['features'])} features")
+    print(f"{'changed':>8} {'new nodes':>9} {'edges +/-':>11} {'full s':>8} {'patch s':>8} {'speedup':>8}")
+
+    for size in sizes:
+        new_geo = mutate(geo, size, rng, landmark_coords)
+        expected = full_rebuild(new_geo, places, landmark_coords)
+
+        patched = copy.deepcopy(graph)
+        patched_table = LandmarkTable(table.landmarks, table.dist_from.copy(), table.dist_to.copy())
+        changes, snapped, seconds = incremental(patched, new_geo, places, patched_table)
+
+        got = by_coords(patched, snapped, patched_table)
+        want = by_coords(*expected[:3])
+        for name, a, b in zip(("edges", "components", "places", "landmarks"), got, want):
+            assert a == b, f"{label}, {size} changes: {name} differ"
+
+        f = changes["features"]
+        changed = len(f["added"]) + len(f["modified"]) + len(f["removed"])
+        edges = f"+{len(changes['edges_added'])}/-{len(changes['edges_removed'])}"
+        print(f"{changed:>8} {len(changes['nodes_added']):>9} {edges:>11} {expected[3]:>8.3f} "
+              f"{seconds:>8.3f} {expected[3] / seconds:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental update benchmark")
+    parser.add_argument("--changes", type=int, nargs="+", default=[4, 20, 100])
+    parser.add_argument("--grid", type=int, default=150, help="synthetic grid side (0 to skip)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with open(ROADS_FILE, "r", encoding="utf-8") as f:
+        run("city", json.load(f), args.changes, rng)
+    if args.grid:
+        run(f"grid {args.grid}x{args.grid}", grid_extract(args.grid), args.changes, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Nearest facility of a type: three ways, per query.
+
+- a_star to every facility of the type, keep the cheapest (the old way)
+- nearest_facilities(): one Dijkstra that stops at the first facility
+- ServiceAreas lookup (network Voronoi built offline; build time shown)
+
+All three must agree on the travel time.
+
+    python benchmarks/bench_nearest.py --type bus_stop --queries 50
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data_context import DataContext  # noqa: E402
+from facilities import FacilityIndex, ServiceAreas, nearest_facilities  # noqa: E402
+from search_algorithms import a_star  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nearest facility benchmark")
+    parser.add_argument("--type", default="bus_stop")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ctx = DataContext()
+    graph = ctx.compact
+    t0 = time.perf_counter()
+    areas = ServiceAreas.build(graph, ctx.places, types={args.type})
+    build_s = time.perf_counter() - t0
+    index = FacilityIndex(graph, ctx.places, ctx.components, areas)
+    targets = index.by_type[args.type]
+
+    rng = random.Random(args.seed)
+    starts = [int(rng.choice(index.snap_nodes)) for _ in range(args.queries)]
+    print(f"{len(targets)} {args.type} nodes, {graph.num_nodes} graph nodes, "
+          f"service areas built in {build_s:.3f}s\n")
+
+    def per_facility(start):
+        best = float("inf")
+        for facility in targets:
+            best = min(best, a_star(graph.node_id(start), graph.node_id(facility), ctx)[1])
+        return best
+
+    ways = {
+        "a_star per facility": per_facility,
+        "early-exit search": lambda s: nearest_facilities(graph, s, targets.keys())[0][1],
+        "service area lookup": lambda s: areas.nearest(args.type, s)[2],
+    }
+    answers = {}
+    print(f"{'method':<22} {'ms/query':>10}")
+    for name, func in ways.items():
+        t0 = time.perf_counter()
+        answers[name] = [func(s) for s in starts]
+        print(f"{name:<22} {(time.perf_counter() - t0) / len(starts) * 1000:>10.3f}")
+
+    reference = answers["a_star per facility"]
+    for name, got in answers.items():
+        assert all(abs(a - b) < 1e-4 for a, b in zip(got, reference)), f"{name} disagrees"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Node numbering vs throughput of the array-backed engines.
+
+Renumbers the city graph and a synthetic grid (first shuffled, to mimic
+the scattered ids of OSM order) with each ordering in node_order.py,
+then times one-to-all searches from the same source nodes with heap
+Dijkstra and delta-stepping over the resulting CompactGraph. Results
+are checked to be identical across orderings.
+
+    python benchmarks/bench_node_order.py --grid 300 --sources 5
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_delta_stepping import grid_graph  # noqa: E402
+from compact_graph import CompactGraph  # noqa: E402
+from data_context import DataContext  # noqa: E402
+from delta_stepping import delta_stepping, dijkstra_arrays  # noqa: E402
+from node_order import ORDERINGS, apply_order, edge_spread, renumber  # noqa: E402
+
+ENGINES = {
+    "dijkstra": dijkstra_arrays,
+    "delta": delta_stepping,
+}
+
+
+def run(label, graph_json, sources, repeat):
+    print(f"\n{label}: {len(graph_json['nodes'])} nodes")
+    print(f"{'order':<10} {'spread':>8} {'renumber s':>10} "
+          + " ".join(f"{name + ' q/s':>14}" for name in ENGINES))
+
+    reference = None
+    variants = [("input", graph_json, 0.0)]
+    for method in ORDERINGS:
+        t0 = time.perf_counter()
+        renumbered, _ = renumber(graph_json, method)
+        variants.append((method, renumbered, time.perf_counter() - t0))
+
+    for name, g, seconds in variants:
+        graph = CompactGraph.from_json(g)
+        # Same physical source nodes in every numbering
+        ids = g.get("original_ids")
+        to_index = {old: i for i, old in enumerate(ids)} if ids else graph.index_of
+        local = [to_index[s] for s in sources]
+
+        rates = []
+        for engine in ENGINES.values():
+            engine(graph, local[0])  # warm weights cache
+            t0 = time.perf_counter()
+            for _ in range(repeat):
+                for s in local:
+                    engine(graph, s)
+            rates.append(repeat * len(local) / (time.perf_counter() - t0))
+
+        # Distances per original node must not depend on the numbering
+        back = np.array([int(x) for x in ids], dtype=np.int64) if ids else np.arange(graph.num_nodes)
+        dist = np.empty(graph.num_nodes)
+        dist[back] = delta_stepping(graph, local[-1])[0]
+        if reference is None:
+            reference = dist
+        assert np.array_equal(dist, reference), name
+
+        print(f"{name:<10} {edge_spread(g)[0]:>8.1f} {seconds:>10.2f} "
+              + " ".join(f"{r:>14.1f}" for r in rates))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Node ordering benchmark")
+    parser.add_argument("--grid", type=int, default=300, help="grid side (0 to skip)")
+    parser.add_argument("--sources", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    ctx = DataContext()
+    graph = ctx.graph
+    run("city", graph, rng.sample(list(graph["nodes"]), args.sources), args.repeat * 10)
+
+    if args.grid:
+        grid = grid_graph(args.grid).to_json()
+        order = list(grid["nodes"])
+        rng.shuffle(order)
+        shuffled, _ = apply_order(grid, order)
+        shuffled.pop("original_ids")  # treat the shuffled ids as the input ids
+        run(f"grid {args.grid}x{args.grid} (shuffled)", shuffled,
+            rng.sample(list(shuffled["nodes"]), args.sources), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Per-origin UCS tree cache vs plain ucs on a skewed workload.
+
+Most queries start from a few "hot" origins (hospitals by default), the
+rest from random places. Runs the workload with plain ucs and through
+SearchTreeCache at a few memory budgets, checks every answer matches,
+and prints the speed-up with the cache's hit/resume/eviction counters.
+The byte estimate is compared with tracemalloc once at the end.
+
+    python benchmarks/bench_origin_cache.py --queries 500 --budgets-kb 64 256 4096
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data_context import DataContext  # noqa: E402
+from search_algorithms import ucs  # noqa: E402
+from search_cache import SearchTree, SearchTreeCache  # noqa: E402
+
+
+def workload(ctx, queries, hot_type, hot_share, seed):
+    rng = random.Random(seed)
+    nodes = sorted({p["node_id"] for p in ctx.places})
+    hot = sorted({p["node_id"] for p in ctx.places if p["type"] == hot_type}) or nodes[:5]
+    return [
+        (rng.choice(hot) if rng.random() < hot_share else rng.choice(nodes), rng.choice(nodes))
+        for _ in range(queries)
+    ], len(hot)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Origin tree cache benchmark")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--hot-type", default="hospital")
+    parser.add_argument("--hot-share", type=float, default=0.8)
+    parser.add_argument("--budgets-kb", type=int, nargs="+", default=[64, 256, 4096])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ctx = DataContext()
+    ctx.warm_up()
+    queries, num_hot = workload(ctx, args.queries, args.hot_type, args.hot_share, args.seed)
+    print(f"{len(queries)} queries, {args.hot_share:.0%} from {num_hot} '{args.hot_type}' origins\n")
+
+    t0 = time.perf_counter()
+    expected = [ucs(a, b, ctx) for a, b in queries]
+    base = time.perf_counter() - t0
+    base_expanded = sum(r[2] for r in expected)
+    print(f"{'plain ucs':<14} {base:>8.3f}s {base_expanded:>10} expanded")
+
+    print(f"\n{'budget':<14} {'time':>9} {'speed-up':>8} {'expanded':>10} {'hits':>6} "
+          f"{'resumes':>7} {'misses':>6} {'evicted':>7} {'origins':>7} {'KB':>8}")
+    for budget in args.budgets_kb:
+        cache = SearchTreeCache(budget * 1024, ctx)
+        t0 = time.perf_counter()
+        got = [cache.ucs(a, b) for a, b in queries]
+        elapsed = time.perf_counter() - t0
+
+        for (a, b), want, have in zip(queries, expected, got):
+            assert want[:2] == have[:2], (a, b)
+
+        s = cache.stats()
+        print(f"{f'{budget} KB':<14} {elapsed:>8.3f}s {base / elapsed:>7.1f}x {s['expanded']:>10} "
+              f"{s['hits']:>6} {s['resumes']:>7} {s['misses']:>6} {s['evictions']:>7} "
+              f"{s['origins']:>7} {s['bytes'] / 1024:>8.1f}")
+
+    # How good is the per-node byte estimate?
+    tracemalloc.start()
+    tree = SearchTree(queries[0][0], ctx)
+    tree.query(None)  # run to exhaustion
+    actual = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"\nfull tree: {tree.settled} nodes, estimate {tree.nbytes() / 1024:.1f} KB, "
+          f"tracemalloc {actual / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Pareto search: front size, label counts and runtime vs the pruning knobs.
+
+Runs pareto_search for random place pairs on the city graph (and random
+node pairs on a synthetic grid, where fronts are much larger) for each
+(epsilon, max_labels) setting, and reports the averages next to how far
+the fastest route on the front is from the exact optimum (epsilon=0,
+no cap).
+
+    python benchmarks/bench_pareto.py --pairs 30 --epsilons 0 0.01 0.05 --caps 4 16 64
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_delta_stepping import grid_graph  # noqa: E402
+from data_context import DataContext  # noqa: E402
+from pareto_search import pareto_search  # noqa: E402
+
+EXACT_CAP = 10 ** 6
+
+
+def grid_context(side, tmp):
+    graph = grid_graph(side)
+    with open(Path(tmp) / "road_graph.json", "w", encoding="utf-8") as f:
+        json.dump(graph.to_json(), f)
+    return DataContext(data_dir=tmp)
+
+
+def sweep(label, ctx, pairs, epsilons, caps):
+    exact = [pareto_search(a, b, ctx, epsilon=0.0, max_labels=EXACT_CAP) for a, b in pairs]
+
+    print(f"\n{label}: {len(pairs)} pairs, exact front "
+          f"{sum(map(len, exact)) / len(pairs):.1f} routes on average")
+    print(f"{'epsilon':>8} {'cap':>5} {'front':>6} {'created':>8} {'settled':>8} "
+          f"{'pruned':>7} {'capped':>7} {'max bag':>7} {'ms':>8} {'time gap':>9}")
+
+    for eps in epsilons:
+        for cap in caps:
+            totals = {}
+            gap = 0.0
+            for (a, b), best in zip(pairs, exact):
+                stats = {}
+                front = pareto_search(a, b, ctx, epsilon=eps, max_labels=cap, stats=stats)
+                for key, value in stats.items():
+                    totals[key] = totals.get(key, 0) + value
+                if front and best:
+                    gap = max(gap, front[0]["time"] / best[0]["time"] - 1)
+
+            avg = {k: v / len(pairs) for k, v in totals.items()}
+            print(f"{eps:>8g} {cap:>5} {avg['front_size']:>6.1f} {avg['labels_created']:>8.0f} "
+                  f"{avg['labels_settled']:>8.0f} {avg['pruned_epsilon']:>7.0f} "
+                  f"{avg['pruned_cap']:>7.0f} {totals['max_bag'] / len(pairs):>7.1f} "
+                  f"{avg['runtime_ms']:>8.2f} {gap:>8.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pareto search pruning sweep")
+    parser.add_argument("--pairs", type=int, default=30)
+    parser.add_argument("--epsilons", type=float, nargs="+", default=[0, 0.01, 0.05])
+    parser.add_argument("--caps", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--grid", type=int, default=30, help="grid side (0 to skip)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    ctx = DataContext()
+    place_nodes = sorted({p["node_id"] for p in ctx.places})
+    pairs = [tuple(rng.sample(place_nodes, 2)) for _ in range(args.pairs)]
+    sweep("city", ctx, pairs, args.epsilons, args.caps)
+
+    if args.grid:
+        with tempfile.TemporaryDirectory() as tmp:
+            ctx = grid_context(args.grid, tmp)
+            nodes = list(ctx.nodes)
+            pairs = [tuple(rng.sample(nodes, 2)) for _ in range(args.pairs)]
+            sweep(f"grid {args.grid}x{args.grid}", ctx, pairs, args.epsilons, args.caps)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Route payload size: raw coordinate JSON vs encoded geometry.
+
+Routes random place pairs with UCS and compares the bytes needed to ship
+the geometry (plain and gzipped) as JSON coordinates, an encoded
+polyline and delta-varints, with and without Douglas-Peucker
+simplification. Also reports the old /find-path style payload that
+carried the node list of every algorithm.
+
+    python benchmarks/bench_payload.py --pairs 50 --tolerances 0 5 10 25
+"""
+import argparse
+import gzip
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data_context import DataContext  # noqa: E402
+from route_encoding import decode_polyline, encode_polyline, encode_varint, simplify  # noqa: E402
+from search_algorithms import ucs  # noqa: E402
+
+
+def sizes(text):
+    raw = text.encode("utf-8")
+    return len(raw), len(gzip.compress(raw))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Route geometry payload sizes")
+    parser.add_argument("--pairs", type=int, default=50)
+    parser.add_argument("--tolerances", type=float, nargs="+", default=[0, 5, 10, 25])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ctx = DataContext()
+    nodes = ctx.graph["nodes"]
+    place_nodes = sorted({p["node_id"] for p in ctx.places})
+    rng = random.Random(args.seed)
+
+    routes = []
+    while len(routes) < args.pairs:
+        a, b = rng.sample(place_nodes, 2)
+        path, _, _ = ucs(a, b, ctx)
+        if path:
+            routes.append(path)
+
+    print(f"{len(routes)} routes, {sum(map(len, routes)) / len(routes):.0f} nodes on average\n")
+
+    # Old page/API shape: every algorithm's node list + full coordinates
+    legacy = [
+        json.dumps({
+            "paths": {k: path for k in ("ucs", "greedy", "astar", "bidir")},
+            "coords": [[nodes[n]["lat"], nodes[n]["lng"]] for n in path],
+        })
+        for path in routes
+    ]
+    rows = [("legacy (paths + coords)", 0, *map(sum, zip(*map(sizes, legacy))), None, None)]
+
+    for tol in args.tolerances:
+        coords = [simplify([[nodes[n]["lat"], nodes[n]["lng"]] for n in path], tol)
+                  for path in routes]
+        points = sum(map(len, coords))
+
+        for label, encode in (("json coords", json.dumps),
+                              ("polyline", encode_polyline),
+                              ("varint", encode_varint)):
+            t0 = time.perf_counter()
+            encoded = [encode(c) for c in coords]
+            ms = (time.perf_counter() - t0) * 1000 / len(coords)
+            raw, gz = map(sum, zip(*map(sizes, encoded)))
+            rows.append((label, tol, raw, gz, points, ms))
+
+        # Polyline precision loss stays under ~1 m
+        err = max(
+            abs(x - y)
+            for c in coords
+            for p, q in zip(c, decode_polyline(encode_polyline(c)))
+            for x, y in zip(p, q)
+        )
+        assert err <= 5e-6 + 1e-12, err
+
+    base = rows[0][2]
+    print(f"{'encoding':<24} {'tol (m)':>7} {'bytes':>9} {'gzip':>8} {'points':>7} "
+          f"{'encode ms':>9} {'vs legacy':>9}")
+    for label, tol, raw, gz, points, ms in rows:
+        print(f"{label:<24} {tol:>7g} {raw:>9} {gz:>8} {points or '-':>7} "
+              f"{f'{ms:.3f}' if ms is not None else '-':>9} {base / raw:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+How the searches scale with graph size, on generated cities.
+
+For each size, generates a city with scripts/generate_city.py, routes
+random place pairs with every algorithm and records mean expansions,
+time and peak traced memory per query. An algorithm whose mean query
+time exceeds --max-seconds is dropped for the larger sizes (the
+dict-based searches sort their whole open list on every pop).
+
+Prints a table, optionally writes CSV, and plots expansions / time /
+memory against node count when matplotlib is installed.
+
+    python benchmarks/bench_scaling.py --kind grid --sizes 1000 10000 100000 --plot scaling.png
+"""
+import argparse
+import csv
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from anytime_search import ara_star  # noqa: E402
+from data_context import DataContext  # noqa: E402
+from delta_stepping import shortest_path_tree  # noqa: E402
+from generate_city import generate  # noqa: E402
+from search_algorithms import a_star, bidirectional_ucs, greedy, ucs  # noqa: E402
+
+try:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+except ImportError:
+    plt = None
+
+
+def _one_to_all(start, goal, ctx):
+    dist, _ = shortest_path_tree(ctx, start)
+    return None, None, int((dist < float("inf")).sum())
+
+
+ALGORITHMS = {
+    "ucs": ucs,
+    "greedy": greedy,
+    "astar": a_star,
+    "bidir": bidirectional_ucs,
+    "ara": lambda s, g, ctx: ara_star(s, g, ctx)[:3],
+    "delta (1-to-all)": _one_to_all,
+}
+
+
+def write_city(kind, size, motorways, seed, tmp):
+    graph, places = generate(kind, size, motorways, num_places=100, seed=seed)
+    with open(Path(tmp) / "road_graph.json", "w", encoding="utf-8") as f:
+        json.dump(graph, f)
+    with open(Path(tmp) / "places_with_nodes.json", "w", encoding="utf-8") as f:
+        json.dump({"places": places}, f)
+    return len(graph["nodes"])
+
+
+def measure(func, pairs, ctx):
+    expanded = 0
+    t0 = time.perf_counter()
+    for a, b in pairs:
+        expanded += func(a, b, ctx)[2]
+    seconds = (time.perf_counter() - t0) / len(pairs)
+
+    # Memory in a separate run: tracemalloc slows everything down
+    tracemalloc.start()
+    func(*pairs[0], ctx)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return expanded / len(pairs), seconds, peak
+
+
+def plot(rows, path):
+    fig, axes = plt.subplots(1, 3, figsize=(15, 4.5))
+    metrics = (("expanded", "expanded nodes"), ("ms", "time per query (ms)"), ("peak_kb", "peak KB"))
+    for ax, (key, label) in zip(axes, metrics):
+        for name in ALGORITHMS:
+            pts = [(r["nodes"], r[key]) for r in rows if r["algorithm"] == name]
+            if pts:
+                ax.plot(*zip(*pts), marker="o", label=name)
+        ax.set_xscale("log")
+        ax.set_yscale("log")
+        ax.set_xlabel("nodes")
+        ax.set_ylabel(label)
+        ax.grid(True, which="both", alpha=0.3)
+    axes[0].legend()
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    print(f"\nplot written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search scaling on synthetic cities")
+    parser.add_argument("--kind", choices=["grid", "radial"], default="grid")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 3000, 10000, 30000])
+    parser.add_argument("--motorways", action="store_true")
+    parser.add_argument("--pairs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=2.0,
+                        help="drop an algorithm once a query takes longer than this")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", help="write the results here")
+    parser.add_argument("--plot", help="write a PNG plot here (needs matplotlib)")
+    args = parser.parse_args()
+
+    active = dict(ALGORITHMS)
+    rows = []
+    print(f"{'nodes':>9} {'algorithm':<18} {'expanded':>10} {'ms/query':>10} {'peak KB':>10}")
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            nodes = write_city(args.kind, size, args.motorways, args.seed, tmp)
+            ctx = DataContext(data_dir=tmp)
+            ctx.warm_up()
+
+            rng = random.Random(args.seed)
+            place_nodes = [p["node_id"] for p in ctx.places]
+            pairs = [tuple(rng.sample(place_nodes, 2)) for _ in range(args.pairs)]
+
+            for name, func in list(active.items()):
+                expanded, seconds, peak = measure(func, pairs, ctx)
+                rows.append({"nodes": nodes, "algorithm": name, "expanded": expanded,
+                             "ms": seconds * 1000, "peak_kb": peak / 1024})
+                print(f"{nodes:>9} {name:<18} {expanded:>10.0f} {seconds * 1000:>10.1f} "
+                      f"{peak / 1024:>10.0f}")
+                if seconds > args.max_seconds:
+                    print(f"{'':>9} ({name} dropped for larger sizes)")
+                    del active[name]
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+    if args.plot:
+        if plt is None:
+            print("\nmatplotlib is not installed; skipping the plot")
+        else:
+            plot(rows, args.plot)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Per-worker private memory with and without the shared-memory graph.
+
+Starts N worker processes that load the graph (parsed JSON per worker,
+or attached from shared_graph.py) and run one search, then reports each
+worker's private memory from /proc/self/smaps_rollup (Linux only).
+
+    python benchmarks/bench_shared_memory.py --workers 1 2 4 8
+"""
+import argparse
+import multiprocessing as mp
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from compact_graph import CompactGraph  # noqa: E402
+from data_context import DataContext  # noqa: E402
+from search_algorithms import ucs  # noqa: E402
+from shared_graph import SharedGraphStore  # noqa: E402
+
+
+def private_kb():
+    total = 0
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith(("Private_Clean", "Private_Dirty")):
+                total += int(line.split()[1])
+    return total
+
+
+def worker(shared_dir, barrier, results):
+    ctx = DataContext(shared_dir=shared_dir)
+    start = ctx.places[0]["node_id"]
+    goal = ctx.places[-1]["node_id"]
+    ucs(start, goal, ctx)
+    results.put(private_kb())
+    # Hold on until every worker has measured
+    barrier.wait()
+
+
+def measure(n, shared_dir):
+    barrier = mp.Barrier(n)
+    results = mp.Queue()
+    procs = [mp.Process(target=worker, args=(shared_dir, barrier, results)) for _ in range(n)]
+    for p in procs:
+        p.start()
+    sizes = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return sum(sizes) / len(sizes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    mp.set_start_method("spawn")
+
+    with tempfile.TemporaryDirectory() as run_dir:
+        store = SharedGraphStore(run_dir)
+        store.publish(CompactGraph.from_json(DataContext().graph))
+
+        print(f"{'workers':>8} {'json KB/worker':>16} {'shared KB/worker':>18}")
+        for n in args.workers:
+            print(f"{n:>8} {measure(n, None):>16.0f} {measure(n, run_dir):>18.0f}")
+
+        store.unpublish(force=True)
+
+
+if __name__ == "__main__":
+    main()
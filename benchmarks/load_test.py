@@ -0,0 +1,467 @@
+"""
+Load test: replay a realistic request mix against the Flask app.
+
+A scenario (JSON, see benchmarks/scenarios/) describes the traffic:
+
+- phases:      open-loop arrival rates, [{"rate": req/s, "seconds": s}, ...].
+               Arrivals are Poisson and do not wait for earlier responses,
+               so latency includes time spent queued behind a slow server.
+- mix:         share of "find-path" (the form POST), "api-route" and
+               "graph" (/graph.json) requests.
+- modes:       share of manual / optimal / speed among the route requests
+               (manual picks one of "algorithms" at random).
+- popularity:  origin/destination pairs drawn from places_with_nodes.json;
+               a pool of "pairs" routes, requested with Zipf("exponent")
+               popularity so popular routes repeat like real traffic.
+- server_env:  environment for the app when this tool starts it, i.e. the
+               server configuration under test (CITY_ARC_FLAGS, ...).
+
+Targets: --inprocess uses Flask's test client in this process; --url
+hits a running server; otherwise the app is started on --port
+(``flask run``, or --server-cmd, e.g. gunicorn) and stopped at the end.
+RSS of the server process tree (this process when in-process) is
+sampled over time from /proc (Linux).
+
+Reports throughput, latency percentiles, errors by status and a
+timeline per --interval seconds; --output saves it as JSON, and
+--compare prints saved runs side by side. Server errors (5xx, 429, no
+response) and client errors (other 4xx) are counted separately, so bad
+requests in a mix do not pass for successes.
+
+    python benchmarks/load_test.py benchmarks/scenarios/baseline.json --inprocess
+    python benchmarks/load_test.py benchmarks/scenarios/rush_hour.json -o rush.json
+    python benchmarks/load_test.py benchmarks/scenarios/rush_hour_tuned.json -o tuned.json \\
+        --server-cmd "gunicorn -w 4 -b 127.0.0.1:{port} app:app"
+    python benchmarks/load_test.py --compare rush.json tuned.json
+"""
+import argparse
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from data_context import DataContext  # noqa: E402
+
+DEFAULT_SCENARIO = {
+    "name": "default",
+    "phases": [{"rate": 5, "seconds": 30}],
+    "concurrency": 32,
+    "mix": {"find-path": 0.8, "api-route": 0.1, "graph": 0.1},
+    "modes": {"manual": 0.2, "optimal": 0.5, "speed": 0.3},
+    "algorithms": ["ucs", "greedy", "astar", "bidir"],
+    "popularity": {"pairs": 200, "exponent": 1.1},
+    "server_env": {},
+}
+TIMEOUT_S = 60
+STARTUP_TIMEOUT_S = 120
+RSS_SAMPLE_S = 0.5
+
+
+def load_scenario(path):
+    scenario = dict(DEFAULT_SCENARIO)
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            scenario.update(json.load(f))
+        scenario.setdefault("name", Path(path).stem)
+    return scenario
+
+
+# ----------------------------------
+# Traffic
+# ----------------------------------
+def _pick(rng, shares):
+    keys = list(shares)
+    return rng.choices(keys, weights=[shares[k] for k in keys])[0]
+
+
+def route_pairs(places, count, rng):
+    """``count`` distinct (start, goal) place names, most popular first."""
+    names = sorted({p["name"] for p in places if p.get("name") and p.get("node_id") is not None})
+    pairs = set()
+    while len(pairs) < min(count, len(names) * (len(names) - 1)):
+        a, b = rng.sample(names, 2)
+        pairs.add((a, b))
+    pairs = sorted(pairs)
+    rng.shuffle(pairs)
+    return pairs
+
+
+def arrivals(scenario, places, seed):
+    """Yield (send at seconds from start, request dict) for all phases."""
+    rng = random.Random(seed)
+    popularity = scenario["popularity"]
+    pairs = route_pairs(places, popularity["pairs"], rng)
+    weights = [1.0 / (rank + 1) ** popularity["exponent"] for rank in range(len(pairs))]
+
+    at = 0.0
+    phase_start = 0.0
+    for phase in scenario["phases"]:
+        end = phase_start + phase["seconds"]
+        while True:
+            at += rng.expovariate(phase["rate"]) if phase["rate"] > 0 else phase["seconds"]
+            if at >= end:
+                break
+            kind = _pick(rng, scenario["mix"])
+            request = {"kind": kind}
+            if kind != "graph":
+                request["start"], request["goal"] = rng.choices(pairs, weights=weights)[0]
+                request["mode"] = _pick(rng, scenario["modes"])
+                if request["mode"] == "manual":
+                    request["algorithm"] = rng.choice(scenario["algorithms"])
+            yield at, request
+        at = phase_start = end
+
+
+def _encode(request):
+    """(method, path, form body or None)."""
+    if request["kind"] == "graph":
+        return "GET", "/graph.json", None
+    fields = {k: request[k] for k in ("start", "goal", "mode", "algorithm") if k in request}
+    if request["kind"] == "api-route":
+        return "GET", "/api/route?" + urllib.parse.urlencode(fields), None
+    return "POST", "/find-path", fields
+
+
+# ----------------------------------
+# Targets
+# ----------------------------------
+class InProcessTarget:
+    """Flask test client in this process (one per thread)."""
+
+    def __init__(self, env):
+        os.environ.update(env)
+        import app
+        self.app = app.app
+        self.local = threading.local()
+        self.pid = os.getpid()
+
+    def send(self, request):
+        client = getattr(self.local, "client", None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        method, path, form = _encode(request)
+        response = client.open(path, method=method, data=form)
+        response.get_data()
+        return response.status_code
+
+    def close(self):
+        pass
+
+
+class HttpTarget:
+    """A server at ``url``; started (and stopped) here when ``command`` is given."""
+
+    def __init__(self, url, command=None, env=None):
+        self.url = url.rstrip("/")
+        self.process = None
+        self.pid = None
+        if command:
+            self.process = subprocess.Popen(command, cwd=ROOT, env=dict(os.environ, **(env or {})),
+                                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            self.pid = self.process.pid
+            self._wait_ready()
+
+    def _wait_ready(self):
+        deadline = time.monotonic() + STARTUP_TIMEOUT_S
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"server exited with code {self.process.returncode}")
+            try:
+                with urllib.request.urlopen(self.url + "/api/places?q=", timeout=2):
+                    return
+            except (urllib.error.URLError, OSError):
+                time.sleep(0.5)
+        self.close()
+        raise RuntimeError(f"server not up after {STARTUP_TIMEOUT_S}s")
+
+    def send(self, request):
+        method, path, form = _encode(request)
+        data = urllib.parse.urlencode(form).encode() if form is not None else None
+        req = urllib.request.Request(self.url + path, data=data, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=TIMEOUT_S) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def close(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+# ----------------------------------
+# Memory
+# ----------------------------------
+def _rss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def tree_rss_kb(pid):
+    """{pid: RSS kB} for ``pid`` and its descendants (empty without /proc)."""
+    children = {}
+    for entry in Path("/proc").glob("[0-9]*"):
+        try:
+            fields = (entry / "stat").read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(entry.name))
+    out, todo = {}, [pid]
+    while todo:
+        p = todo.pop()
+        out[p] = _rss_kb(p)
+        todo.extend(children.get(p, ()))
+    return {p: kb for p, kb in out.items() if kb}
+
+
+# ----------------------------------
+# Run
+# ----------------------------------
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def latency_summary(samples):
+    latencies = [s["ms"] for s in samples]
+    return {
+        "count": len(latencies),
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies) if latencies else None,
+    }
+
+
+def run(scenario, target, seed, interval):
+    places = DataContext().places
+    plan = list(arrivals(scenario, places, seed))
+    duration = sum(phase["seconds"] for phase in scenario["phases"])
+    samples = []
+    rss = []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def sample_rss():
+        while not stop.is_set():
+            if target.pid is not None:
+                sizes = tree_rss_kb(target.pid)
+                rss.append({"t": round(time.perf_counter() - t0, 2),
+                            "total_mb": round(sum(sizes.values()) / 1024, 1),
+                            "processes": len(sizes)})
+            stop.wait(RSS_SAMPLE_S)
+
+    def fire(at, request):
+        started = time.perf_counter()
+        try:
+            status = target.send(request)
+        except Exception as e:  # noqa: BLE001 - every failure is a data point
+            status = type(e).__name__
+        done = time.perf_counter()
+        with lock:
+            samples.append({
+                "t": done - t0,
+                "kind": request["kind"],
+                "mode": request.get("mode"),
+                "status": status,
+                # From the scheduled send time: includes queueing
+                "ms": (done - t0 - at) * 1000,
+                "service_ms": (done - started) * 1000,
+            })
+
+    print(f"{scenario['name']}: {len(plan)} requests over {duration}s, "
+          f"up to {scenario['concurrency']} in flight", file=sys.stderr)
+    t0 = time.perf_counter()
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+    with ThreadPoolExecutor(max_workers=scenario["concurrency"]) as pool:
+        for at, request in plan:
+            delay = at - (time.perf_counter() - t0)
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, at, request)
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    sampler.join()
+
+    return report(scenario, samples, rss, elapsed, interval)
+
+
+def _outcome(sample):
+    """"ok", "client" (4xx other than 429) or "error" (5xx, 429, no response)."""
+    status = sample["status"]
+    if not isinstance(status, int) or status >= 500 or status == 429:
+        return "error"
+    return "client" if status >= 400 else "ok"
+
+
+def _count(samples, outcome):
+    return sum(_outcome(s) == outcome for s in samples)
+
+
+def report(scenario, samples, rss, elapsed, interval):
+    by_status = {}
+    for s in samples:
+        by_status[str(s["status"])] = by_status.get(str(s["status"]), 0) + 1
+    errors = _count(samples, "error")
+    client_errors = _count(samples, "client")
+
+    timeline = []
+    for start in range(0, int(elapsed) + 1, interval):
+        window = [s for s in samples if start <= s["t"] < start + interval]
+        memory = [r["total_mb"] for r in rss if start <= r["t"] < start + interval]
+        if not window and not memory:
+            continue
+        lat = latency_summary(window)
+        timeline.append({
+            "t": start,
+            "done": len(window),
+            "rps": round(len(window) / interval, 2),
+            "errors": _count(window, "error"),
+            "client_errors": _count(window, "client"),
+            "p50": lat["p50"],
+            "p99": lat["p99"],
+            "rss_mb": max(memory) if memory else None,
+        })
+
+    return {
+        "scenario": scenario,
+        "elapsed_s": round(elapsed, 3),
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "client_error_rate": round(client_errors / len(samples), 4) if samples else 0.0,
+        "by_status": by_status,
+        "latency_ms": latency_summary(samples),
+        "service_ms": latency_summary([dict(s, ms=s["service_ms"]) for s in samples]),
+        "by_kind": {
+            key: latency_summary([s for s in samples if (s["mode"] or s["kind"]) == key])
+            for key in sorted({s["mode"] or s["kind"] for s in samples})
+        },
+        "peak_rss_mb": max((r["total_mb"] for r in rss), default=None),
+        "rss": rss,
+        "timeline": timeline,
+    }
+
+
+# ----------------------------------
+# Output
+# ----------------------------------
+def _ms(value):
+    return f"{value:.1f}" if value is not None else "-"
+
+
+def print_report(result):
+    lat = result["latency_ms"]
+    print(f"\n{result['scenario']['name']}: {result['requests']} requests in {result['elapsed_s']}s "
+          f"= {result['throughput_rps']} req/s, error rate {result['error_rate']:.2%}, "
+          f"4xx {result['client_error_rate']:.2%} {result['by_status']}")
+    print(f"latency ms  p50 {_ms(lat['p50'])}  p90 {_ms(lat['p90'])}  p99 {_ms(lat['p99'])}  "
+          f"max {_ms(lat['max'])}   (service only: p99 {_ms(result['service_ms']['p99'])})")
+    print(f"peak RSS {result['peak_rss_mb']} MB\n")
+    print(f"{'kind':<12} {'count':>6} {'p50':>8} {'p90':>8} {'p99':>8}")
+    for key, row in result["by_kind"].items():
+        print(f"{key:<12} {row['count']:>6} {_ms(row['p50']):>8} {_ms(row['p90']):>8} {_ms(row['p99']):>8}")
+    print(f"\n{'t s':>5} {'done':>6} {'req/s':>7} {'errors':>7} {'4xx':>5} {'p50':>8} {'p99':>8} "
+          f"{'RSS MB':>8}")
+    for row in result["timeline"]:
+        print(f"{row['t']:>5} {row['done']:>6} {row['rps']:>7} {row['errors']:>7} {row['client_errors']:>5} "
+              f"{_ms(row['p50']):>8} {_ms(row['p99']):>8} {row['rss_mb'] or '-':>8}")
+
+
+def print_comparison(paths):
+    rows = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+        lat = result["latency_ms"]
+        env = " ".join(f"{k}={v}" for k, v in result["scenario"].get("server_env", {}).items())
+        rows.append((Path(path).name, result["throughput_rps"], result["error_rate"],
+                     result.get("client_error_rate", 0.0), lat["p50"], lat["p90"], lat["p99"],
+                     result["peak_rss_mb"], env or "-"))
+    print(f"{'run':<24} {'req/s':>7} {'errors':>7} {'4xx':>7} {'p50':>8} {'p90':>8} {'p99':>8} "
+          f"{'RSS MB':>8}  server")
+    for name, rps, err, client, p50, p90, p99, peak, env in rows:
+        print(f"{name:<24} {rps:>7} {err:>7.2%} {client:>7.2%} {_ms(p50):>8} {_ms(p90):>8} {_ms(p99):>8} "
+              f"{peak or '-':>8}  {env}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Flask app with a request mix")
+    parser.add_argument("scenario", nargs="?", help="scenario JSON (default: built-in mix)")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--inprocess", action="store_true", help="use Flask's test client")
+    target.add_argument("--url", help="running server to test, e.g. http://127.0.0.1:5000")
+    target.add_argument("--server-cmd", help="command starting the server; {port} is filled in")
+    parser.add_argument("--port", type=int, default=5055, help="port when the app is started here")
+    parser.add_argument("--rate", type=float, help="override every phase's arrival rate (req/s)")
+    parser.add_argument("--duration", type=float, help="override with one phase of this many seconds")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra server environment (repeatable)")
+    parser.add_argument("--interval", type=int, default=5, help="timeline bucket in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="save the result as JSON")
+    parser.add_argument("--compare", nargs="+", metavar="RESULT", help="compare saved results")
+    args = parser.parse_args()
+
+    if args.compare:
+        print_comparison(args.compare)
+        return
+
+    scenario = load_scenario(args.scenario)
+    if args.duration:
+        scenario["phases"] = [{"rate": scenario["phases"][0]["rate"], "seconds": args.duration}]
+    if args.rate:
+        scenario["phases"] = [dict(phase, rate=args.rate) for phase in scenario["phases"]]
+    scenario["server_env"] = dict(scenario["server_env"],
+                                  **dict(item.split("=", 1) for item in args.env))
+
+    if args.inprocess:
+        target = InProcessTarget(scenario["server_env"])
+    elif args.url:
+        target = HttpTarget(args.url)
+    else:
+        command = shlex.split(args.server_cmd.format(port=args.port)) if args.server_cmd else \
+            [sys.executable, "-m", "flask", "--app", "app", "run", "--port", str(args.port), "--no-reload"]
+        target = HttpTarget(f"http://127.0.0.1:{args.port}", command, scenario["server_env"])
+
+    try:
+        result = run(scenario, target, args.seed, args.interval)
+    finally:
+        target.close()
+    result["target"] = "inprocess" if args.inprocess else (args.url or " ".join(target.process.args))
+
+    print_report(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n✅ Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
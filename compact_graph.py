@@ -0,0 +1,324 @@
+"""
+Array (CSR) form of road_graph.json.
+
+The JSON graph is a dict of dicts, which is convenient but large and
+slow to share between processes. CompactGraph keeps the same data as a
+handful of NumPy arrays:
+
+    lat, lng      float64[n]     node coordinates
+    node_ids      int64[n]       original (numeric) node id of each index
+    indptr        int64[n + 1]   out-edges of node i are indptr[i]:indptr[i+1]
+    indices       int32[m]       edge target (node index)
+    cost          float64[m]     base travel time in minutes
+    road_class    uint8[m]       index into ROAD_CLASSES
+    rindptr, rindices, redge     the reverse (incoming) CSR; redge maps a
+                                 reverse slot back to its forward edge
+
+Edge order inside each node follows the JSON lists, so searches over the
+arrays visit neighbours in the same order as the dict-based ones.
+"""
+import hashlib
+from collections.abc import Mapping
+
+import numpy as np
+
+from search_algorithms import DEFAULT_ROAD_FACTOR, INTERSECTION_PENALTY, ROAD_TYPE_FACTOR
+
+ROAD_CLASSES = (
+    "motorway", "motorway_link",
+    "primary", "secondary",
+    "tertiary", "residential"
+)
+UNKNOWN_CLASS = len(ROAD_CLASSES)
+
+ARRAY_FIELDS = (
+    "lat", "lng", "node_ids",
+    "indptr", "indices", "cost", "road_class",
+    "rindptr", "rindices", "redge"
+)
+
+
+def road_class_of(road_type):
+    try:
+        return ROAD_CLASSES.index(road_type)
+    except ValueError:
+        return UNKNOWN_CLASS
+
+
+def road_type_of(road_class):
+    return ROAD_CLASSES[road_class] if road_class < UNKNOWN_CLASS else None
+
+
+# ----------------------------------
+# Cost profile
+# ----------------------------------
+class CostProfile:
+    """
+    Turns base edge costs into search weights:
+        weight = cost * factor[road_type] + intersection_penalty
+    The default profile matches the dict-based searches exactly.
+    """
+
+    def __init__(self, road_factors=None, default_factor=DEFAULT_ROAD_FACTOR,
+                 intersection_penalty=INTERSECTION_PENALTY, name="default"):
+        self.road_factors = dict(ROAD_TYPE_FACTOR if road_factors is None else road_factors)
+        self.default_factor = default_factor
+        self.intersection_penalty = intersection_penalty
+        self.name = name
+
+    def key(self):
+        return (
+            tuple(sorted(self.road_factors.items())),
+            self.default_factor,
+            self.intersection_penalty
+        )
+
+    def fingerprint(self):
+        """Short id of key(), stored with tables precomputed from these weights."""
+        return hashlib.sha1(repr(self.key()).encode()).hexdigest()[:16]
+
+    def factor_table(self):
+        table = [self.road_factors.get(rt, self.default_factor) for rt in ROAD_CLASSES]
+        table.append(self.default_factor)
+        return np.array(table, dtype=np.float64)
+
+    def weights(self, graph):
+        return graph.cost * self.factor_table()[graph.road_class] + self.intersection_penalty
+
+
+DEFAULT_PROFILE = CostProfile()
+
+
+# ----------------------------------
+# Compact graph
+# ----------------------------------
+class CompactGraph:
+
+    def __init__(self, arrays, extras=None):
+        for field in ARRAY_FIELDS:
+            setattr(self, field, arrays[field])
+
+        # Optional preprocessing tables (landmarks, components, ...)
+        self.extras = dict(extras or {})
+        self._weights = {}
+        self._index_of = None
+
+    @property
+    def num_nodes(self):
+        return len(self.lat)
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    def arrays(self):
+        """All arrays, including extras, keyed by name (for export/sharing)."""
+        out = {field: getattr(self, field) for field in ARRAY_FIELDS}
+        out.update(self.extras)
+        return out
+
+    # ----------------------------------
+    # Construction
+    # ----------------------------------
+    @classmethod
+    def from_json(cls, graph):
+        nodes = graph["nodes"]
+        edges = graph["edges"]
+
+        ids = list(nodes)
+        index_of = {nid: i for i, nid in enumerate(ids)}
+        n = len(ids)
+
+        lat = np.fromiter((nodes[nid]["lat"] for nid in ids), dtype=np.float64, count=n)
+        lng = np.fromiter((nodes[nid]["lng"] for nid in ids), dtype=np.float64, count=n)
+        node_ids = np.array([int(nid) for nid in ids], dtype=np.int64)
+
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        targets = []
+        costs = []
+        classes = []
+        for i, nid in enumerate(ids):
+            for edge in edges.get(nid, []):
+                targets.append(index_of[edge["to"]])
+                costs.append(edge["cost"])
+                classes.append(road_class_of(edge.get("road_type")))
+            indptr[i + 1] = len(targets)
+
+        arrays = {
+            "lat": lat,
+            "lng": lng,
+            "node_ids": node_ids,
+            "indptr": indptr,
+            "indices": np.array(targets, dtype=np.int32),
+            "cost": np.array(costs, dtype=np.float64),
+            "road_class": np.array(classes, dtype=np.uint8),
+        }
+        arrays.update(build_reverse(indptr, arrays["indices"], n))
+        return cls(arrays)
+
+    # ----------------------------------
+    # Id mapping
+    # ----------------------------------
+    @property
+    def index_of(self):
+        """node id (str) -> array index."""
+        if self._index_of is None:
+            if np.array_equal(self.node_ids, np.arange(self.num_nodes)):
+                # ids are 0..n-1: no need to hold a per-process dict
+                self._index_of = _IdentityIndex(self.num_nodes)
+            else:
+                self._index_of = {str(nid): i for i, nid in enumerate(self.node_ids.tolist())}
+        return self._index_of
+
+    def node_id(self, index):
+        return str(int(self.node_ids[index]))
+
+    def weights(self, profile=DEFAULT_PROFILE):
+        key = profile.key()
+        if key not in self._weights:
+            self._weights[key] = profile.weights(self)
+        return self._weights[key]
+
+    def neighbors(self, index):
+        start, end = self.indptr[index], self.indptr[index + 1]
+        return self.indices[start:end]
+
+    # ----------------------------------
+    # Dict-compatible views
+    # ----------------------------------
+    def nodes_view(self):
+        return _NodesView(self)
+
+    def edges_view(self):
+        return _EdgesView(self, reverse=False)
+
+    def reverse_edges_view(self):
+        return _EdgesView(self, reverse=True)
+
+    def coords_view(self):
+        return _CoordsView(self)
+
+    def reversed(self):
+        """The graph with every edge flipped (for backward searches)."""
+        inverse = np.empty_like(self.redge)
+        inverse[self.redge] = np.arange(len(self.redge))
+        return CompactGraph({
+            "lat": self.lat,
+            "lng": self.lng,
+            "node_ids": self.node_ids,
+            "indptr": self.rindptr,
+            "indices": self.rindices,
+            "cost": self.cost[self.redge],
+            "road_class": self.road_class[self.redge],
+            "rindptr": self.indptr,
+            "rindices": self.indices,
+            "redge": inverse,
+        })
+
+    # ----------------------------------
+    # Binary export
+    # ----------------------------------
+    def save(self, path):
+        np.savez(path, **self.arrays())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in data.files}
+        extras = {k: arrays.pop(k) for k in list(arrays) if k not in ARRAY_FIELDS}
+        return cls(arrays, extras)
+
+    def to_json(self):
+        """Back to the road_graph.json schema (edge names/osm ids are not kept)."""
+        return {
+            "nodes": {nid: dict(node) for nid, node in self.nodes_view().items()},
+            "edges": {nid: list(edges) for nid, edges in self.edges_view().items()},
+        }
+
+
+def build_reverse(indptr, indices, n):
+    """Incoming-edge CSR for a forward CSR."""
+    sources = np.repeat(np.arange(n, dtype=np.int32), np.diff(indptr))
+    order = np.argsort(indices, kind="stable")
+
+    rindptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=n), out=rindptr[1:])
+
+    return {
+        "rindptr": rindptr,
+        "rindices": sources[order].astype(np.int32),
+        "redge": order.astype(np.int64),
+    }
+
+
+class _IdentityIndex(Mapping):
+    __slots__ = ("n",)
+
+    def __init__(self, n):
+        self.n = n
+
+    def __getitem__(self, nid):
+        try:
+            i = int(nid)
+        except (TypeError, ValueError):
+            raise KeyError(nid) from None
+        if not 0 <= i < self.n or str(i) != nid:
+            raise KeyError(nid)
+        return i
+
+    def __iter__(self):
+        return (str(i) for i in range(self.n))
+
+    def __len__(self):
+        return self.n
+
+
+class _NodesView(Mapping):
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, nid):
+        i = self.graph.index_of[nid]
+        return {"lat": float(self.graph.lat[i]), "lng": float(self.graph.lng[i])}
+
+    def __iter__(self):
+        return (self.graph.node_id(i) for i in range(self.graph.num_nodes))
+
+    def __len__(self):
+        return self.graph.num_nodes
+
+
+class _CoordsView(_NodesView):
+    def __getitem__(self, nid):
+        i = self.graph.index_of[nid]
+        return float(self.graph.lat[i]), float(self.graph.lng[i])
+
+
+class _EdgesView(_NodesView):
+    """Read-only node id -> [{"to", "cost", "road_type"}] built on access."""
+
+    def __init__(self, graph, reverse):
+        super().__init__(graph)
+        self.reverse = reverse
+
+    def __getitem__(self, nid):
+        g = self.graph
+        i = g.index_of[nid]
+
+        if self.reverse:
+            start, end = g.rindptr[i], g.rindptr[i + 1]
+            slots = g.redge[start:end]
+            targets = g.rindices[start:end]
+        else:
+            start, end = g.indptr[i], g.indptr[i + 1]
+            slots = range(start, end)
+            targets = g.indices[start:end]
+
+        return [
+            {
+                "to": g.node_id(t),
+                "cost": float(g.cost[e]),
+                "road_type": road_type_of(int(g.road_class[e]))
+            }
+            for e, t in zip(slots, targets)
+        ]
@@ -0,0 +1,472 @@
+"""
+Customizable route planning (CRP): a multi-level overlay for big graphs.
+
+Three phases with different lifetimes:
+
+1. Partition (metric-independent, slow, run once per graph).
+   Nested cells from recursive bisection (arc_flags.inertial_partition
+   with a power-of-two cell count): level 0 has the most, smallest
+   cells, and the cell of a node at a coarser level is its level-0 cell
+   id shifted right, so every cell lies inside one cell of the level
+   above. Stored as int32[levels, n] (crp_partition.npz).
+
+2. Topology (metric-independent, fast, derived from the partition).
+   Per level: the entry nodes (head of an edge from another cell) and
+   exit nodes (tail of an edge to another cell) of each cell, a clique
+   entry -> exit per cell, and per cell the local graph the clique is
+   computed on: the base edges inside the cell at level 0, the
+   level-below cliques plus the edges between sub-cells above that.
+
+3. Metric customization (per cost profile / traffic multipliers).
+   Clique weights are shortest distances in those local graphs, found
+   for all entries of a cell at once by a Bellman-Ford over a
+   [entries, nodes] matrix. Cells of a level are independent and run in
+   worker processes; levels run bottom-up. A change to a few edge costs
+   only recomputes the cells that contain them.
+
+Queries run a bidirectional Dijkstra where a node uses the coarsest
+level whose cell contains neither endpoint: base edges near s and t,
+then cliques and the cut edges between cells, coarser with distance.
+Clique arcs on the result are unpacked into base edges by searching
+inside their cell, level by level.
+"""
+import heapq
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from arc_flags import inertial_partition
+from compact_graph import DEFAULT_PROFILE
+
+DEFAULT_CELL_SIZE = 128     # nodes per level-0 cell
+DEFAULT_FANOUT = 8          # cells of one level per cell of the next
+MAX_TOP_CELLS = 16
+CUSTOMIZE_CHUNK = 64        # most cells per worker task
+
+
+# ----------------------------------
+# 1. Partition
+# ----------------------------------
+def default_levels(num_nodes, cell_size=DEFAULT_CELL_SIZE, fanout=DEFAULT_FANOUT):
+    """Cells per level, finest first, each a power of two."""
+    bits = max(1, round(math.log2(max(num_nodes / cell_size, 2))))
+    step = max(1, round(math.log2(fanout)))
+    levels = [1 << bits]
+    while levels[-1] > MAX_TOP_CELLS and bits > step:
+        bits -= step
+        levels.append(1 << bits)
+    return levels
+
+
+def multilevel_partition(graph, levels):
+    """int32[len(levels), n] nested cells, ``levels`` = cells per level, finest first."""
+    for k in levels:
+        if k & (k - 1):
+            raise ValueError(f"cells per level must be powers of two, got {k}")
+    finest = inertial_partition(graph, levels[0])
+    shifts = [int(math.log2(levels[0] // k)) for k in levels]
+    return np.vstack([finest >> s for s in shifts]).astype(np.int32)
+
+
+# ----------------------------------
+# 2. Topology
+# ----------------------------------
+def _group(keys, count):
+    """(order, indptr): positions sorted by key, and where each key's run starts."""
+    order = np.argsort(keys, kind="stable")
+    indptr = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=count), out=indptr[1:])
+    return order, indptr
+
+
+class OverlayLevel:
+    """Cells, boundary nodes, cliques and local graphs of one level."""
+
+    def __init__(self, graph, cells, below=None):
+        n = graph.num_nodes
+        count = int(cells.max()) + 1
+        src = np.repeat(np.arange(n), np.diff(graph.indptr))
+        dst = graph.indices.astype(np.int64)
+        cut = cells[src] != cells[dst]
+
+        self.cells = cells
+        self.num_cells = count
+        exits = np.unique(src[cut])
+        entries = np.unique(dst[cut])
+        order, self.entry_ptr = _group(cells[entries], count)
+        self.entries = entries[order]
+        order, self.exit_ptr = _group(cells[exits], count)
+        self.exits = exits[order]
+
+        # Vertices of the local graphs: all nodes at level 0, the boundary
+        # nodes of the level below otherwise
+        verts = np.arange(n) if below is None else below.boundary
+        order, self.vert_ptr = _group(cells[verts], count)
+        self.verts = verts[order]
+        self.boundary = np.union1d(self.entries, self.exits)
+
+        local = np.full(n, -1, dtype=np.int64)
+        local[self.verts] = np.arange(len(self.verts)) - self.vert_ptr[cells[self.verts]]
+        self.entry_local = local[self.entries]
+        self.exit_local = local[self.exits]
+
+        # Local edges: (tail, head, ref, is_clique); ref is a base edge id
+        # or a clique id of the level below
+        inside = ~cut
+        if below is not None:
+            inside &= below.cells[src] != below.cells[dst]
+        tails, heads = [src[inside]], [dst[inside]]
+        refs, kinds = [np.flatnonzero(inside)], [np.zeros(int(inside.sum()), dtype=bool)]
+        if below is not None:
+            tails.append(below.clique_tail)
+            heads.append(below.clique_head)
+            refs.append(np.arange(len(below.clique_tail)))
+            kinds.append(np.ones(len(below.clique_tail), dtype=bool))
+        tail, head = np.concatenate(tails), np.concatenate(heads)
+        order, self.edge_ptr = _group(cells[tail], count)
+        self.edge_tail = local[tail[order]]
+        self.edge_head = local[head[order]]
+        self.edge_ref = np.concatenate(refs)[order]
+        self.edge_clique = np.concatenate(kinds)[order]
+
+        # Cliques: entries x exits of each cell, entry-major
+        num_entries = np.diff(self.entry_ptr)
+        num_exits = np.diff(self.exit_ptr)
+        self.clique_ptr = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(num_entries * num_exits, out=self.clique_ptr[1:])
+        clique_tail, clique_head = [], []
+        for c in range(count):
+            e = self.entries[self.entry_ptr[c]:self.entry_ptr[c + 1]]
+            x = self.exits[self.exit_ptr[c]:self.exit_ptr[c + 1]]
+            clique_tail.append(np.repeat(e, len(x)))
+            clique_head.append(np.tile(x, len(e)))
+        self.clique_tail = np.concatenate(clique_tail) if count else np.empty(0, dtype=np.int64)
+        self.clique_head = np.concatenate(clique_head) if count else np.empty(0, dtype=np.int64)
+
+        # Clique arcs by tail / by head, for the query
+        order, self.out_ptr = _group(self.clique_tail, n)
+        self.out_ids = order
+        order, self.in_ptr = _group(self.clique_head, n)
+        self.in_ids = order
+
+    def local_edges(self, cell):
+        a, b = self.edge_ptr[cell], self.edge_ptr[cell + 1]
+        return self.edge_tail[a:b], self.edge_head[a:b], self.edge_ref[a:b], self.edge_clique[a:b]
+
+
+def cell_distances(size, sources, tail, head, weight):
+    """
+    float64[len(sources), size]: distances from each source, by a
+    Bellman-Ford over the whole matrix that only relaxes edges whose tail
+    column improved in the previous round.
+    """
+    dist = np.full((len(sources), size), np.inf)
+    dist[np.arange(len(sources)), sources] = 0.0
+    if len(tail) == 0 or len(sources) == 0:
+        return dist
+    order = np.argsort(head, kind="stable")
+    tail, head, weight = tail[order], head[order], weight[order]
+    active = np.zeros(size, dtype=bool)
+    active[sources] = True
+    while True:
+        live = active[tail]
+        if not live.any():
+            return dist
+        t, h, w = tail[live], head[live], weight[live]
+        starts = np.flatnonzero(np.r_[True, h[1:] != h[:-1]])
+        heads = h[starts]
+        candidate = np.minimum.reduceat(dist[:, t] + w, starts, axis=1)
+        current = dist[:, heads]
+        better = (candidate < current).any(axis=0)
+        active[:] = False
+        active[heads[better]] = True
+        dist[:, heads] = np.minimum(current, candidate)
+
+
+# ----------------------------------
+# 3. Customization
+# ----------------------------------
+_worker = {}
+
+
+def _init_worker(level, base_weights, below_weights):
+    _worker["level"] = level
+    _worker["base"] = base_weights
+    _worker["below"] = below_weights
+
+
+def _customize_cells(cells):
+    """Clique weights of ``cells`` (concatenated in the given order)."""
+    level = _worker["level"]
+    out = []
+    for c in cells:
+        tail, head, ref, clique = level.local_edges(c)
+        weight = _worker["base"][np.where(clique, 0, ref)]
+        if clique.any():
+            weight[clique] = _worker["below"][ref[clique]]
+        e0, e1 = level.entry_ptr[c], level.entry_ptr[c + 1]
+        x0, x1 = level.exit_ptr[c], level.exit_ptr[c + 1]
+        size = int(level.vert_ptr[c + 1] - level.vert_ptr[c])
+        dist = cell_distances(size, level.entry_local[e0:e1], tail, head, weight)
+        out.append(dist[:, level.exit_local[x0:x1]].ravel())
+    return np.concatenate(out) if out else np.empty(0)
+
+
+class CRP:
+    """Topology of a partitioned graph plus the clique weights of one metric."""
+
+    def __init__(self, graph, cells):
+        self.graph = graph
+        self.partition = cells
+        self.levels = []
+        for i in range(len(cells)):
+            self.levels.append(OverlayLevel(graph, cells[i], self.levels[-1] if self.levels else None))
+        self.base_weights = None
+        self.clique_weights = None
+        self._cells = [c.tolist() for c in cells]
+
+    @classmethod
+    def build(cls, graph, levels=None):
+        return cls(graph, multilevel_partition(graph, levels or default_levels(graph.num_nodes)))
+
+    # ----------------------------------
+    # Metric
+    # ----------------------------------
+    def customize(self, profile=DEFAULT_PROFILE, multipliers=None, jobs=1, changed_edges=None,
+                  stats=None):
+        """
+        Compute clique weights for ``profile`` (edge weights times
+        ``multipliers`` if given). With ``changed_edges`` (base edge ids)
+        only the cells containing them are redone; the rest is kept from
+        the current metric. Returns seconds per level in ``stats``.
+        """
+        base = self.graph.weights(profile)
+        if multipliers is not None:
+            base = base * multipliers
+
+        previous = self.clique_weights
+        partial = changed_edges is not None and previous is not None
+        if partial:
+            changed = np.asarray(changed_edges, dtype=np.int64)
+            src = np.repeat(np.arange(self.graph.num_nodes), np.diff(self.graph.indptr))[changed]
+            dst = self.graph.indices[changed].astype(np.int64)
+
+        weights = []
+        for i, level in enumerate(self.levels):
+            t0 = time.perf_counter()
+            if partial:
+                inside = level.cells[src] == level.cells[dst]
+                todo = np.unique(level.cells[src[inside]])
+            else:
+                todo = np.arange(level.num_cells)
+            below = weights[-1] if weights else None
+
+            result = previous[i].copy() if partial else np.empty(int(level.clique_ptr[-1]))
+            size = max(1, min(CUSTOMIZE_CHUNK, -(-len(todo) // max(jobs, 1))))
+            chunks = [todo[j:j + size] for j in range(0, len(todo), size)]
+            if jobs <= 1 or len(chunks) <= 1:
+                _init_worker(level, base, below)
+                try:
+                    done = [_customize_cells(chunk) for chunk in chunks]
+                finally:
+                    _worker.clear()
+            else:
+                with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                         initargs=(level, base, below)) as pool:
+                    done = list(pool.map(_customize_cells, chunks))
+
+            for chunk, values in zip(chunks, done):
+                at = 0
+                for c in chunk:
+                    a, b = level.clique_ptr[c], level.clique_ptr[c + 1]
+                    result[a:b] = values[at:at + b - a]
+                    at += b - a
+            weights.append(result)
+            if stats is not None:
+                stats[f"level{i}_s"] = round(time.perf_counter() - t0, 4)
+                stats[f"level{i}_cells"] = len(todo)
+
+        self.base_weights = base
+        self.clique_weights = weights
+        return self
+
+    # ----------------------------------
+    # Query
+    # ----------------------------------
+    def _level_of(self, v, cs, ct):
+        """Overlay level a node is searched on: 0 = base edges, i + 1 = cliques of level i."""
+        for i in range(len(self.levels) - 1, -1, -1):
+            c = self._cells[i][v]
+            if c != cs[i] and c != ct[i]:
+                return i + 1
+        return 0
+
+    def _arcs(self, v, q, backward):
+        """(next node, weight, arc) out of v (into v when ``backward``) on level q."""
+        g = self.graph
+        base = self.base_weights
+        if backward:
+            a, b = g.rindptr[v], g.rindptr[v + 1]
+            ends, ids = g.rindices[a:b], g.redge[a:b]
+        else:
+            a, b = g.indptr[v], g.indptr[v + 1]
+            ends, ids = g.indices[a:b], range(a, b)
+
+        if q == 0:
+            for w, e in zip(ends.tolist(), ids):
+                yield w, base[e], ("edge", int(e))
+            return
+
+        i = q - 1
+        level = self.levels[i]
+        cells = self._cells[i]
+        # Edges leaving (entering) v's cell on this level
+        for w, e in zip(ends.tolist(), ids):
+            if cells[w] != cells[v]:
+                yield w, base[e], ("edge", int(e))
+        # Clique arcs of v's cell
+        weights = self.clique_weights[i]
+        if backward:
+            arcs = level.in_ids[level.in_ptr[v]:level.in_ptr[v + 1]]
+            others = level.clique_tail[arcs]
+        else:
+            arcs = level.out_ids[level.out_ptr[v]:level.out_ptr[v + 1]]
+            others = level.clique_head[arcs]
+        for w, k in zip(others.tolist(), arcs.tolist()):
+            if w != v:
+                yield w, weights[k], ("clique", i, k)
+
+    def query(self, s, t):
+        """(node index path, cost, settled) by bidirectional search over the overlay."""
+        if self.clique_weights is None:
+            raise RuntimeError("customize() the CRP before querying it")
+        cs = [cells[s] for cells in self._cells]
+        ct = [cells[t] for cells in self._cells]
+
+        dist = ({s: 0.0}, {t: 0.0})
+        parent = ({s: None}, {t: None})
+        done = (set(), set())
+        heaps = ([(0.0, s)], [(0.0, t)])
+        best, meet = float("inf"), None
+        settled = 0
+
+        while heaps[0] and heaps[1]:
+            if heaps[0][0][0] + heaps[1][0][0] >= best:
+                break
+            side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+            d, v = heapq.heappop(heaps[side])
+            if v in done[side]:
+                continue
+            done[side].add(v)
+            settled += 1
+
+            other = dist[1 - side].get(v)
+            if other is not None and d + other < best:
+                best, meet = d + other, v
+
+            q = self._level_of(v, cs, ct)
+            for w, weight, arc in self._arcs(v, q, backward=side == 1):
+                nd = d + weight
+                if nd < dist[side].get(w, float("inf")):
+                    dist[side][w] = nd
+                    parent[side][w] = (v, arc)
+                    heapq.heappush(heaps[side], (nd, w))
+                    other = dist[1 - side].get(w)
+                    if other is not None and nd + other < best:
+                        best, meet = nd + other, w
+
+        if meet is None:
+            return None, float("inf"), settled
+
+        # Arcs s -> meet, then meet -> t
+        arcs = []
+        v = meet
+        while parent[0][v] is not None:
+            v, arc = parent[0][v]
+            arcs.append(arc)
+        arcs.reverse()
+        v = meet
+        while parent[1][v] is not None:
+            v, arc = parent[1][v]
+            arcs.append(arc)
+
+        path = [s]
+        for arc in arcs:
+            self._unpack(arc, path)
+        return path, best, settled
+
+    # ----------------------------------
+    # Path unpacking
+    # ----------------------------------
+    def _unpack(self, arc, path):
+        """Append the nodes after the tail of ``arc`` to ``path``."""
+        if arc[0] == "edge":
+            path.append(int(self.graph.indices[arc[1]]))
+            return
+        _, i, k = arc
+        level = self.levels[i]
+        tail, head = int(level.clique_tail[k]), int(level.clique_head[k])
+        cell = self._cells[i][tail]
+        offset = int(level.vert_ptr[cell])
+        verts = level.verts[offset:level.vert_ptr[cell + 1]]
+        local = {int(v): j for j, v in enumerate(verts)}
+
+        e_tail, e_head, e_ref, e_clique = level.local_edges(cell)
+        below = self.clique_weights[i - 1] if i > 0 else None
+        adjacency = {}
+        for j, (a, b, ref, is_clique) in enumerate(zip(e_tail.tolist(), e_head.tolist(),
+                                                      e_ref.tolist(), e_clique.tolist())):
+            w = below[ref] if is_clique else self.base_weights[ref]
+            adjacency.setdefault(a, []).append((b, w, ("clique", i - 1, ref) if is_clique else ("edge", ref)))
+
+        # Dijkstra inside the cell from tail to head
+        start, goal = local[tail], local[head]
+        dist = {start: 0.0}
+        back = {start: None}
+        heap = [(0.0, start)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if u == goal:
+                break
+            if d > dist[u]:
+                continue
+            for b, w, sub in adjacency.get(u, ()):
+                if d + w < dist.get(b, float("inf")):
+                    dist[b] = d + w
+                    back[b] = (u, sub)
+                    heapq.heappush(heap, (d + w, b))
+
+        steps = []
+        u = goal
+        while back[u] is not None:
+            u, sub = back[u]
+            steps.append(sub)
+        for sub in reversed(steps):
+            self._unpack(sub, path)
+
+    # ----------------------------------
+    # Stored partition
+    # ----------------------------------
+    def save_partition(self, path):
+        np.savez(path, cells=self.partition)
+
+    @staticmethod
+    def load_partition(path):
+        with np.load(path) as data:
+            return data["cells"]
+
+
+def crp_search(start_node, goal_node, ctx=None):
+    """(path, cost, settled) over ctx.crp, in the same shape as the other searches."""
+    from data_context import get_context
+    ctx = ctx or get_context()
+    if not ctx.components.reachable(start_node, goal_node):
+        return None, float("inf"), 0
+    overlay = ctx.crp     # rebuilt by the context after a shared-graph reload
+    graph = overlay.graph
+    path, cost, settled = overlay.query(graph.index_of[start_node], graph.index_of[goal_node])
+    if path is None:
+        return None, cost, settled
+    return [graph.node_id(i) for i in path], cost, settled
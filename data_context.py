@@ -0,0 +1,309 @@
+import json
+import os
+import time
+from functools import cached_property
+from pathlib import Path
+
+from place_index import PlaceIndex
+
+# ----------------------------------
+# Where the processed data lives
+# ----------------------------------
+# Resolved relative to this file so imports work from any CWD.
+# CITY_DATA_DIR overrides it (e.g. a synthetic graph for benchmarks).
+# CITY_SHARED_GRAPH points at a shared_graph.py run dir; when set the
+# graph is attached from shared memory instead of parsed per process.
+DEFAULT_DATA_DIR = Path(__file__).resolve().parent / "data" / "processed"
+RAW_DATA_DIR = Path(__file__).resolve().parent / "data" / "raw"
+
+GRAPH_FILE = "road_graph.json"
+PLACES_FILE = "places_with_nodes.json"
+
+# Optional artifacts written by scripts/pipeline.py
+BINARY_GRAPH_FILE = "road_graph.npz"
+LANDMARKS_FILE = "landmarks.npz"
+EDGE_BUFFER_FILE = "road_edges.bin"
+ARC_FLAGS_FILE = "arc_flags.npz"
+SERVICE_AREAS_FILE = "service_areas.npz"
+CRP_PARTITION_FILE = "crp_partition.npz"
+
+
+class DataContext:
+    """
+    Memoized access to the processed data files.
+
+    Nothing is read until an attribute is first used, and every file is
+    read at most once per context. Searches take an optional ``ctx`` so
+    several data directories can coexist in one process.
+    """
+
+    def __init__(self, data_dir=None, graph_file=GRAPH_FILE, places_file=PLACES_FILE,
+                 shared_dir=None):
+        self.data_dir = Path(data_dir or os.environ.get("CITY_DATA_DIR") or DEFAULT_DATA_DIR)
+        self.graph_file = graph_file
+        self.places_file = places_file
+        self.shared_dir = shared_dir or os.environ.get("CITY_SHARED_GRAPH")
+        self._shared_edge_buffer = (None, None)
+        self._derived = {}      # name -> (graph it was built for, value)
+
+    def path(self, name):
+        return self.data_dir / name
+
+    def _load_json(self, name):
+        with open(self.path(name), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    # ----------------------------------
+    # Graph
+    # ----------------------------------
+    @cached_property
+    def _graph_json(self):
+        return self._load_json(self.graph_file)
+
+    @cached_property
+    def _shared_store(self):
+        from shared_graph import SharedGraphStore
+        return SharedGraphStore(self.shared_dir)
+
+    @property
+    def graph(self):
+        if self.shared_dir:
+            return {"nodes": self.nodes, "edges": self.edges}
+        return self._graph_json
+
+    @property
+    def compact(self):
+        """The CompactGraph (shared, read-only when CITY_SHARED_GRAPH is set)."""
+        if self.shared_dir:
+            # Re-checked on every access so a hot reload is picked up
+            return self._shared_store.current().graph
+        return self._local_compact
+
+    @cached_property
+    def _local_compact(self):
+        from compact_graph import CompactGraph
+        if self._is_fresh(BINARY_GRAPH_FILE):
+            return CompactGraph.load(self.path(BINARY_GRAPH_FILE))
+        return CompactGraph.from_json(self._graph_json)
+
+    def _is_fresh(self, artifact):
+        """True if ``artifact`` exists and is not older than the graph JSON."""
+        path = self.path(artifact)
+        return path.exists() and path.stat().st_mtime >= self.path(self.graph_file).stat().st_mtime
+
+    @staticmethod
+    def _for_current_weights(table):
+        """
+        ``table`` if it was computed with today's cost factors, else None:
+        landmarks, arc flags and service areas are only valid for the
+        weights they were built from (a factor change makes them stale
+        without touching the graph's mtime).
+        """
+        from compact_graph import DEFAULT_PROFILE
+        if table is None or table.profile != DEFAULT_PROFILE.fingerprint():
+            return None
+        return table
+
+    def _per_graph(self, name, build):
+        """
+        ``build(graph)`` cached per shared graph: under CITY_SHARED_GRAPH a
+        hot reload gives a new CompactGraph, and tables derived from the
+        old one are rebuilt instead of served stale. ``graph`` is None for
+        a local context (its files never change under it).
+        """
+        graph = self.compact if self.shared_dir else None
+        cached = self._derived.get(name)
+        if cached is None or cached[0] is not graph:
+            cached = self._derived[name] = (graph, build(graph))
+        return cached[1]
+
+    @property
+    def landmarks(self):
+        """
+        LandmarkTable (shared with the graph, or the pipeline's landmarks
+        stage) for the current cost factors, or None.
+        """
+        return self._per_graph("landmarks", self._load_landmarks)
+
+    def _load_landmarks(self, graph):
+        from landmarks import LandmarkTable
+        if graph is not None:
+            return self._for_current_weights(LandmarkTable.from_extras(graph.extras))
+        if not self._is_fresh(LANDMARKS_FILE):
+            return None
+        return self._for_current_weights(LandmarkTable.load(self.path(LANDMARKS_FILE)))
+
+    @property
+    def arc_flags(self):
+        """
+        ArcFlags (shared with the graph, or the pipeline's arcflags stage)
+        for the current cost factors, or None.
+        """
+        return self._per_graph("arc_flags", self._load_arc_flags)
+
+    @arc_flags.setter
+    def arc_flags(self, table):
+        self._derived["arc_flags"] = (self.compact if self.shared_dir else None, table)
+
+    def _load_arc_flags(self, graph):
+        from arc_flags import ArcFlags
+        if graph is not None:
+            return self._for_current_weights(ArcFlags.from_extras(graph.extras))
+        if not self._is_fresh(ARC_FLAGS_FILE):
+            return None
+        return self._for_current_weights(ArcFlags.load(self.path(ARC_FLAGS_FILE)))
+
+    @property
+    def crp(self):
+        """CRP overlay customized for the default profile, on the pipeline's partition if fresh."""
+        return self._per_graph("crp", self._load_crp)
+
+    def _load_crp(self, graph):
+        from crp import CRP
+        graph = graph or self.compact
+        cells = None
+        if self._is_fresh(CRP_PARTITION_FILE):
+            cells = CRP.load_partition(self.path(CRP_PARTITION_FILE))
+            if cells.shape[1] != graph.num_nodes:   # partition of a graph reloaded since
+                cells = None
+        overlay = CRP(graph, cells) if cells is not None else CRP.build(graph)
+        return overlay.customize()
+
+    @property
+    def facilities(self):
+        """FacilityIndex over the places, with the pipeline's service areas if fresh."""
+        return self._per_graph("facilities", self._load_facilities)
+
+    def _load_facilities(self, graph):
+        from facilities import FacilityIndex, ServiceAreas
+        areas = None
+        path = self.path(SERVICE_AREAS_FILE)
+        if graph is None and self._is_fresh(SERVICE_AREAS_FILE) and \
+                path.stat().st_mtime >= self.path(self.places_file).stat().st_mtime:
+            areas = self._for_current_weights(ServiceAreas.load(path))
+        return FacilityIndex(graph or self.compact, self.places, self.components, areas)
+
+    @property
+    def edge_buffer(self):
+        """Packed map segments for /graph.bin (see edge_buffer.py)."""
+        if self.shared_dir:
+            # Rebuilt only when a hot reload swapped the shared graph
+            graph, data = self._shared_edge_buffer
+            current = self.compact
+            if graph is not current:
+                from edge_buffer import build_edge_buffer
+                self._shared_edge_buffer = (current, build_edge_buffer(current))
+            return self._shared_edge_buffer[1]
+        return self._local_edge_buffer
+
+    @cached_property
+    def _local_edge_buffer(self):
+        if self._is_fresh(EDGE_BUFFER_FILE):
+            return self.path(EDGE_BUFFER_FILE).read_bytes()
+        from edge_buffer import build_edge_buffer
+        return build_edge_buffer(self._local_compact)
+
+    @property
+    def nodes(self):
+        if self.shared_dir:
+            return self.compact.nodes_view()
+        return self._graph_json["nodes"]
+
+    @property
+    def edges(self):
+        if self.shared_dir:
+            return self.compact.edges_view()
+        return self._graph_json["edges"]
+
+    @property
+    def reverse_edges(self):
+        if self.shared_dir:
+            return self.compact.reverse_edges_view()
+        return self._reverse_edges
+
+    @cached_property
+    def _reverse_edges(self):
+        from search_algorithms import build_reverse_edges
+        return build_reverse_edges(self.edges)
+
+    @property
+    def coords(self):
+        """node id -> (lat, lon), the inputs of the haversine heuristic."""
+        if self.shared_dir:
+            return self.compact.coords_view()
+        return self._coords
+
+    @cached_property
+    def _coords(self):
+        return {nid: (n["lat"], n["lng"]) for nid, n in self.nodes.items()}
+
+    @property
+    def components(self):
+        """SCC reachability index, shared with the graph, stored by build_graph.py or computed here."""
+        return self._per_graph("components", self._load_components)
+
+    def _load_components(self, graph):
+        from graph_components import ComponentIndex
+        if graph is not None:
+            index = ComponentIndex.from_extras(graph, graph.extras)
+            if index is not None:
+                return index
+            return ComponentIndex.build(graph.edges_view(), graph.nodes_view())
+        stored = self._graph_json.get("components")
+        if stored:
+            return ComponentIndex.from_json(stored)
+        return ComponentIndex.build(self.edges, self.nodes)
+
+    # ----------------------------------
+    # Places
+    # ----------------------------------
+    @cached_property
+    def places(self):
+        return self._load_json(self.places_file)["places"]
+
+    @cached_property
+    def locations(self):
+        """place name -> (lat, lon)"""
+        return {p["name"]: (p["lat"], p["lon"]) for p in self.places}
+
+    @cached_property
+    def place_index(self):
+        return PlaceIndex(self.places)
+
+    # ----------------------------------
+    # Warm-up
+    # ----------------------------------
+    WARM_UP_STEPS = ("graph", "coords", "reverse_edges", "components", "places", "place_index")
+
+    def warm_up(self, steps=None):
+        """
+        Prefetch data before a worker accepts traffic.
+        Returns {step: seconds} so cold-start cost can be tracked.
+        """
+        timings = {}
+        for step in steps or self.WARM_UP_STEPS:
+            t0 = time.perf_counter()
+            getattr(self, step)
+            timings[step] = time.perf_counter() - t0
+        return timings
+
+
+# ----------------------------------
+# Process-wide default context
+# ----------------------------------
+_default_context = None
+
+
+def get_context():
+    global _default_context
+    if _default_context is None:
+        _default_context = DataContext()
+    return _default_context
+
+
+def set_context(ctx):
+    """Replace the default context (returns the previous one)."""
+    global _default_context
+    previous = _default_context
+    _default_context = ctx
+    return previous
@@ -0,0 +1,187 @@
+"""
+Single-source shortest paths over a CompactGraph.
+
+Two engines with the same contract, both returning ``(dist, parent)``
+arrays indexed like the graph (parent is -1 for the source and for
+unreachable nodes):
+
+- dijkstra_arrays: the classic heap version, one node per iteration.
+- delta_stepping:  nodes are grouped into distance buckets of width
+  ``delta`` and a whole bucket is relaxed at once with NumPy gathers and
+  np.minimum.at, so the Python loop runs per bucket/phase, not per node.
+
+Both break parent ties the same way (the tight predecessor with the
+smallest (dist, index), which is what the heap pops first), so on the
+same cost profile they return identical arrays.
+"""
+import heapq
+
+import numpy as np
+
+from compact_graph import DEFAULT_PROFILE
+
+
+# ----------------------------------
+# Reference: heap-based Dijkstra
+# ----------------------------------
+def dijkstra_arrays(graph, source, profile=DEFAULT_PROFILE):
+    weights = graph.weights(profile).tolist()
+    indptr = graph.indptr.tolist()
+    indices = graph.indices.tolist()
+
+    n = graph.num_nodes
+    dist = [float("inf")] * n
+    parent = [-1] * n
+    dist[source] = 0.0
+
+    heap = [(0.0, source)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        for e in range(indptr[u], indptr[u + 1]):
+            v = indices[e]
+            nd = d + weights[e]
+            if nd < dist[v]:
+                dist[v] = nd
+                parent[v] = u
+                heapq.heappush(heap, (nd, v))
+
+    return np.array(dist), np.array(parent, dtype=np.int64)
+
+
+# ----------------------------------
+# Delta-stepping
+# ----------------------------------
+def default_delta(graph, profile=DEFAULT_PROFILE):
+    weights = graph.weights(profile)
+    return float(weights.mean()) if len(weights) else 1.0
+
+
+def _edges_of(indptr, nodes):
+    """Flat array of the out-edge ids of ``nodes`` (vectorized CSR gather)."""
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + offsets
+
+
+def delta_stepping(graph, source, profile=DEFAULT_PROFILE, delta=None, stats=None):
+    """
+    ``delta`` is the bucket width in cost units (defaults to the mean edge
+    weight). Small deltas approach Dijkstra's ordering, large ones approach
+    Bellman-Ford's parallelism. Pass a dict as ``stats`` to get the number
+    of buckets and relaxation phases. ``source`` may also be an array of
+    node indices: dist is then to the nearest of them, and following
+    parent pointers ends at that one.
+    """
+    delta = delta or default_delta(graph, profile)
+
+    weights = graph.weights(profile)
+    indptr = graph.indptr
+    indices = graph.indices
+    sources = np.repeat(np.arange(graph.num_nodes), np.diff(indptr))
+    light = weights <= delta
+
+    dist = np.full(graph.num_nodes, np.inf)
+    dist[source] = 0.0
+
+    buckets = {0: [np.atleast_1d(np.asarray(source, dtype=np.int64))]}
+    num_buckets = 0
+    phases = 0
+
+    def relax(nodes, edge_mask):
+        nonlocal phases
+        phases += 1
+
+        edge_ids = _edges_of(indptr, nodes)
+        edge_ids = edge_ids[edge_mask[edge_ids]]
+        if edge_ids.size == 0:
+            return
+
+        targets = indices[edge_ids].astype(np.int64)
+        candidates = dist[sources[edge_ids]] + weights[edge_ids]
+
+        touched = np.unique(targets)
+        before = dist[touched].copy()
+        np.minimum.at(dist, targets, candidates)
+
+        improved = touched[dist[touched] < before]
+        if improved.size:
+            ids = (dist[improved] // delta).astype(np.int64)
+            for b in np.unique(ids).tolist():
+                buckets.setdefault(b, []).append(improved[ids == b])
+
+    while buckets:
+        i = min(buckets)
+        settled = []
+        num_buckets += 1
+
+        # Light edges can put nodes back into bucket i: repeat until stable
+        while i in buckets:
+            frontier = np.unique(np.concatenate(buckets.pop(i)))
+            # Drop entries whose distance has since moved to a lower bucket
+            frontier = frontier[(dist[frontier] // delta).astype(np.int64) == i]
+            if frontier.size == 0:
+                continue
+            settled.append(frontier)
+            relax(frontier, light)
+
+        # Heavy edges always leave the bucket, one pass is enough
+        if settled:
+            relax(np.unique(np.concatenate(settled)), ~light)
+
+    if stats is not None:
+        stats["buckets"] = num_buckets
+        stats["phases"] = phases
+        stats["delta"] = delta
+
+    return dist, canonical_parents(graph, dist, weights, source)
+
+
+def canonical_parents(graph, dist, weights, source):
+    """
+    For every reached node, the tight predecessor (dist[u] + w == dist[v])
+    with the smallest (dist[u], u) -- the one a heap-based Dijkstra settles
+    first and therefore records.
+    """
+    sources = np.repeat(np.arange(graph.num_nodes), np.diff(graph.indptr))
+    targets = graph.indices.astype(np.int64)
+
+    tight = np.isfinite(dist[sources]) & (dist[sources] + weights == dist[targets])
+    tight &= ~np.isin(targets, source)
+    u, v = sources[tight], targets[tight]
+
+    order = np.lexsort((u, dist[u], v))
+    u, v = u[order], v[order]
+    first = np.ones(len(v), dtype=bool)
+    first[1:] = v[1:] != v[:-1]
+
+    parent = np.full(graph.num_nodes, -1, dtype=np.int64)
+    parent[v[first]] = u[first]
+    return parent
+
+
+# ----------------------------------
+# Helpers
+# ----------------------------------
+def path_to(parent, source, target):
+    """Node indices from ``source`` to ``target`` (None if unreachable)."""
+    if target != source and parent[target] < 0:
+        return None
+    path = [target]
+    while parent[path[-1]] >= 0:
+        path.append(int(parent[path[-1]]))
+    return path[::-1]
+
+
+def shortest_path_tree(ctx, start_node, engine="delta", profile=DEFAULT_PROFILE, **kwargs):
+    """One-to-all from a node id on ctx's compact graph."""
+    graph = ctx.compact
+    source = graph.index_of[start_node]
+    if engine == "delta":
+        return delta_stepping(graph, source, profile, **kwargs)
+    return dijkstra_arrays(graph, source, profile)
@@ -0,0 +1,86 @@
+"""
+Binary road-segment buffer for the map (served as /graph.bin).
+
+Drawing the network from road_graph.json means one Leaflet polyline per
+directed edge. Instead the server ships every undirected segment once,
+packed so the page can read it straight into typed arrays:
+
+    offset  size        field
+    0       4           magic b"CEB1"
+    4       4           uint32 segment count (s)
+    8       4           uint32 number of road classes (ROAD_CLASSES + unknown)
+    12      4           reserved (0)
+    16      16          graph version (truncated sha256, also the ETag)
+    32      16 * s      float32 [lat1, lng1, lat2, lng2] per segment
+    32+16s  s           uint8 road class per segment (index into ROAD_CLASSES)
+
+All integers are little-endian.
+"""
+import hashlib
+import struct
+
+import numpy as np
+
+from compact_graph import UNKNOWN_CLASS
+
+MAGIC = b"CEB1"
+HEADER = struct.Struct("<4sIII16s")
+
+
+def graph_version(graph):
+    """Content hash of everything the buffer is built from."""
+    digest = hashlib.sha256()
+    for name in ("lat", "lng", "indptr", "indices", "road_class"):
+        digest.update(np.ascontiguousarray(getattr(graph, name)).tobytes())
+    return digest.digest()[:16]
+
+
+def segments(graph):
+    """
+    Deduplicated undirected segments: (a, b, road_class) arrays with a < b.
+    A two-way street keeps the most important (lowest) class of its two edges.
+    """
+    n = graph.num_nodes
+    sources = np.repeat(np.arange(n, dtype=np.int64), np.diff(graph.indptr))
+    targets = graph.indices.astype(np.int64)
+
+    a = np.minimum(sources, targets)
+    b = np.maximum(sources, targets)
+    keep = a != b
+    a, b, classes = a[keep], b[keep], graph.road_class[keep]
+
+    keys = a * n + b
+    order = np.lexsort((classes, keys))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = keys[order][1:] != keys[order][:-1]
+    chosen = order[first]
+    return a[chosen], b[chosen], classes[chosen]
+
+
+def build_edge_buffer(graph):
+    a, b, classes = segments(graph)
+
+    coords = np.empty((len(a), 4), dtype=np.float32)
+    coords[:, 0] = graph.lat[a]
+    coords[:, 1] = graph.lng[a]
+    coords[:, 2] = graph.lat[b]
+    coords[:, 3] = graph.lng[b]
+
+    header = HEADER.pack(MAGIC, len(a), UNKNOWN_CLASS + 1, 0, graph_version(graph))
+    return header + coords.astype("<f4").tobytes() + classes.astype(np.uint8).tobytes()
+
+
+def buffer_version(data):
+    """Hex graph version of a buffer (used as its ETag)."""
+    return HEADER.unpack_from(data)[4].hex()
+
+
+def read_edge_buffer(data):
+    """Inverse of build_edge_buffer: (version hex, float32[s, 4], uint8[s])."""
+    magic, count, _, _, version = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not an edge buffer")
+
+    coords = np.frombuffer(data, dtype="<f4", count=count * 4, offset=HEADER.size)
+    classes = np.frombuffer(data, dtype=np.uint8, count=count, offset=HEADER.size + count * 16)
+    return version.hex(), coords.reshape(count, 4), classes
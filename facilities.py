@@ -0,0 +1,207 @@
+"""
+Nearest facility by travel time ("closest bus stop from here").
+
+Two ways to answer it, both over the CompactGraph with the default cost
+profile:
+
+- nearest_facilities(): Dijkstra from the query node that stops once k
+  facility nodes of the type are settled. Any k, no preprocessing.
+- ServiceAreas: one multi-source delta-stepping per place type on the
+  reversed graph, seeded with every facility of that type, assigns each
+  node its nearest facility (a network Voronoi diagram). Stored as
+  int32 owner + float32 minutes per node and type, so k = 1 is a lookup.
+
+Facilities are the snapped places; several places on one node count as
+one facility node.
+"""
+import heapq
+
+import numpy as np
+
+from compact_graph import DEFAULT_PROFILE
+from delta_stepping import delta_stepping
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def facility_nodes(graph, places):
+    """type -> {node index: [places on it]} (places with an unknown node are skipped)."""
+    index_of = graph.index_of
+    by_type = {}
+    for place in places:
+        node = index_of.get(place.get("node_id"))
+        if node is not None:
+            by_type.setdefault(place.get("type", "unknown"), {}).setdefault(node, []).append(place)
+    return by_type
+
+
+def snap_to_node(graph, lat, lon, candidates=None):
+    """Index of the node (among ``candidates``) closest to (lat, lon) as the crow flies."""
+    ix = np.arange(graph.num_nodes) if candidates is None else candidates
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(graph.lat[ix]), np.radians(graph.lng[ix])
+    a = np.sin((lat2 - lat1) / 2) ** 2 + \
+        np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    best = int(np.argmin(a))
+    return int(ix[best]), float(2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a[best])))
+
+
+# ----------------------------------
+# Online: k nearest by search
+# ----------------------------------
+def nearest_facilities(graph, start, targets, k=1, profile=DEFAULT_PROFILE):
+    """
+    The first ``k`` nodes of ``targets`` (a set of node indices) settled
+    by a Dijkstra from ``start``, as [(node, minutes, path)] in order.
+    """
+    weights = graph.weights(profile)
+    indptr = graph.indptr
+    indices = graph.indices
+
+    dist = {start: 0.0}
+    parent = {start: -1}
+    settled = set()
+    found = []
+    heap = [(0.0, start)]
+    while heap and len(found) < k:
+        d, u = heapq.heappop(heap)
+        if u in settled:
+            continue
+        settled.add(u)
+        if u in targets:
+            found.append((u, d))
+        for e in range(indptr[u], indptr[u + 1]):
+            v = int(indices[e])
+            nd = d + float(weights[e])
+            if nd < dist.get(v, float("inf")):
+                dist[v] = nd
+                parent[v] = u
+                heapq.heappush(heap, (nd, v))
+
+    results = []
+    for node, d in found:
+        path = [node]
+        while parent[path[-1]] >= 0:
+            path.append(parent[path[-1]])
+        results.append((node, d, path[::-1]))
+    return results
+
+
+# ----------------------------------
+# Offline: network Voronoi per type
+# ----------------------------------
+def voronoi(graph, backward, seeds, profile=DEFAULT_PROFILE):
+    """
+    (owner, minutes): for every node, the position in ``seeds`` of its
+    nearest seed by travel time towards it, -1 where none is reachable.
+    """
+    seeds = np.asarray(seeds, dtype=np.int64)
+    dist, parent = delta_stepping(backward, seeds, profile)
+
+    # Follow parents to the seed that starts each shortest path, by
+    # pointer doubling (log(depth) gathers)
+    root = np.where(parent >= 0, parent, np.arange(graph.num_nodes))
+    while True:
+        jumped = root[root]
+        if np.array_equal(jumped, root):
+            break
+        root = jumped
+
+    position = np.full(graph.num_nodes, -1, dtype=np.int32)
+    position[seeds] = np.arange(len(seeds), dtype=np.int32)
+    owner = np.where(np.isfinite(dist), position[root], -1).astype(np.int32)
+    return owner, dist.astype(np.float32)
+
+
+class ServiceAreas:
+
+    def __init__(self, areas, profile=None):
+        # type -> (nodes int64[f], place ids str[f], owner int32[n], minutes float32[n])
+        self.areas = areas
+        self.profile = profile      # CostProfile.fingerprint() of the weights, None if unknown
+
+    @classmethod
+    def build(cls, graph, places, types=None, profile=DEFAULT_PROFILE):
+        backward = graph.reversed()
+        areas = {}
+        for place_type, at in sorted(facility_nodes(graph, places).items()):
+            if types is not None and place_type not in types:
+                continue
+            nodes = np.array(sorted(at), dtype=np.int64)
+            ids = np.array([str(at[n][0]["id"]) for n in nodes])
+            owner, minutes = voronoi(graph, backward, nodes, profile)
+            areas[place_type] = (nodes, ids, owner, minutes)
+        return cls(areas, profile.fingerprint())
+
+    def types(self):
+        return sorted(self.areas)
+
+    def nearest(self, place_type, node):
+        """(facility node index, place id, minutes) for a node index, or None."""
+        nodes, ids, owner, minutes = self.areas[place_type]
+        i = int(owner[node])
+        if i < 0:
+            return None
+        return int(nodes[i]), str(ids[i]), float(minutes[node])
+
+    def save(self, path):
+        arrays = {}
+        for place_type, (nodes, ids, owner, minutes) in self.areas.items():
+            arrays[f"{place_type}/nodes"] = nodes
+            arrays[f"{place_type}/ids"] = ids
+            arrays[f"{place_type}/owner"] = owner
+            arrays[f"{place_type}/minutes"] = minutes
+        np.savez(path, profile=np.array(self.profile or ""), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        areas = {}
+        with np.load(path) as data:
+            profile = str(data["profile"]) if "profile" in data.files else None
+            for place_type in {name.rsplit("/", 1)[0] for name in data.files if "/" in name}:
+                areas[place_type] = tuple(
+                    data[f"{place_type}/{field}"] for field in ("nodes", "ids", "owner", "minutes")
+                )
+        return cls(areas, profile or None)
+
+
+# ----------------------------------
+# Per-context index
+# ----------------------------------
+class FacilityIndex:
+    """Facility nodes by type, snapping, and the service areas if built."""
+
+    def __init__(self, graph, places, components, areas=None):
+        self.graph = graph
+        self.by_type = facility_nodes(graph, places)
+        self.areas = areas
+        # Snap only onto the largest SCC, like the places themselves
+        self.snap_nodes = np.array(
+            [i for i in range(graph.num_nodes) if components.in_largest(graph.node_id(i))],
+            dtype=np.int64,
+        )
+
+    def types(self):
+        return sorted(self.by_type)
+
+    def snap(self, lat, lon):
+        """(node index, km away) of the routable node closest to (lat, lon)."""
+        return snap_to_node(self.graph, lat, lon, self.snap_nodes)
+
+    def nearest(self, place_type, node, k=1, paths=False):
+        """
+        [(facility node, [places], minutes, path or None)] for the k nearest
+        facilities of ``place_type`` from a node index. k = 1 without
+        ``paths`` is a lookup in the service areas when they cover the type.
+        """
+        at = self.by_type.get(place_type, {})
+        if k == 1 and not paths and self.areas is not None and place_type in self.areas.areas:
+            hit = self.areas.nearest(place_type, node)
+            if hit is None:
+                return []
+            facility, _, minutes = hit
+            return [(facility, at.get(facility, []), minutes, None)]
+        return [
+            (facility, at[facility], minutes, path)
+            for facility, minutes, path in nearest_facilities(self.graph, node, at.keys(), k)
+        ]
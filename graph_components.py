@@ -0,0 +1,358 @@
+"""
+Strongly connected components and a reachability index.
+
+build_graph.py honours one-way tags, so the road graph has islands and
+one-way traps. Two nodes can only be connected if the component of the
+goal is reachable from the component of the start in the condensation
+DAG, which is answered here with one bit test instead of a search.
+"""
+from collections import deque
+
+
+# ----------------------------------
+# Iterative Tarjan
+# ----------------------------------
+def strongly_connected_components(edges, nodes=None):
+    """
+    ``edges`` is the road_graph.json adjacency (node -> [{"to": ...}]).
+    Returns node -> component id. Components are numbered in the order
+    Tarjan completes them, i.e. reverse topological order of the DAG:
+    every edge between components goes from a higher id to a lower one.
+    """
+    index_of = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    component = {}
+    next_index = 0
+    next_component = 0
+
+    for root in (nodes if nodes is not None else edges):
+        if root in index_of:
+            continue
+
+        # Each frame: (node, iterator over its successors)
+        index_of[root] = lowlink[root] = next_index
+        next_index += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(edges.get(root, ())))]
+
+        while work:
+            node, successors = work[-1]
+            advanced = False
+
+            for edge in successors:
+                nxt = edge["to"]
+                if nxt not in index_of:
+                    index_of[nxt] = lowlink[nxt] = next_index
+                    next_index += 1
+                    stack.append(nxt)
+                    on_stack.add(nxt)
+                    work.append((nxt, iter(edges.get(nxt, ()))))
+                    advanced = True
+                    break
+                if nxt in on_stack:
+                    lowlink[node] = min(lowlink[node], index_of[nxt])
+
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+            if lowlink[node] == index_of[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component[member] = next_component
+                    if member == node:
+                        break
+                next_component += 1
+
+    return component
+
+
+# ----------------------------------
+# Condensation DAG reachability
+# ----------------------------------
+def reachability(edges, component):
+    """
+    reach[c] is a bitset (Python int) of the components reachable from c,
+    c included. Because of Tarjan's numbering successors always have
+    smaller ids, so one ascending pass fills the table.
+    """
+    count = max(component.values(), default=-1) + 1
+    successors = [set() for _ in range(count)]
+
+    for u, edge_list in edges.items():
+        cu = component[u]
+        for edge in edge_list:
+            cv = component[edge["to"]]
+            if cv != cu:
+                successors[cu].add(cv)
+
+    reach = [0] * count
+    for c in range(count):
+        bits = 1 << c
+        for d in successors[c]:
+            bits |= reach[d]
+        reach[c] = bits
+    return reach
+
+
+def _overlapping(groups):
+    """Union lists of components that share a member."""
+    merged = []
+    owner = {}
+    for group in groups:
+        hits = {owner[c] for c in group if c in owner}
+        combined = set(group)
+        for i in hits:
+            combined |= merged[i]
+            merged[i] = set()
+        merged.append(combined)
+        for c in combined:
+            owner[c] = len(merged) - 1
+    return [sorted(g) for g in merged if g]
+
+
+class ComponentIndex:
+
+    def __init__(self, component, reach):
+        self.component = component
+        self.reach = reach
+
+        sizes = {}
+        for c in component.values():
+            sizes[c] = sizes.get(c, 0) + 1
+        self.sizes = sizes
+        self.largest = max(sizes, key=sizes.get) if sizes else None
+
+    @classmethod
+    def build(cls, edges, nodes=None):
+        component = strongly_connected_components(edges, nodes)
+        return cls(component, reachability(edges, component))
+
+    def reachable(self, start_node, goal_node):
+        cs = self.component.get(start_node)
+        cg = self.component.get(goal_node)
+        if cs is None or cg is None:
+            return False
+        return bool(self.reach[cs] >> cg & 1)
+
+    def in_largest(self, node):
+        return self.component.get(node) == self.largest
+
+    # ----------------------------------
+    # Incremental update (scripts/update_graph.py)
+    # ----------------------------------
+    def apply_changes(self, edges, added, removed, new_nodes=()):
+        """
+        Patch the index after some edges changed. ``edges`` is the updated
+        adjacency, ``added`` / ``removed`` are (u, v) node id pairs and
+        ``new_nodes`` the nodes that did not exist before. Only components
+        an edge touches are looked at:
+
+        - removed edge inside a component: if u still reaches v there,
+          nothing changed; otherwise that component is re-split (Tarjan on
+          its members only)
+        - added edge cu -> cv where cv already reaches cu: every component
+          on a cv -> cu path merges
+        - any other added edge: cu and whatever reaches it now also reach
+          what cv reaches
+
+        Splits and merges that share a component are resolved together,
+        so each touched component gets at most one Tarjan pass.
+        A removed edge between two components leaves the reach bits as
+        they are. They may then over-approximate until the next full
+        build, which costs a search that fails, never a missed route.
+        Returns counts of new, merged and split components, and under
+        "moved" {node: previous component (None if new)} for every node
+        whose component changed.
+        """
+        summary = {"new": 0, "merged": 0, "split": 0, "moved": {}}
+
+        for node in new_nodes:
+            c = len(self.reach)
+            summary["moved"][node] = None
+            self.component[node] = c
+            self.reach.append(1 << c)
+            self.sizes[c] = 1
+            summary["new"] += 1
+
+        # Components to re-run Tarjan on; several merges and splits that
+        # share a component are resolved in one pass at the end
+        pending = []
+        split = set()
+        for u, v in removed:
+            c = self.component.get(u)
+            if c is None or c in split or self.component.get(v) != c:
+                continue
+            if not self._reaches_within(edges, u, v, c):
+                split.add(c)
+                pending.append([c])
+        summary["split"] = len(split)
+
+        for u, v in added:
+            cu, cv = self.component[u], self.component[v]
+            if cu == cv or (self.reach[cu] >> cv & 1 and not self.reach[cv] >> cu & 1):
+                continue
+            if self.reach[cv] >> cu & 1:
+                # Candidates for the merged component: everything on a
+                # cv -> cu path (a superset if the bits over-approximate)
+                candidates = [
+                    x for x in self.sizes
+                    if self.reach[cv] >> x & 1 and self.reach[x] >> cu & 1
+                ]
+                grown = mask = 0
+                for x in candidates:
+                    grown |= self.reach[x]
+                    mask |= 1 << x
+                for x in range(len(self.reach)):
+                    if self.reach[x] & mask:
+                        self.reach[x] |= grown
+                pending.append(candidates)
+            else:
+                grown = self.reach[cv]
+                for x in range(len(self.reach)):
+                    if self.reach[x] >> cu & 1:
+                        self.reach[x] |= grown
+
+        if pending:
+            members = self._members()
+            for group in _overlapping(pending):
+                if len(group) > 1:
+                    summary["merged"] += 1
+                self._resolve(edges, group, members, summary["moved"])
+
+        self.largest = max(self.sizes, key=self.sizes.get) if self.sizes else None
+        return summary
+
+    def _members(self):
+        members = {}
+        for node, c in self.component.items():
+            members.setdefault(c, []).append(node)
+        return members
+
+    def _reaches_within(self, edges, u, v, c):
+        """BFS from u to v that never leaves component c."""
+        seen = {u}
+        queue = deque([u])
+        while queue:
+            node = queue.popleft()
+            for edge in edges.get(node, ()):
+                nxt = edge["to"]
+                if nxt == v:
+                    return True
+                if nxt not in seen and self.component.get(nxt) == c:
+                    seen.add(nxt)
+                    queue.append(nxt)
+        return False
+
+    def _resolve(self, edges, comps, members, moved):
+        """Recompute the SCCs among the members of the components ``comps``."""
+        nodes = [n for c in comps for n in members.pop(c)]
+        inside = set(nodes)
+        sub_edges = {n: [e for e in edges.get(n, ()) if e["to"] in inside] for n in nodes}
+        local = strongly_connected_components(sub_edges, nodes)
+        count = max(local.values()) + 1
+
+        # Biggest pieces take over the old ids (the largest component
+        # keeps its id), the rest get fresh ones
+        size = [0] * count
+        for n in nodes:
+            size[local[n]] += 1
+        old = sorted(comps, key=self.sizes.get, reverse=True)
+        by_size = sorted(range(count), key=size.__getitem__, reverse=True)
+        ids = [0] * count
+        for rank, k in enumerate(by_size):
+            if rank < len(old):
+                ids[k] = old[rank]
+            else:
+                ids[k] = len(self.reach)
+                self.reach.append(0)
+
+        outside = [0] * count
+        successors = [set() for _ in range(count)]
+        for n in nodes:
+            k = local[n]
+            for edge in edges.get(n, ()):
+                t = edge["to"]
+                if t in inside:
+                    if local[t] != k:
+                        successors[k].add(local[t])
+                else:
+                    outside[k] |= self.reach[self.component[t]]
+
+        # Tarjan numbers successors lower, so one ascending pass suffices
+        reach_local = []
+        for k in range(count):
+            bits = (1 << ids[k]) | outside[k]
+            for j in successors[k]:
+                bits |= reach_local[j]
+            reach_local.append(bits)
+
+        before = 0
+        for c in comps:
+            before |= 1 << c
+            self.reach[c] = 0
+            del self.sizes[c]
+        pieces = 0
+        below = 0
+        for k in range(count):
+            pieces |= 1 << ids[k]
+            below |= reach_local[k]
+            self.reach[ids[k]] = reach_local[k]
+        # Whatever reached the old components is assumed to reach every
+        # piece and all they reach (new after a merge)
+        for x in range(len(self.reach)):
+            if self.reach[x] & before and not pieces >> x & 1:
+                self.reach[x] |= below
+
+        for n in nodes:
+            piece = ids[local[n]]
+            if piece != self.component[n]:
+                moved.setdefault(n, self.component[n])
+            self.component[n] = piece
+            members.setdefault(piece, []).append(n)
+            self.sizes[piece] = self.sizes.get(piece, 0) + 1
+
+    # ----------------------------------
+    # Stored form (inside road_graph.json)
+    # ----------------------------------
+    def to_json(self):
+        return {
+            "component": self.component,
+            "reach": [format(bits, "x") for bits in self.reach],
+            "largest": self.largest,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data["component"], [int(bits, 16) for bits in data["reach"]])
+
+    def arrays(self, graph):
+        """
+        Tables for CompactGraph.extras: int32 component per node index and
+        the reach bitsets as uint8 rows (little-endian bits).
+        """
+        import numpy as np
+        width = max((len(self.reach) + 7) // 8, 1)
+        return {
+            "scc_component": np.array([self.component[nid] for nid in map(str, graph.node_ids.tolist())],
+                                      dtype=np.int32),
+            "scc_reach": np.frombuffer(
+                b"".join(bits.to_bytes(width, "little") for bits in self.reach), dtype=np.uint8
+            ).reshape(len(self.reach), width),
+        }
+
+    @classmethod
+    def from_extras(cls, graph, extras):
+        """The index stored by arrays() in ``graph``'s extras, or None."""
+        if "scc_component" not in extras:
+            return None
+        component = dict(zip(map(str, graph.node_ids.tolist()), extras["scc_component"].tolist()))
+        return cls(component, [int.from_bytes(row.tobytes(), "little") for row in extras["scc_reach"]])
@@ -0,0 +1,214 @@
+"""
+Landmark (ALT) distance tables.
+
+For a few landmark nodes L we store d(L, v) and d(v, L) for every v.
+The triangle inequality then gives a lower bound on d(u, t) that is
+usually much tighter than straight-line distance:
+
+    d(u, t) >= max_L( d(u, L) - d(t, L),  d(L, t) - d(L, u) )
+"""
+import heapq
+
+import numpy as np
+
+from compact_graph import DEFAULT_PROFILE
+from delta_stepping import delta_stepping
+
+DEFAULT_LANDMARKS = 8
+TIGHT_EPS = 1e-9
+
+
+def goal_heuristic(ctx, goal_node):
+    """
+    For the dict-based searches: h(node) -> the ALT lower bound on the
+    cost from node to ``goal_node``, or None without a usable table.
+    """
+    table = ctx.landmarks
+    if table is None:
+        return None
+    graph = ctx.compact
+    # Made for another graph (e.g. before a shared-graph reload)
+    if table.dist_from.shape[1] != graph.num_nodes:
+        return None
+    index_of = graph.index_of
+    goal = index_of[goal_node]
+    return lambda node: table.lower_bound(index_of[node], goal)
+
+
+def select_landmarks(graph, k, profile=DEFAULT_PROFILE, seed=0):
+    """
+    Farthest-point selection: each new landmark is the node whose
+    distance to the closest already chosen landmark is largest.
+    """
+    dist, _ = delta_stepping(graph, seed, profile)
+    reached = np.isfinite(dist)
+    first = int(np.argmax(np.where(reached, dist, -1)))
+
+    chosen = [first]
+    closest = np.where(reached, np.inf, -1.0)
+    while len(chosen) < min(k, int(reached.sum())):
+        d, _ = delta_stepping(graph, chosen[-1], profile)
+        closest = np.minimum(closest, np.where(reached, d, np.inf))
+        closest[chosen] = -1.0
+        chosen.append(int(np.argmax(np.where(np.isfinite(closest), closest, -1.0))))
+
+    return np.array(chosen, dtype=np.int64)
+
+
+class LandmarkTable:
+
+    def __init__(self, landmarks, dist_from, dist_to, profile=None):
+        self.landmarks = landmarks    # int64[k] node indices
+        self.dist_from = dist_from    # float64[k, n]  d(L, v)
+        self.dist_to = dist_to        # float64[k, n]  d(v, L)
+        self.profile = profile        # CostProfile.fingerprint() of the weights, None if unknown
+
+    @classmethod
+    def build(cls, graph, k=DEFAULT_LANDMARKS, profile=DEFAULT_PROFILE):
+        landmarks = select_landmarks(graph, k, profile)
+        backward = graph.reversed()
+
+        dist_from = np.vstack([delta_stepping(graph, int(l), profile)[0] for l in landmarks])
+        dist_to = np.vstack([delta_stepping(backward, int(l), profile)[0] for l in landmarks])
+        return cls(landmarks, dist_from, dist_to, profile.fingerprint())
+
+    def update(self, graph, removed, added, profile=DEFAULT_PROFILE):
+        """
+        Bring the tables up to date with a changed ``graph`` (same node
+        indices, new nodes appended) without recomputing them. ``removed``
+        and ``added`` are (u, v, weight) edges by node index. Returns how
+        many distances were re-derived.
+        """
+        n = graph.num_nodes
+        if self.dist_from.shape[1] < n:
+            pad = np.full((len(self.landmarks), n - self.dist_from.shape[1]), np.inf)
+            self.dist_from = np.hstack([self.dist_from, pad])
+            self.dist_to = np.hstack([self.dist_to, pad])
+
+        backward = graph.reversed()
+        flip = lambda changes: [(v, u, w) for u, v, w in changes]  # noqa: E731
+        touched = 0
+        for i, landmark in enumerate(self.landmarks):
+            touched += repair_distances(graph, backward, self.dist_from[i], int(landmark),
+                                        removed, added, profile)
+            touched += repair_distances(backward, graph, self.dist_to[i], int(landmark),
+                                        flip(removed), flip(added), profile)
+        return touched
+
+    def lower_bound(self, u, t):
+        """Lower bound on d(u, t) for node indices u and t (0 if unknown)."""
+        with np.errstate(invalid="ignore"):
+            forward = self.dist_from[:, t] - self.dist_from[:, u]
+            backward = self.dist_to[:, u] - self.dist_to[:, t]
+        terms = np.concatenate([forward, backward])
+        terms = terms[np.isfinite(terms)]
+        return max(float(terms.max()), 0.0) if terms.size else 0.0
+
+    def save(self, path):
+        np.savez(path, landmarks=self.landmarks, dist_from=self.dist_from, dist_to=self.dist_to,
+                 profile=np.array(self.profile or ""))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            profile = str(data["profile"]) if "profile" in data.files else None
+            return cls(data["landmarks"], data["dist_from"], data["dist_to"], profile or None)
+
+    def arrays(self):
+        """Tables for CompactGraph.extras (so they can be shared too)."""
+        return {
+            "landmarks": self.landmarks,
+            "landmark_dist_from": self.dist_from,
+            "landmark_dist_to": self.dist_to,
+            "landmark_profile": np.array([self.profile or ""]),
+        }
+
+    @classmethod
+    def from_extras(cls, extras):
+        """The table stored by arrays() in CompactGraph.extras, or None."""
+        if "landmarks" not in extras:
+            return None
+        profile = str(extras["landmark_profile"][0]) if "landmark_profile" in extras else None
+        return cls(extras["landmarks"], extras["landmark_dist_from"], extras["landmark_dist_to"],
+                   profile or None)
+
+
+# ----------------------------------
+# Dynamic repair of one-to-all distances
+# ----------------------------------
+def repair_distances(graph, reverse, dist, source, removed, added, profile=DEFAULT_PROFILE):
+    """
+    Update ``dist`` (distances from ``source`` before the change) in place
+    for the changed ``graph``; ``reverse`` is the same graph reversed, for
+    in-edges. Only nodes whose distance can change are visited:
+
+    1. Removed edges: a node whose tight in-edge (dist[u] + w == dist[v])
+       was removed is invalid unless another valid node still supports
+       it; invalid nodes pass this on to the nodes they supported.
+       Visiting candidates by distance means every possible supporter has
+       been decided first.
+    2. Invalid nodes and heads of added edges that got shorter seed a
+       Dijkstra that only continues through improved nodes.
+
+    Returns the number of nodes whose distance was re-derived.
+    """
+    weights = graph.weights(profile)
+    reverse_weights = reverse.weights(profile)
+
+    def out_edges(u):
+        lo, hi = graph.indptr[u], graph.indptr[u + 1]
+        return zip(graph.indices[lo:hi].tolist(), weights[lo:hi].tolist())
+
+    def in_edges(v):
+        lo, hi = reverse.indptr[v], reverse.indptr[v + 1]
+        return zip(reverse.indices[lo:hi].tolist(), reverse_weights[lo:hi].tolist())
+
+    # Phase 1: invalidate
+    heap = [(dist[v], v) for u, v, w in removed
+            if v != source and np.isfinite(dist[v]) and dist[u] + w <= dist[v] + TIGHT_EPS]
+    heapq.heapify(heap)
+    invalid = set()
+    decided = set()
+    while heap:
+        d, v = heapq.heappop(heap)
+        if v in decided:
+            continue
+        decided.add(v)
+        supported = any(
+            x not in invalid and dist[x] + w <= d + TIGHT_EPS
+            for x, w in in_edges(v)
+        )
+        if supported:
+            continue
+        invalid.add(v)
+        for y, w in out_edges(v):
+            if y != source and y not in decided and d + w <= dist[y] + TIGHT_EPS:
+                heapq.heappush(heap, (dist[y], y))
+
+    # Phase 2: re-derive and propagate improvements
+    for v in invalid:
+        dist[v] = np.inf
+    heap = []
+    for v in invalid:
+        best = min((dist[x] + w for x, w in in_edges(v) if x not in invalid), default=np.inf)
+        if best < dist[v]:
+            dist[v] = best
+            heap.append((best, v))
+    for u, v, w in added:
+        if dist[u] + w < dist[v]:
+            dist[v] = dist[u] + w
+            heap.append((dist[v], v))
+    heapq.heapify(heap)
+
+    touched = set(invalid)
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        touched.add(u)
+        for v, w in out_edges(u):
+            nd = d + w
+            if nd < dist[v]:
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return len(touched)
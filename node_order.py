@@ -0,0 +1,163 @@
+"""
+Cache-friendly node numbering for road_graph.json.
+
+build_graph.py numbers nodes in the order OSM features appear, so two
+neighbouring intersections can end up far apart in every per-node array
+(CompactGraph, delta-stepping's dist/parent, landmark tables). The
+orderings here put nearby nodes at nearby indices:
+
+- hilbert: sort by position along a Hilbert curve over the bounding box
+- bfs:     breadth-first from one end of each connected piece
+- rcm:     reverse Cuthill-McKee (BFS visiting low-degree nodes first),
+           which minimizes the spread |u - v| of the edges
+
+renumber() applies an ordering: ids become "0".."n-1" in the new order,
+every adjacency list is sorted by target id, and the old id of each node
+is kept in the graph's "original_ids" list.
+"""
+from collections import deque
+
+HILBERT_BITS = 16
+
+
+# ----------------------------------
+# Orderings (each returns the old ids in their new order)
+# ----------------------------------
+def hilbert_index(x, y, bits=HILBERT_BITS):
+    """Position of cell (x, y) on a Hilbert curve over a 2^bits grid."""
+    d = 0
+    s = 1 << (bits - 1)
+    while s > 0:
+        rx = 1 if x & s else 0
+        ry = 1 if y & s else 0
+        d += s * s * ((3 * rx) ^ ry)
+        # Rotate the quadrant so the curve stays continuous
+        if ry == 0:
+            if rx == 1:
+                x = s - 1 - (x & (s - 1))
+                y = s - 1 - (y & (s - 1))
+            x, y = y, x
+        s >>= 1
+    return d
+
+
+def hilbert_order(nodes, edges=None):
+    lats = [n["lat"] for n in nodes.values()]
+    lngs = [n["lng"] for n in nodes.values()]
+    lat0, lng0 = min(lats), min(lngs)
+    span = max(max(lats) - lat0, max(lngs) - lng0) or 1.0
+    scale = ((1 << HILBERT_BITS) - 1) / span
+
+    def key(nid):
+        node = nodes[nid]
+        return hilbert_index(int((node["lng"] - lng0) * scale), int((node["lat"] - lat0) * scale))
+
+    return sorted(nodes, key=key)
+
+
+def _undirected(nodes, edges):
+    neighbours = {nid: set() for nid in nodes}
+    for nid, out in edges.items():
+        for edge in out:
+            if edge["to"] != nid:
+                neighbours[nid].add(edge["to"])
+                neighbours[edge["to"]].add(nid)
+    return neighbours
+
+
+def _bfs(nodes, neighbours, by_degree):
+    order = []
+    seen = set()
+    # Start every piece at a low-degree node (an "end" of the network)
+    starts = sorted(nodes, key=lambda nid: len(neighbours[nid])) if by_degree else list(nodes)
+    for root in starts:
+        if root in seen:
+            continue
+        seen.add(root)
+        queue = deque([root])
+        while queue:
+            nid = queue.popleft()
+            order.append(nid)
+            nxt = [v for v in neighbours[nid] if v not in seen]
+            nxt.sort(key=(lambda v: (len(neighbours[v]), v)) if by_degree else None)
+            seen.update(nxt)
+            queue.extend(nxt)
+    return order
+
+
+def bfs_order(nodes, edges):
+    return _bfs(nodes, _undirected(nodes, edges), by_degree=False)
+
+
+def rcm_order(nodes, edges):
+    order = _bfs(nodes, _undirected(nodes, edges), by_degree=True)
+    order.reverse()
+    return order
+
+
+ORDERINGS = {
+    "hilbert": hilbert_order,
+    "bfs": bfs_order,
+    "rcm": rcm_order,
+}
+
+
+# ----------------------------------
+# Applying an ordering
+# ----------------------------------
+def renumber(graph, method):
+    """
+    road_graph.json dict -> (renumbered graph, {old id: new id}).
+    Components and the feature index are carried over; "original_ids"
+    maps new -> old.
+    """
+    return apply_order(graph, ORDERINGS[method](graph["nodes"], graph["edges"]))
+
+
+def apply_order(graph, order):
+    """Renumber so that order[i] (an old id) becomes node "i"."""
+    nodes = graph["nodes"]
+    edges = graph["edges"]
+
+    new_id = {old: str(i) for i, old in enumerate(order)}
+
+    new_nodes = {new_id[old]: nodes[old] for old in order}
+    new_edges = {}
+    for old in order:
+        out = [dict(edge, to=new_id[edge["to"]]) for edge in edges.get(old, [])]
+        out.sort(key=lambda edge: int(edge["to"]))
+        new_edges[new_id[old]] = out
+
+    # Chain with an earlier renumbering so ids always map to the builder's
+    previous = graph.get("original_ids")
+    original = [previous[int(old)] if previous else old for old in order]
+
+    result = {"nodes": new_nodes, "edges": new_edges}
+    if "components" in graph:
+        stored = graph["components"]
+        result["components"] = dict(
+            stored,
+            component={new_id[old]: c for old, c in stored["component"].items()}
+        )
+    if "features" in graph:
+        result["features"] = {
+            key: dict(feature, nodes=[new_id[old] for old in feature["nodes"]])
+            for key, feature in graph["features"].items()
+        }
+    result["original_ids"] = original
+    return result, new_id
+
+
+def renumber_places(places, new_id):
+    """Rewrite each place's node_id after renumber()."""
+    return [dict(place, node_id=new_id[place["node_id"]]) for place in places]
+
+
+def edge_spread(graph):
+    """Mean and max |u - v| over the edges (lower is more cache-friendly)."""
+    spans = [
+        abs(int(nid) - int(edge["to"]))
+        for nid, out in graph["edges"].items()
+        for edge in out
+    ]
+    return (sum(spans) / len(spans), max(spans)) if spans else (0.0, 0)
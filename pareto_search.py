@@ -0,0 +1,178 @@
+"""
+Multi-criteria (Pareto) routing over the CompactGraph.
+
+Every edge carries a cost vector instead of a single weight:
+
+    time         cost * ROAD_TYPE_FACTOR[road_type] + INTERSECTION_PENALTY
+                 (the weight ucs / a_star minimize)
+    distance     straight-line length of the edge in km
+    avoid        base ``cost`` minutes spent on the road classes to avoid
+                 (residential by default)
+
+The label-setting search keeps, per node, a bag of labels none of which
+dominates another, and returns every non-dominated route to the goal.
+Two knobs bound the work on large graphs:
+
+- epsilon:    a new label is dropped if an existing one is within a
+              factor (1 + epsilon) of it on every criterion.
+- max_labels: a node never holds more than this many labels; once its
+              bag is full, new labels are dropped unless they dominate
+              one already in it.
+"""
+import heapq
+import time
+
+import numpy as np
+
+from compact_graph import DEFAULT_PROFILE, ROAD_CLASSES
+from data_context import get_context
+
+CRITERIA = ("time", "distance", "avoid")
+DEFAULT_AVOID = ("residential",)
+DEFAULT_EPSILON = 0.01
+DEFAULT_MAX_LABELS = 16
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def edge_lengths(graph):
+    """Haversine length (km) of every edge, vectorized."""
+    sources = np.repeat(np.arange(graph.num_nodes), np.diff(graph.indptr))
+    lat1 = np.radians(graph.lat[sources])
+    lat2 = np.radians(graph.lat[graph.indices])
+    dlat = lat2 - lat1
+    dlng = np.radians(graph.lng[graph.indices] - graph.lng[sources])
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def criteria_costs(graph, avoid=DEFAULT_AVOID, profile=DEFAULT_PROFILE):
+    """float64[m, 3] cost vector per edge, columns as in CRITERIA."""
+    avoided = [ROAD_CLASSES.index(rt) for rt in avoid]
+    on_avoided = np.isin(graph.road_class, avoided)
+    return np.stack([
+        graph.weights(profile),
+        edge_lengths(graph),
+        np.where(on_avoided, graph.cost, 0.0),
+    ], axis=1)
+
+
+def _dominates(a, b, factor=1.0):
+    """a (epsilon-)dominates b: a_i <= factor * b_i on every criterion."""
+    return all(x <= factor * y for x, y in zip(a, b))
+
+
+def pareto_search(start_node, goal_node, ctx=None, epsilon=DEFAULT_EPSILON,
+                  max_labels=DEFAULT_MAX_LABELS, avoid=DEFAULT_AVOID, stats=None):
+    """
+    Pareto front of routes from start_node to goal_node, sorted by time.
+    Each route is {"path": [node ids], "time", "distance", "avoid"}.
+    Pass a dict as ``stats`` to get label counts and the runtime.
+    """
+    t0 = time.perf_counter()
+    ctx = ctx or get_context()
+
+    counters = {
+        "labels_created": 0,
+        "labels_settled": 0,
+        "pruned_epsilon": 0,    # dominated by a label at the node or the goal
+        "pruned_cap": 0,        # node bag full
+        "removed_dominated": 0, # evicted by a better label arriving later
+        "max_bag": 0,
+    }
+
+    front = []
+    if ctx.components.reachable(start_node, goal_node):
+        front = _label_setting(ctx.compact, start_node, goal_node, epsilon,
+                               max_labels, avoid, counters)
+
+    if stats is not None:
+        stats.update(counters)
+        stats["front_size"] = len(front)
+        stats["runtime_ms"] = (time.perf_counter() - t0) * 1000
+    return front
+
+
+def _label_setting(graph, start_node, goal_node, epsilon, max_labels, avoid, counters):
+    costs = criteria_costs(graph, avoid).tolist()
+    indptr = graph.indptr.tolist()
+    indices = graph.indices.tolist()
+
+    source = graph.index_of[start_node]
+    target = graph.index_of[goal_node]
+    factor = 1.0 + epsilon
+
+    # Label i: cost vector, node, parent label; alive[i] False once evicted
+    label_cost = [(0.0, 0.0, 0.0)]
+    label_node = [source]
+    label_parent = [-1]
+    alive = [True]
+    bags = {source: [0]}
+    counters["labels_created"] = 1
+
+    # Lexicographic order: a popped label can't be dominated by a later one
+    heap = [((0.0, 0.0, 0.0), 0)]
+    while heap:
+        cost, label = heapq.heappop(heap)
+        if not alive[label]:
+            continue
+        counters["labels_settled"] += 1
+
+        u = label_node[label]
+        if u == target:
+            continue
+
+        for e in range(indptr[u], indptr[u + 1]):
+            v = indices[e]
+            w = costs[e]
+            new = (cost[0] + w[0], cost[1] + w[1], cost[2] + w[2])
+
+            # Target pruning: no use extending what a goal label already beats
+            if any(_dominates(label_cost[g], new, factor) for g in bags.get(target, ())):
+                counters["pruned_epsilon"] += 1
+                continue
+
+            bag = bags.setdefault(v, [])
+            if any(_dominates(label_cost[o], new, factor) for o in bag):
+                counters["pruned_epsilon"] += 1
+                continue
+
+            survivors = []
+            for o in bag:
+                if _dominates(new, label_cost[o]):
+                    alive[o] = False
+                    counters["removed_dominated"] += 1
+                else:
+                    survivors.append(o)
+            bags[v] = survivors
+
+            if len(survivors) >= max_labels:
+                counters["pruned_cap"] += 1
+                continue
+
+            new_label = len(label_cost)
+            label_cost.append(new)
+            label_node.append(v)
+            label_parent.append(label)
+            alive.append(True)
+            survivors.append(new_label)
+            counters["labels_created"] += 1
+            counters["max_bag"] = max(counters["max_bag"], len(survivors))
+            heapq.heappush(heap, (new, new_label))
+
+    front = []
+    for label in bags.get(target, []):
+        if not alive[label]:
+            continue
+        path = []
+        i = label
+        while i != -1:
+            path.append(graph.node_id(label_node[i]))
+            i = label_parent[i]
+        path.reverse()
+        route = dict(zip(CRITERIA, label_cost[label]))
+        route["path"] = path
+        front.append(route)
+
+    front.sort(key=lambda r: (r["time"], r["distance"], r["avoid"]))
+    return front
@@ -0,0 +1,164 @@
+import re
+import unicodedata
+
+# ----------------------------------
+# Name normalization
+# ----------------------------------
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name(name):
+    """Lower-case, strip accents and collapse punctuation to single spaces."""
+    if not name:
+        return ""
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(ch for ch in name if not unicodedata.combining(ch))
+    return _NON_WORD.sub(" ", name.lower()).strip()
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# ----------------------------------
+# Prefix trie
+# ----------------------------------
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children = {}
+        self.ids = []
+
+
+class PlaceIndex:
+    """
+    Lookup structure over the snapped places, built once at startup.
+
+    - exact: normalized name -> place ids (first entry wins, as before)
+    - trie:  every word start of every name, so "hosp" finds
+             "Jackson Memorial Hospital"; each trie node keeps the ids
+             below it, so a prefix lookup costs O(len(query))
+    - grams: trigram -> place ids, used for fuzzy matching on typos
+    """
+
+    def __init__(self, places):
+        self.places = list(places)
+        self.exact = {}
+        self.by_type = {}
+        self.grams = {}
+        self._gram_count = {}
+        self._root = _TrieNode()
+
+        for pid, place in enumerate(self.places):
+            key = normalize_name(place.get("name"))
+            if not key:
+                continue
+
+            self.exact.setdefault(key, []).append(pid)
+            self.by_type.setdefault(place.get("type", "unknown"), set()).add(pid)
+
+            words = key.split(" ")
+            for i in range(len(words)):
+                self._insert(" ".join(words[i:]), pid)
+
+            key_grams = trigrams(key)
+            self._gram_count[pid] = len(key_grams)
+            for gram in key_grams:
+                self.grams.setdefault(gram, []).append(pid)
+
+    def _insert(self, key, pid):
+        node = self._root
+        for ch in key:
+            node = node.children.setdefault(ch, _TrieNode())
+            # A name can reach the same trie node through two word starts
+            if not node.ids or node.ids[-1] != pid:
+                node.ids.append(pid)
+
+    # ----------------------------------
+    # Queries
+    # ----------------------------------
+    def get(self, name, place_type=None):
+        """Exact (normalized) lookup. Returns the place dict or None."""
+        for pid in self.exact.get(normalize_name(name), ()):
+            if place_type is None or self.places[pid].get("type") == place_type:
+                return self.places[pid]
+        return None
+
+    def node_id(self, name, place_type=None):
+        place = self.get(name, place_type)
+        return place["node_id"] if place else None
+
+    def prefix(self, query, place_type=None, limit=10):
+        node = self._root
+        for ch in normalize_name(query):
+            node = node.children.get(ch)
+            if node is None:
+                return []
+
+        allowed = self.by_type.get(place_type, set()) if place_type else None
+        results = []
+        seen_names = set()
+        for pid in node.ids:
+            if allowed is not None and pid not in allowed:
+                continue
+            name = self.places[pid]["name"]
+            if name in seen_names:
+                continue
+            seen_names.add(name)
+            results.append(self.places[pid])
+            if len(results) >= limit:
+                break
+        return results
+
+    def fuzzy(self, query, place_type=None, limit=10, min_score=0.3):
+        key = normalize_name(query)
+        if not key:
+            return []
+
+        query_grams = trigrams(key)
+        allowed = self.by_type.get(place_type, set()) if place_type else None
+
+        shared = {}
+        for gram in query_grams:
+            for pid in self.grams.get(gram, ()):
+                if allowed is None or pid in allowed:
+                    shared[pid] = shared.get(pid, 0) + 1
+
+        scored = []
+        for pid, count in shared.items():
+            # Jaccard similarity of the two trigram sets
+            score = count / (len(query_grams) + self._gram_count[pid] - count)
+            if score >= min_score:
+                scored.append((score, pid))
+
+        scored.sort(key=lambda x: (-x[0], x[1]))
+
+        results = []
+        seen_names = set()
+        for score, pid in scored:
+            name = self.places[pid]["name"]
+            if name in seen_names:
+                continue
+            seen_names.add(name)
+            results.append(self.places[pid])
+            if len(results) >= limit:
+                break
+        return results
+
+    def search(self, query, place_type=None, limit=10):
+        """Prefix matches first, topped up with fuzzy matches for typos."""
+        results = self.prefix(query, place_type, limit)
+        if len(results) < limit:
+            names = {p["name"] for p in results}
+            for place in self.fuzzy(query, place_type, limit):
+                if place["name"] not in names:
+                    names.add(place["name"])
+                    results.append(place)
+                    if len(results) >= limit:
+                        break
+        return results
+
+    def types(self):
+        return sorted(self.by_type)
@@ -0,0 +1,173 @@
+"""
+Per-query profiling: cProfile + tracemalloc around one route request.
+
+    with QueryProfile() as prof:
+        run the searches
+    files = prof.save(PROFILE_DIR, "astar-home-work")
+    summary = prof.summary()
+
+save() writes
+    <label>.pstats      cProfile stats (snakeviz, `python -m pstats`)
+    <label>.collapsed   "caller;callee;... microseconds" lines for
+                        flamegraph.pl / speedscope / inferno
+    <label>.alloc.txt   tracemalloc top allocation sites
+
+cProfile only records caller -> callee edges, not whole stacks, so the
+collapsed stacks are rebuilt from the call graph by splitting each
+function's time across its callers in proportion to the edge times (the
+same approximation flameprof and friends use).
+"""
+import cProfile
+import os
+import pstats
+import re
+import time
+import tracemalloc
+from pathlib import Path
+
+PROFILE_DIR = Path(os.environ.get("CITY_PROFILE_DIR") or Path(__file__).resolve().parent / "profiles")
+TOP_FUNCTIONS = 10
+TOP_ALLOCATIONS = 10
+MAX_STACK_DEPTH = 64
+
+
+class QueryProfile:
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.profiler = cProfile.Profile()
+        self.snapshot = None
+        self.peak_bytes = None
+        self.wall_ms = None
+
+    def __enter__(self):
+        if self.memory:
+            tracemalloc.start()
+        self._t0 = time.perf_counter()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.disable()
+        self.wall_ms = (time.perf_counter() - self._t0) * 1000
+        if self.memory:
+            self.snapshot = tracemalloc.take_snapshot()
+            self.peak_bytes = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        return False
+
+    @property
+    def stats(self):
+        return pstats.Stats(self.profiler)
+
+    # ----------------------------------
+    # Summaries
+    # ----------------------------------
+    def hot_functions(self, limit=TOP_FUNCTIONS):
+        rows = [
+            {
+                "function": _label(func),
+                "calls": nc,
+                "self_ms": round(tt * 1000, 3),
+                "cumulative_ms": round(ct * 1000, 3),
+            }
+            for func, (cc, nc, tt, ct, callers) in self.stats.stats.items()
+        ]
+        rows.sort(key=lambda r: r["self_ms"], reverse=True)
+        return rows[:limit]
+
+    def top_allocations(self, limit=TOP_ALLOCATIONS):
+        if self.snapshot is None:
+            return []
+        snapshot = self.snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+        return [
+            {
+                "where": f"{_short_path(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+                "kb": round(stat.size / 1024, 1),
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics("lineno")[:limit]
+        ]
+
+    def summary(self, limit=TOP_FUNCTIONS):
+        return {
+            "wall_ms": round(self.wall_ms, 3),
+            "peak_kb": round(self.peak_bytes / 1024, 1) if self.peak_bytes is not None else None,
+            "hot_functions": self.hot_functions(limit),
+            "top_allocations": self.top_allocations(limit),
+        }
+
+    # ----------------------------------
+    # Files
+    # ----------------------------------
+    def save(self, directory, label):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        base = directory / _safe_name(label)
+
+        files = {"pstats": str(base) + ".pstats", "collapsed": str(base) + ".collapsed"}
+        self.stats.dump_stats(files["pstats"])
+        with open(files["collapsed"], "w", encoding="utf-8") as f:
+            for stack, micros in collapsed_stacks(self.stats):
+                f.write(f"{stack} {micros}\n")
+
+        if self.snapshot is not None:
+            files["allocations"] = str(base) + ".alloc.txt"
+            with open(files["allocations"], "w", encoding="utf-8") as f:
+                f.write(f"peak traced memory: {self.peak_bytes / 1024:.1f} KB\n\n")
+                for row in self.top_allocations(limit=50):
+                    f.write(f"{row['kb']:>10.1f} KB {row['count']:>8}  {row['where']}\n")
+        return files
+
+
+def collapsed_stacks(stats):
+    """Yield ("root;...;func", self microseconds) from a pstats.Stats."""
+    entries = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    roots = [func for func, entry in entries.items() if not entry[4]]
+    out = {}
+
+    def walk(func, share, stack, on_stack):
+        tt = entries[func][2]
+        frame = stack + [_label(func)]
+        key = ";".join(frame)
+        out[key] = out.get(key, 0.0) + tt * share
+        if len(frame) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_ct in callees.get(func, ()):
+            callee_ct = entries[callee][3]
+            if callee in on_stack or edge_ct <= 0 or callee_ct <= 0:
+                continue
+            # This path owns ``share`` of func, so of the func -> callee edge too
+            walk(callee, share * min(edge_ct / callee_ct, 1.0), frame, on_stack | {callee})
+
+    for root in roots:
+        walk(root, 1.0, [], {root})
+
+    for stack, seconds in out.items():
+        micros = int(round(seconds * 1e6))
+        if micros > 0:
+            yield stack, micros
+
+
+def _label(func):
+    filename, lineno, name = func
+    if filename == "~":
+        return name.strip("<>")  # built-ins, e.g. "built-in method builtins.len"
+    return f"{name} ({_short_path(filename)}:{lineno})"
+
+
+def _short_path(filename):
+    root = str(Path(__file__).resolve().parent) + os.sep
+    return filename[len(root):] if filename.startswith(root) else os.path.basename(filename)
+
+
+def _safe_name(label):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", label).strip("_") or "query"
@@ -0,0 +1,155 @@
+"""
+Compact encodings for route geometry.
+
+- encode_polyline / decode_polyline: Google's encoded polyline format
+  (1e-5 degree precision, readable by Leaflet/Google Maps plugins).
+- encode_varint / decode_varint: quantized lat/lng deltas, zigzag +
+  LEB128 varints, base64url. About the same size as a polyline but
+  trivial to decode from a byte buffer in any language.
+- simplify: Douglas-Peucker with a tolerance in meters.
+
+Coordinates are [lat, lng] pairs throughout, like path_coords in app.py.
+"""
+import base64
+import math
+
+EARTH_RADIUS_M = 6371000.0
+
+
+# ----------------------------------
+# Google encoded polyline
+# ----------------------------------
+def _encode_value(value, out):
+    value = ~(value << 1) if value < 0 else value << 1
+    while value >= 0x20:
+        out.append(chr((0x20 | (value & 0x1f)) + 63))
+        value >>= 5
+    out.append(chr(value + 63))
+
+
+def encode_polyline(coords, precision=5):
+    factor = 10 ** precision
+    out = []
+    prev_lat = prev_lng = 0
+    for lat, lng in coords:
+        lat_i = round(lat * factor)
+        lng_i = round(lng * factor)
+        _encode_value(lat_i - prev_lat, out)
+        _encode_value(lng_i - prev_lng, out)
+        prev_lat, prev_lng = lat_i, lng_i
+    return "".join(out)
+
+
+def decode_polyline(text, precision=5):
+    factor = 10 ** precision
+    coords = []
+    index = lat = lng = 0
+    while index < len(text):
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                b = ord(text[index]) - 63
+                index += 1
+                result |= (b & 0x1f) << shift
+                shift += 5
+                if b < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        coords.append([lat / factor, lng / factor])
+    return coords
+
+
+# ----------------------------------
+# Delta + zigzag varint
+# ----------------------------------
+def encode_varint(coords, precision=5):
+    factor = 10 ** precision
+    out = bytearray()
+    prev_lat = prev_lng = 0
+    for lat, lng in coords:
+        lat_i = round(lat * factor)
+        lng_i = round(lng * factor)
+        for delta in (lat_i - prev_lat, lng_i - prev_lng):
+            value = delta << 1 if delta >= 0 else (~delta << 1) | 1  # zigzag
+            while value >= 0x80:
+                out.append((value & 0x7f) | 0x80)
+                value >>= 7
+            out.append(value)
+        prev_lat, prev_lng = lat_i, lng_i
+    return base64.urlsafe_b64encode(bytes(out)).decode("ascii").rstrip("=")
+
+
+def decode_varint(text, precision=5):
+    factor = 10 ** precision
+    data = base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if byte < 0x80:
+            values.append((value >> 1) ^ -(value & 1))
+            value = shift = 0
+
+    coords = []
+    lat = lng = 0
+    for i in range(0, len(values) - 1, 2):
+        lat += values[i]
+        lng += values[i + 1]
+        coords.append([lat / factor, lng / factor])
+    return coords
+
+
+ENCODERS = {
+    "polyline": encode_polyline,
+    "varint": encode_varint,
+}
+
+
+# ----------------------------------
+# Douglas-Peucker simplification
+# ----------------------------------
+def _to_xy(coords):
+    """Local equirectangular projection in meters (fine at city scale)."""
+    lat0 = math.radians(sum(lat for lat, _ in coords) / len(coords))
+    kx = math.cos(lat0) * math.pi / 180 * EARTH_RADIUS_M
+    ky = math.pi / 180 * EARTH_RADIUS_M
+    return [(lng * kx, lat * ky) for lat, lng in coords]
+
+
+def _segment_distance(p, a, b):
+    (px, py), (ax, ay), (bx, by) = p, a, b
+    dx, dy = bx - ax, by - ay
+    length2 = dx * dx + dy * dy
+    if length2 == 0:
+        return math.hypot(px - ax, py - ay)
+    t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length2))
+    return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def simplify(coords, tolerance_m):
+    """Drop points closer than ``tolerance_m`` to the simplified line."""
+    if tolerance_m <= 0 or len(coords) < 3:
+        return list(coords)
+
+    xy = _to_xy(coords)
+    keep = [False] * len(coords)
+    keep[0] = keep[-1] = True
+
+    stack = [(0, len(coords) - 1)]
+    while stack:
+        first, last = stack.pop()
+        worst, worst_i = 0.0, None
+        for i in range(first + 1, last):
+            d = _segment_distance(xy[i], xy[first], xy[last])
+            if d > worst:
+                worst, worst_i = d, i
+        if worst_i is not None and worst > tolerance_m:
+            keep[worst_i] = True
+            stack.append((first, worst_i))
+            stack.append((worst_i, last))
+
+    return [c for c, k in zip(coords, keep) if k]
@@ -0,0 +1,270 @@
+"""
+Route many origin/destination pairs without the interactive prompt.
+
+Reads pairs from CSV (header with start,goal and an optional id column)
+or JSONL ({"start": ..., "goal": ..., "id": ...}) on stdin or a file.
+start/goal may be node ids or place names. Each worker process loads the
+graph once (or attaches to CITY_SHARED_GRAPH), and results are streamed
+as one JSON line per pair with cost, expansions and milliseconds for
+every chosen algorithm. Throughput goes to stderr at the end.
+
+    python scripts/batch_routes.py pairs.csv -a astar bidir -o results.jsonl
+    cat pairs.jsonl | python scripts/batch_routes.py --unordered --jobs 8
+    python scripts/batch_routes.py pairs.csv -o results.jsonl --resume
+
+Pairs without an id are numbered by their position in the input, so
+--resume (skip ids already in --output, append the rest) needs the same
+input in the same order.
+"""
+import argparse
+import csv
+import itertools
+import json
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from anytime_search import ara_star, beam_greedy
+from data_context import DataContext, get_context, set_context
+from search_algorithms import a_star, bidirectional_ucs, greedy, ucs
+
+ALGORITHMS = {
+    "ucs": ucs,
+    "greedy": greedy,
+    "astar": a_star,
+    "bidir": bidirectional_ucs,
+    "ara": lambda s, g, ctx: ara_star(s, g, ctx)[:3],
+    "beam": lambda s, g, ctx: beam_greedy(s, g, ctx)[:3],
+}
+
+CHUNK_SIZE = 16         # pairs per task (amortizes pickling)
+IN_FLIGHT_PER_JOB = 4   # chunks queued per worker; bounds memory on huge inputs
+
+
+# ----------------------------------
+# Input
+# ----------------------------------
+def read_pairs(stream, fmt):
+    """Yield {"id", "start", "goal"} dicts from CSV or JSONL."""
+    if fmt == "auto":
+        first = stream.readline()
+        fmt = "jsonl" if first.lstrip().startswith("{") else "csv"
+        stream = itertools.chain([first], stream)
+
+    if fmt == "jsonl":
+        rows = (json.loads(line) for line in stream if line.strip())
+    else:
+        rows = csv.DictReader(stream)
+
+    for i, row in enumerate(rows):
+        start = row.get("start", row.get("origin"))
+        goal = row.get("goal", row.get("destination"))
+        if start is None or goal is None:
+            raise ValueError(f"pair {i}: needs start and goal (or origin and destination)")
+        yield {"id": str(row.get("id") or i), "start": str(start).strip(), "goal": str(goal).strip()}
+
+
+def _format_of(path, fmt):
+    if fmt != "auto" or path == "-":
+        return fmt
+    return "jsonl" if Path(path).suffix in (".jsonl", ".ndjson") else "csv"
+
+
+# ----------------------------------
+# Resume
+# ----------------------------------
+def completed_ids(path):
+    """
+    Ids already in an output file. A half-written last line (interrupted
+    run) is cut off so appending starts on a clean line.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+    for line in data[:end].decode("utf-8").splitlines():
+        if line.strip():
+            done.add(json.loads(line)["id"])
+    return done
+
+
+# ----------------------------------
+# Workers
+# ----------------------------------
+def init_worker(data_dir):
+    """Runs once per process: load (or attach to) the graph and indexes."""
+    if data_dir:
+        set_context(DataContext(data_dir=data_dir))
+    get_context().warm_up()
+
+
+def resolve(ctx, value):
+    """Node id, else place name (None when neither matches)."""
+    if value in ctx.nodes:
+        return value
+    return ctx.place_index.node_id(value)
+
+
+def route_chunk(pairs, algorithms, include_path=False):
+    ctx = get_context()
+    out = []
+    for pair in pairs:
+        record = dict(pair, start_node=resolve(ctx, pair["start"]),
+                      goal_node=resolve(ctx, pair["goal"]))
+        if record["start_node"] is None or record["goal_node"] is None:
+            missing = pair["start"] if record["start_node"] is None else pair["goal"]
+            out.append(dict(record, error=f"unknown place or node: {missing}"))
+            continue
+
+        results = {}
+        for key in algorithms:
+            t0 = time.perf_counter()
+            path, cost, expanded = ALGORITHMS[key](record["start_node"], record["goal_node"], ctx)
+            result = {
+                "cost": round(cost, 4) if math.isfinite(cost) else None,
+                "expanded": expanded,
+                "ms": round((time.perf_counter() - t0) * 1000, 3),
+                "path_nodes": len(path) if path else 0,
+            }
+            if include_path:
+                result["path"] = path
+            results[key] = result
+        out.append(dict(record, results=results))
+    return out
+
+
+class InlineExecutor:
+    """Stand-in for ProcessPoolExecutor with --jobs 1 (easier to debug)."""
+
+    def __init__(self, data_dir):
+        init_worker(data_dir)
+
+    def submit(self, func, *args):
+        future = Future()
+        future.set_result(func(*args))
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def stream_results(executor, chunks, args, ordered, window):
+    """
+    Yield finished chunks, keeping at most ``window`` in flight. Ordered
+    mode waits for the oldest chunk; unordered yields whichever is done.
+    """
+    pending = deque()
+    chunks = iter(chunks)
+    exhausted = False
+    while True:
+        while not exhausted and len(pending) < window:
+            chunk = next(chunks, None)
+            if chunk is None:
+                exhausted = True
+            else:
+                pending.append(executor.submit(route_chunk, chunk, *args))
+        if not pending:
+            return
+
+        if ordered:
+            yield pending.popleft().result()
+        else:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+                yield future.result()
+
+
+def chunked(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ----------------------------------
+# CLI
+# ----------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Batch route origin/destination pairs")
+    parser.add_argument("input", nargs="?", default="-", help="CSV or JSONL file (default stdin)")
+    parser.add_argument("--format", choices=["auto", "csv", "jsonl"], default="auto")
+    parser.add_argument("-a", "--algorithms", nargs="+", choices=list(ALGORITHMS),
+                        default=["ucs", "greedy", "astar", "bidir"])
+    parser.add_argument("-o", "--output", help="JSONL output file (default stdout)")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip pairs whose id is already in --output and append")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--unordered", action="store_true",
+                        help="write results as they finish instead of in input order")
+    parser.add_argument("--include-path", action="store_true", help="add the node list")
+    parser.add_argument("--data-dir", help="graph/places directory (default CITY_DATA_DIR or data/processed)")
+    args = parser.parse_args()
+
+    if args.resume and not args.output:
+        parser.error("--resume needs --output")
+
+    done = completed_ids(args.output) if args.resume else set()
+    if args.output:
+        out = open(args.output, "a" if args.resume else "w", encoding="utf-8")
+    else:
+        out = sys.stdout
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8", newline="")
+    fmt = _format_of(args.input, args.format)
+    pairs = (p for p in read_pairs(source, fmt) if p["id"] not in done)
+
+    if args.jobs > 1:
+        executor = ProcessPoolExecutor(max_workers=args.jobs, initializer=init_worker,
+                                       initargs=(args.data_dir,))
+    else:
+        executor = InlineExecutor(args.data_dir)
+
+    count = errors = 0
+    t0 = time.perf_counter()
+    try:
+        with executor:
+            task_args = (args.algorithms, args.include_path)
+            window = max(1, args.jobs) * IN_FLIGHT_PER_JOB
+            for records in stream_results(executor, chunked(pairs, args.chunk_size), task_args,
+                                          not args.unordered, window):
+                for record in records:
+                    out.write(json.dumps(record) + "\n")
+                    errors += "error" in record
+                count += len(records)
+                out.flush()  # a finished chunk survives an interruption
+    except KeyboardInterrupt:
+        print(f"\ninterrupted after {count} pairs; rerun with --resume to continue",
+              file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if source is not sys.stdin:
+            source.close()
+
+    seconds = time.perf_counter() - t0
+    skipped = f", {len(done)} already done" if done else ""
+    print(f"✅ {count} pairs ({errors} unresolved{skipped}) in {seconds:.2f}s: "
+          f"{count / seconds if seconds else 0:.1f} queries/s with {args.jobs} worker(s)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
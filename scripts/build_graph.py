@@ -1,5 +1,18 @@
+import hashlib
 import json
 import math
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from data_context import DEFAULT_DATA_DIR, GRAPH_FILE, RAW_DATA_DIR
+from graph_components import ComponentIndex
+from node_order import renumber
+
+ROADS_FILE = RAW_DATA_DIR / "osm_roads.geojson"
+OUTPUT_FILE = DEFAULT_DATA_DIR / GRAPH_FILE
 
 ALLOWED_HIGHWAYS = {
     "motorway", "motorway_link",
@@ -16,15 +29,6 @@ SPEEDS = {
     "residential": 30
 }
 
-with open("data/raw/osm_roads.geojson", "r", encoding="utf-8") as f:
-    geo = json.load(f)
-
-nodes = {}
-edges = {}
-coord_to_id = {}
-node_id = 0
-
-import math
 
 def haversine(lat1, lon1, lat2, lon2):
     R = 6371.0  # Earth radius in km
@@ -43,23 +47,6 @@ def haversine(lat1, lon1, lat2, lon2):
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
     return R * c
 
-def get_node_id(coord):
-    global node_id
-
-    if coord not in coord_to_id:
-        coord_to_id[coord] = str(node_id)
-
-        lon, lat = coord
-        nodes[str(node_id)] = {
-            "lat": lat,
-            "lng": lon
-        }
-        edges[str(node_id)] = []
-
-        node_id += 1
-
-    return coord_to_id[coord]
-
 
 def parse_oneway(props):
     tags = props.get("other_tags")
@@ -78,35 +65,58 @@ def parse_oneway(props):
     return None
 
 
+# ----------------------------------
+# Features
+# ----------------------------------
+def feature_key(feature):
+    """The osm_id, or the geometry hash for a feature without one."""
+    osm_id = feature["properties"].get("osm_id")
+    return str(osm_id) if osm_id is not None else "geom:" + feature_hash(feature)
 
-for feature in geo["features"]:
-    props = feature["properties"]
-    geom = feature["geometry"]
 
-    highway = props.get("highway")
-    if highway not in ALLOWED_HIGHWAYS:
-        continue
+def feature_hash(feature):
+    """Hash of everything that shapes the feature's edges."""
+    props = feature["properties"]
+    payload = [
+        props.get("highway"), props.get("name"), parse_oneway(props),
+        feature["geometry"]["coordinates"]
+    ]
+    return hashlib.sha1(json.dumps(payload).encode("utf-8")).hexdigest()[:16]
+
+
+def road_features(geo):
+    """osm_id -> feature, for the highway types the graph keeps."""
+    return {
+        feature_key(feature): feature
+        for feature in geo["features"]
+        if feature["properties"].get("highway") in ALLOWED_HIGHWAYS
+    }
+
+
+def add_feature(feature, get_node_id, edges):
+    """
+    Add one road's edges. Returns the node ids along it and the
+    (source, edge) pairs that were added.
+    """
+    props = feature["properties"]
+    coords = feature["geometry"]["coordinates"]
+    highway = props["highway"]
 
-    coords = geom["coordinates"]
     oneway = parse_oneway(props)
-
     oneway_forward = oneway == "yes"
     oneway_backward = oneway == "-1"
-    two_way = not oneway_forward and not oneway_backward
 
     speed = SPEEDS[highway]
     name = props.get("name")
     osm_id = props.get("osm_id")
 
-    for i in range(len(coords) - 1):
-        a = coords[i]       # [lon, lat]
-        b = coords[i + 1]   # [lon, lat]
-
-        lon1, lat1 = a
-        lon2, lat2 = b
+    node_ids = [get_node_id((lon, lat)) for lon, lat in coords]
+    added = []
 
-        ida = get_node_id((lon1, lat1))
-        idb = get_node_id((lon2, lat2))
+    for i in range(len(coords) - 1):
+        lon1, lat1 = coords[i]       # [lon, lat]
+        lon2, lat2 = coords[i + 1]   # [lon, lat]
+        ida, idb = node_ids[i], node_ids[i + 1]
 
         dist = haversine(lat1, lon1, lat2, lon2)  # km
         cost = (dist / speed) * 60                # minutes
@@ -128,17 +138,82 @@ for feature in geo["features"]:
         }
 
         if oneway_forward:
-            edges[ida].append(edge_ab)
+            added.append((ida, edge_ab))
 
         elif oneway_backward:
-            edges[idb].append(edge_ba)
+            added.append((idb, edge_ba))
 
         else:
-            edges[ida].append(edge_ab)
-            edges[idb].append(edge_ba)
+            added.append((ida, edge_ab))
+            added.append((idb, edge_ba))
+
+    for source, edge in added:
+        edges[source].append(edge)
+    return node_ids, added
+
+
+def build_graph(geo, order=None):
+    """
+    GeoJSON road features -> {"nodes", "edges", "components", "features"}.
+    "features" maps each osm_id to its hash and node ids, which is what
+    update_graph.py diffs against. ``order`` ("hilbert", "bfs", "rcm")
+    renumbers the nodes afterwards for locality, adding an
+    "original_ids" table (see node_order.py).
+    """
+    nodes = {}
+    edges = {}
+    coord_to_id = {}
+    features = {}
+
+    def get_node_id(coord):
+        if coord not in coord_to_id:
+            new_id = str(len(coord_to_id))
+            coord_to_id[coord] = new_id
+
+            lon, lat = coord
+            nodes[new_id] = {
+                "lat": lat,
+                "lng": lon
+            }
+            edges[new_id] = []
+
+        return coord_to_id[coord]
+
+    for key, feature in road_features(geo).items():
+        node_ids, _ = add_feature(feature, get_node_id, edges)
+        features[key] = {"hash": feature_hash(feature), "nodes": node_ids}
+
+    # -------------------------
+    # Strongly connected components
+    # -------------------------
+    components = ComponentIndex.build(edges, nodes)
+
+    graph = {"nodes": nodes, "edges": edges, "components": components.to_json(),
+             "features": features}
+
+    # -------------------------
+    # Optional locality renumbering
+    # -------------------------
+    if order:
+        graph, _ = renumber(graph, order)
+
+    return graph
+
+
+def main(input_file=ROADS_FILE, output_file=OUTPUT_FILE, order=None):
+    with open(input_file, "r", encoding="utf-8") as f:
+        geo = json.load(f)
+
+    graph = build_graph(geo, order)
+
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(graph, f, indent=2)
 
+    components = ComponentIndex.from_json(graph["components"])
+    print(f"✅ Clean road graph created: {output_file}" + (f" ({order} order)" if order else ""))
+    print(f"   {len(components.reach)} strongly connected components, "
+          f"largest has {components.sizes[components.largest]} of {len(graph['nodes'])} nodes")
 
-with open("graph.json", "w", encoding="utf-8") as f:
-    json.dump({"nodes": nodes, "edges": edges}, f, indent=2)
 
-print("✅ Clean road graph created")
+if __name__ == "__main__":
+    main()
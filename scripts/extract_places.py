@@ -1,45 +1,64 @@
 import json
+import sys
+from pathlib import Path
 
-INPUT_FILE = "points.geojson"
-OUTPUT_FILE = "places.json"
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
 
-places = []
+from data_context import DEFAULT_DATA_DIR, RAW_DATA_DIR
 
-with open(INPUT_FILE, "r", encoding="utf-8") as f:
-    geo = json.load(f)
+INPUT_FILE = RAW_DATA_DIR / "osm_points.geojson"
+OUTPUT_FILE = DEFAULT_DATA_DIR / "places.json"
 
-for feature in geo["features"]:
-    props = feature.get("properties", {})
-    geom = feature.get("geometry", {})
 
-    if geom.get("type") != "Point":
-        continue
+def extract_places(geo):
+    places = []
 
-    coords = geom.get("coordinates")
-    if not coords:
-        continue
+    for feature in geo["features"]:
+        props = feature.get("properties", {})
+        geom = feature.get("geometry", {})
 
-    lon, lat = coords
-    name = props.get("name")
+        if geom.get("type") != "Point":
+            continue
 
-    # Skip unnamed points (unless it's a city)
-    if not name and props.get("place") != "city":
-        continue
+        coords = geom.get("coordinates")
+        if not coords:
+            continue
 
-    place = {
-        "id": props.get("osm_id"),
-        "name": name,
-        "type": props.get("place")
-                or props.get("amenity")
-                or props.get("highway")
-                or "unknown",
-        "lat": lat,
-        "lon": lon
-    }
+        lon, lat = coords
+        name = props.get("name")
 
-    places.append(place)
+        # Skip unnamed points (unless it's a city)
+        if not name and props.get("place") != "city":
+            continue
 
-with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-    json.dump({"places": places}, f, indent=2)
+        place = {
+            "id": props.get("osm_id"),
+            "name": name,
+            "type": props.get("place")
+                    or props.get("amenity")
+                    or props.get("highway")
+                    or "unknown",
+            "lat": lat,
+            "lon": lon
+        }
 
-print(f"✅ Saved {len(places)} places to {OUTPUT_FILE}")
+        places.append(place)
+
+    return places
+
+
+def main(input_file=INPUT_FILE, output_file=OUTPUT_FILE):
+    with open(input_file, "r", encoding="utf-8") as f:
+        geo = json.load(f)
+
+    places = extract_places(geo)
+
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump({"places": places}, f, indent=2)
+
+    print(f"✅ Saved {len(places)} places to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Synthetic city generator for scaling and stress tests.
+
+Writes road_graph.json and places_with_nodes.json in exactly the schema
+the pipeline produces, so any DataContext(data_dir=...) can load them:
+
+- grid:   perturbed Manhattan grid; arterials every few streets, some
+          streets one-way (alternating direction), a few blocks missing
+- radial: rings around a centre joined by spokes (primary roads)
+- --motorways adds motorways on top of either city, joined to the street
+  network through motorway_link ramps every few blocks
+
+    python scripts/generate_city.py --kind grid --nodes 100000 --out-dir /tmp/city100k
+    python scripts/generate_city.py --kind radial --nodes 20000 --motorways --seed 7 --out-dir /tmp/radial
+"""
+import argparse
+import json
+import math
+import random
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(SCRIPTS))
+
+from build_graph import SPEEDS, haversine
+from data_context import GRAPH_FILE, PLACES_FILE
+from graph_components import ComponentIndex
+
+CENTER = (25.774, -80.193)      # lat, lng (Miami, like the real data)
+BLOCK_DEG = 0.001               # ~110 m between intersections
+PLACE_TYPES = ("bus_stop", "school", "hospital", "unknown")
+
+
+class CityBuilder:
+    """Accumulates nodes/edges in the road_graph.json schema."""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.nodes = {}
+        self.edges = {}
+        self.next_osm_id = 1
+
+    def add_node(self, lat, lng):
+        nid = str(len(self.nodes))
+        self.nodes[nid] = {"lat": lat, "lng": lng}
+        self.edges[nid] = []
+        return nid
+
+    def add_road(self, a, b, road_type, name=None, oneway=False, osm_id=None):
+        """One segment; oneway roads only get the a -> b edge."""
+        na, nb = self.nodes[a], self.nodes[b]
+        dist = haversine(na["lat"], na["lng"], nb["lat"], nb["lng"])
+        cost = (dist / SPEEDS[road_type]) * 60  # minutes, as in build_graph.py
+
+        osm_id = osm_id or self.new_osm_id()
+        edge = {"to": b, "cost": cost, "road_type": road_type, "name": name, "osm_id": osm_id}
+        self.edges[a].append(edge)
+        if not oneway:
+            self.edges[b].append(dict(edge, to=a))
+
+    def new_osm_id(self):
+        osm_id = str(self.next_osm_id)
+        self.next_osm_id += 1
+        return osm_id
+
+    def jitter(self, amount):
+        return self.rng.uniform(-amount, amount) * BLOCK_DEG
+
+
+# ----------------------------------
+# Street classes
+# ----------------------------------
+def street_class(i):
+    if i % 12 == 0:
+        return "primary"
+    if i % 6 == 0:
+        return "secondary"
+    if i % 3 == 0:
+        return "tertiary"
+    return "residential"
+
+
+# ----------------------------------
+# City shapes
+# ----------------------------------
+def grid_city(city, num_nodes, oneway_share=0.25, missing_share=0.03):
+    side = max(2, int(math.sqrt(num_nodes)))
+    rng = city.rng
+    lat0 = CENTER[0] - side / 2 * BLOCK_DEG
+    lng0 = CENTER[1] - side / 2 * BLOCK_DEG
+
+    ids = [[city.add_node(lat0 + r * BLOCK_DEG + city.jitter(0.15),
+                          lng0 + c * BLOCK_DEG + city.jitter(0.15))
+            for c in range(side)] for r in range(side)]
+
+    def streets(count, segment):
+        for i in range(count):
+            road_type = street_class(i)
+            # Residential/tertiary streets may be one-way, alternating direction
+            oneway = road_type in ("residential", "tertiary") and rng.random() < oneway_share
+            forward = i % 2 == 0
+            osm_id = city.new_osm_id()
+            for j in range(side - 1):
+                if road_type == "residential" and rng.random() < missing_share:
+                    continue
+                a, b = segment(i, j)
+                if oneway and not forward:
+                    a, b = b, a
+                city.add_road(a, b, road_type, f"{road_type.title()} {i}", oneway, osm_id)
+
+    # East-west streets, then north-south avenues
+    streets(side, lambda i, j: (ids[i][j], ids[i][j + 1]))
+    streets(side, lambda i, j: (ids[j][i], ids[j + 1][i]))
+    return side
+
+
+def radial_city(city, num_nodes):
+    spokes = max(8, int(round(math.sqrt(num_nodes))))
+    rings = max(1, (num_nodes - 1) // spokes)
+
+    centre = city.add_node(*CENTER)
+    ring_ids = []
+    for r in range(1, rings + 1):
+        radius = r * BLOCK_DEG
+        ring = []
+        for s in range(spokes):
+            angle = 2 * math.pi * s / spokes + city.jitter(0.02)
+            ring.append(city.add_node(CENTER[0] + radius * math.sin(angle) + city.jitter(0.1),
+                                      CENTER[1] + radius * math.cos(angle) + city.jitter(0.1)))
+        ring_ids.append(ring)
+
+    for r, ring in enumerate(ring_ids):
+        road_type = street_class(r + 1)
+        osm_id = city.new_osm_id()
+        for s in range(spokes):
+            city.add_road(ring[s], ring[(s + 1) % spokes], road_type, f"Ring {r + 1}", osm_id=osm_id)
+
+    for s in range(spokes):
+        road_type = "primary" if s % 4 == 0 else "secondary"
+        osm_id = city.new_osm_id()
+        prev = centre
+        for ring in ring_ids:
+            city.add_road(prev, ring[s], road_type, f"Spoke {s}", osm_id=osm_id)
+            prev = ring[s]
+    return ring_ids
+
+
+def add_motorways(city, lines, exit_every=8):
+    """
+    ``lines`` are lists of street node ids. Each gets a parallel motorway
+    (its own nodes, offset a little) with ramps every ``exit_every`` nodes.
+    """
+    for k, line in enumerate(lines):
+        osm_id = city.new_osm_id()
+        prev = None
+        for i, nid in enumerate(line):
+            node = city.nodes[nid]
+            m = city.add_node(node["lat"] + 0.2 * BLOCK_DEG, node["lng"] + 0.2 * BLOCK_DEG)
+            if prev is not None:
+                city.add_road(prev, m, "motorway", f"Motorway {k + 1}", osm_id=osm_id)
+            if i % exit_every == 0:
+                city.add_road(nid, m, "motorway_link", f"Exit {k + 1}-{i}")
+            prev = m
+
+
+# ----------------------------------
+# Places
+# ----------------------------------
+def make_places(city, components, num_places):
+    rng = city.rng
+    candidates = [nid for nid in city.nodes if components.in_largest(nid)]
+    chosen = rng.sample(candidates, min(num_places, len(candidates)))
+
+    places = []
+    counts = {}
+    for i, nid in enumerate(chosen):
+        place_type = PLACE_TYPES[i % len(PLACE_TYPES)]
+        counts[place_type] = counts.get(place_type, 0) + 1
+        node = city.nodes[nid]
+        places.append({
+            "id": str(100000 + i),
+            "name": f"{place_type.replace('_', ' ').title()} {counts[place_type]}",
+            "type": place_type,
+            "lat": node["lat"] + city.jitter(0.05),
+            "lon": node["lng"] + city.jitter(0.05),
+            "node_id": nid
+        })
+    return places
+
+
+def generate(kind="grid", num_nodes=10000, motorways=False, num_places=200, seed=0,
+             oneway_share=0.25):
+    """Returns (road_graph dict, places list)."""
+    city = CityBuilder(random.Random(seed))
+
+    if kind == "grid":
+        side = grid_city(city, num_nodes, oneway_share)
+        if motorways:
+            # One east-west and one north-south motorway through the middle
+            mid = side // 2
+            row = [str(mid * side + c) for c in range(side)]
+            col = [str(r * side + mid) for r in range(side)]
+            add_motorways(city, [row, col])
+    elif kind == "radial":
+        rings = radial_city(city, num_nodes)
+        if motorways:
+            middle = rings[len(rings) // 2]
+            add_motorways(city, [middle + middle[:1]])
+    else:
+        raise ValueError(f"unknown city kind: {kind}")
+
+    components = ComponentIndex.build(city.edges, city.nodes)
+    graph = {"nodes": city.nodes, "edges": city.edges, "components": components.to_json()}
+    return graph, make_places(city, components, num_places)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic road graph")
+    parser.add_argument("--kind", choices=["grid", "radial"], default="grid")
+    parser.add_argument("--nodes", type=int, default=10000, help="approximate street nodes")
+    parser.add_argument("--motorways", action="store_true")
+    parser.add_argument("--oneway", type=float, default=0.25, help="share of one-way streets (grid)")
+    parser.add_argument("--places", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out-dir", required=True)
+    parser.add_argument("--binary", action="store_true", help="also write road_graph.npz")
+    args = parser.parse_args()
+
+    graph, places = generate(args.kind, args.nodes, args.motorways, args.places, args.seed,
+                             args.oneway)
+
+    out = Path(args.out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    with open(out / GRAPH_FILE, "w", encoding="utf-8") as f:
+        json.dump(graph, f, separators=(",", ":"))
+    with open(out / PLACES_FILE, "w", encoding="utf-8") as f:
+        json.dump({"places": places}, f, indent=2)
+
+    if args.binary:
+        from compact_graph import CompactGraph
+        CompactGraph.from_json(graph).save(out / "road_graph.npz")
+
+    components = ComponentIndex.from_json(graph["components"])
+    num_edges = sum(len(e) for e in graph["edges"].values())
+    print(f"✅ {args.kind} city: {len(graph['nodes'])} nodes, {num_edges} edges, "
+          f"{len(places)} places -> {out}")
+    print(f"   {len(components.reach)} strongly connected components, "
+          f"largest has {components.sizes[components.largest]} nodes")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,18 @@
 import json
 import math
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from data_context import DEFAULT_DATA_DIR, GRAPH_FILE, PLACES_FILE
+from graph_components import ComponentIndex
+
+PLACES_INPUT = DEFAULT_DATA_DIR / "places.json"
+GRAPH_INPUT = DEFAULT_DATA_DIR / GRAPH_FILE
+OUTPUT_FILE = DEFAULT_DATA_DIR / PLACES_FILE
+
 
 # -------------------------
 # Distance function
@@ -22,37 +35,28 @@ def haversine(lat1, lon1, lat2, lon2):
     return R * c
 
 
-# -------------------------
-# Load places
-# -------------------------
-with open("places.json", "r", encoding="utf-8") as f:
-    places_data = json.load(f)
-
-places = places_data["places"]
-
+def snap_nodes_of(graph_data):
+    """
+    Only snap onto the largest strongly connected component, so a place
+    never lands on a one-way trap or an island nobody can route to/from
+    """
+    nodes = graph_data["nodes"]
+    if "components" in graph_data:
+        components = ComponentIndex.from_json(graph_data["components"])
+    else:
+        components = ComponentIndex.build(graph_data["edges"], nodes)
 
-# -------------------------
-# Load graph nodes
-# -------------------------
-with open("graph.json", "r", encoding="utf-8") as f:
-    graph_data = json.load(f)
+    return {nid: node for nid, node in nodes.items() if components.in_largest(nid)}
 
-nodes = graph_data["nodes"]
 
-
-# -------------------------
-# Snap each place to nearest node
-# -------------------------
-snapped_places = []
-
-for place in places:
+def snap_place(place, snap_nodes):
     place_lat = place["lat"]
     place_lon = place["lon"]
 
     closest_node = None
     min_distance = float("inf")
 
-    for node_id, node in nodes.items():
+    for node_id, node in snap_nodes.items():
         node_lat = node["lat"]
         node_lon = node["lng"]
 
@@ -62,20 +66,74 @@ for place in places:
             min_distance = d
             closest_node = node_id
 
-    snapped_places.append({
+    return {
         "id": place["id"],
         "name": place["name"],
         "type": place["type"],
         "lat": place_lat,
         "lon": place_lon,
         "node_id": closest_node
-    })
-
-
-# -------------------------
-# Save result
-# -------------------------
-with open("places_nodes.json", "w", encoding="utf-8") as f:
-    json.dump({"places": snapped_places}, f, indent=2)
-
-print(f"✅ Snapped {len(snapped_places)} places to nearest road nodes")
+    }
+
+
+def snap_places(places, graph_data):
+    snap_nodes = snap_nodes_of(graph_data)
+    return [snap_place(place, snap_nodes) for place in places]
+
+
+def resnap_places(places, graph_data, gained, lost):
+    """
+    After a graph update: re-snap only the places that can be affected.
+    A place on a node that left the largest component gets a full snap;
+    every other place only checks the nodes that joined it (``gained``).
+    Returns (places, ids of the places whose node changed).
+    """
+    nodes = graph_data["nodes"]
+    gained_nodes = {nid: nodes[nid] for nid in gained}
+    snap_nodes = None
+
+    updated = []
+    moved = []
+    for place in places:
+        new_place = place
+        if place["node_id"] in lost or place["node_id"] not in nodes:
+            if snap_nodes is None:
+                snap_nodes = snap_nodes_of(graph_data)
+            new_place = snap_place(place, snap_nodes)
+        elif gained_nodes:
+            current = nodes[place["node_id"]]
+            candidate = snap_place(place, gained_nodes)
+            node = nodes[candidate["node_id"]]
+            if haversine(place["lat"], place["lon"], node["lat"], node["lng"]) < \
+                    haversine(place["lat"], place["lon"], current["lat"], current["lng"]):
+                new_place = candidate
+
+        if new_place["node_id"] != place["node_id"]:
+            moved.append(place["id"])
+        updated.append(new_place)
+    return updated, moved
+
+
+def main(places_file=PLACES_INPUT, graph_file=GRAPH_INPUT, output_file=OUTPUT_FILE):
+    # -------------------------
+    # Load places and graph
+    # -------------------------
+    with open(places_file, "r", encoding="utf-8") as f:
+        places = json.load(f)["places"]
+
+    with open(graph_file, "r", encoding="utf-8") as f:
+        graph_data = json.load(f)
+
+    snapped_places = snap_places(places, graph_data)
+
+    # -------------------------
+    # Save result
+    # -------------------------
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump({"places": snapped_places}, f, indent=2)
+
+    print(f"✅ Snapped {len(snapped_places)} places to nearest road nodes: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
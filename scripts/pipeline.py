@@ -0,0 +1,357 @@
+"""
+Data pipeline: raw OSM GeoJSON -> everything the app reads.
+
+Stages declare their inputs and outputs; dependencies follow from them.
+A stage is skipped when the content hashes of its inputs (and of its own
+code) match the last successful run and its outputs are untouched.
+Independent stages run in parallel processes.
+
+    python scripts/pipeline.py              # run what's out of date
+    python scripts/pipeline.py --force      # rerun everything
+    python scripts/pipeline.py --only snap  # one stage (plus nothing else)
+    python scripts/pipeline.py --list
+    python scripts/pipeline.py --order hilbert  # locality-friendly node ids
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(SCRIPTS))
+
+from data_context import (
+    ARC_FLAGS_FILE, CRP_PARTITION_FILE, DEFAULT_DATA_DIR, EDGE_BUFFER_FILE, GRAPH_FILE,
+    PLACES_FILE, RAW_DATA_DIR, SERVICE_AREAS_FILE
+)
+from node_order import ORDERINGS
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STATE_FILE = ".pipeline_state.json"
+
+
+# ----------------------------------
+# Stage bodies (top-level so worker processes can import them)
+# ----------------------------------
+def run_extract_places(inputs, outputs):
+    import extract_places
+    extract_places.main(inputs[0], outputs[0])
+
+
+def run_build_graph(inputs, outputs, order=None):
+    import build_graph
+    build_graph.main(inputs[0], outputs[0], order)
+
+
+def run_snap_places(inputs, outputs):
+    import map_places_to_nodes
+    map_places_to_nodes.main(inputs[0], inputs[1], outputs[0])
+
+
+def run_binary_export(inputs, outputs):
+    from compact_graph import CompactGraph
+    with open(inputs[0], "r", encoding="utf-8") as f:
+        graph = CompactGraph.from_json(json.load(f))
+    graph.save(outputs[0])
+    print(f"✅ Exported {graph.num_nodes} nodes / {graph.num_edges} edges to {outputs[0]}")
+
+
+def run_edge_buffer(inputs, outputs):
+    from compact_graph import CompactGraph
+    from edge_buffer import build_edge_buffer
+    with open(inputs[0], "r", encoding="utf-8") as f:
+        graph = CompactGraph.from_json(json.load(f))
+    data = build_edge_buffer(graph)
+    with open(outputs[0], "wb") as f:
+        f.write(data)
+    print(f"✅ Packed map segments ({len(data)} bytes) to {outputs[0]}")
+
+
+def run_landmarks(inputs, outputs):
+    from compact_graph import CompactGraph
+    from landmarks import LandmarkTable
+    with open(inputs[0], "r", encoding="utf-8") as f:
+        graph = CompactGraph.from_json(json.load(f))
+    table = LandmarkTable.build(graph)
+    table.save(outputs[0])
+    print(f"✅ Computed {len(table.landmarks)} landmarks to {outputs[0]}")
+
+
+def run_arc_flags(inputs, outputs):
+    from arc_flags import ArcFlags
+    from compact_graph import CompactGraph
+    with open(inputs[0], "r", encoding="utf-8") as f:
+        graph = CompactGraph.from_json(json.load(f))
+    table = ArcFlags.build(graph, jobs=min(4, os.cpu_count() or 1))
+    table.save(outputs[0])
+    print(f"✅ Computed arc flags for {table.num_cells} cells to {outputs[0]}")
+
+
+def run_service_areas(inputs, outputs):
+    from compact_graph import CompactGraph
+    from facilities import ServiceAreas
+    with open(inputs[0], "r", encoding="utf-8") as f:
+        graph = CompactGraph.from_json(json.load(f))
+    with open(inputs[1], "r", encoding="utf-8") as f:
+        places = json.load(f)["places"]
+    areas = ServiceAreas.build(graph, places)
+    areas.save(outputs[0])
+    print(f"✅ Computed service areas for {len(areas.types())} place types to {outputs[0]}")
+
+
+def run_crp_partition(inputs, outputs):
+    from compact_graph import CompactGraph
+    from crp import CRP
+    with open(inputs[0], "r", encoding="utf-8") as f:
+        graph = CompactGraph.from_json(json.load(f))
+    overlay = CRP.build(graph)
+    overlay.save_partition(outputs[0])
+    print(f"✅ Partitioned into {len(overlay.levels)} CRP levels "
+          f"({', '.join(str(level.num_cells) for level in overlay.levels)} cells) to {outputs[0]}")
+
+
+# ----------------------------------
+# Stage declarations
+# ----------------------------------
+# Paths are ("raw" | "processed", filename); "code" lists the modules
+# whose source is part of the cache key, "params" the pipeline options
+# passed to the stage (also part of the key). Stages that use edge
+# weights list search_algorithms.py, where the cost factors live.
+class Stage:
+
+    def __init__(self, name, func, inputs, outputs, code, params=()):
+        self.name = name
+        self.func = func
+        self.inputs = inputs
+        self.outputs = outputs
+        self.code = code
+        self.params = params
+
+
+STAGES = [
+    Stage("places", run_extract_places,
+          inputs=[("raw", "osm_points.geojson")],
+          outputs=[("processed", "places.json")],
+          code=["scripts/extract_places.py"]),
+    Stage("graph", run_build_graph,
+          inputs=[("raw", "osm_roads.geojson")],
+          outputs=[("processed", GRAPH_FILE)],
+          code=["scripts/build_graph.py", "graph_components.py", "node_order.py"],
+          params=("order",)),
+    Stage("snap", run_snap_places,
+          inputs=[("processed", "places.json"), ("processed", GRAPH_FILE)],
+          outputs=[("processed", PLACES_FILE)],
+          code=["scripts/map_places_to_nodes.py", "graph_components.py"]),
+    Stage("binary", run_binary_export,
+          inputs=[("processed", GRAPH_FILE)],
+          outputs=[("processed", "road_graph.npz")],
+          code=["compact_graph.py", "search_algorithms.py"]),
+    Stage("edges", run_edge_buffer,
+          inputs=[("processed", GRAPH_FILE)],
+          outputs=[("processed", EDGE_BUFFER_FILE)],
+          code=["edge_buffer.py", "compact_graph.py"]),
+    Stage("landmarks", run_landmarks,
+          inputs=[("processed", GRAPH_FILE)],
+          outputs=[("processed", "landmarks.npz")],
+          code=["landmarks.py", "delta_stepping.py", "compact_graph.py",
+                "search_algorithms.py"]),
+    Stage("arcflags", run_arc_flags,
+          inputs=[("processed", GRAPH_FILE)],
+          outputs=[("processed", ARC_FLAGS_FILE)],
+          code=["arc_flags.py", "delta_stepping.py", "compact_graph.py",
+                "search_algorithms.py"]),
+    Stage("areas", run_service_areas,
+          inputs=[("processed", GRAPH_FILE), ("processed", PLACES_FILE)],
+          outputs=[("processed", SERVICE_AREAS_FILE)],
+          code=["facilities.py", "delta_stepping.py", "compact_graph.py",
+                "search_algorithms.py"]),
+    Stage("crp", run_crp_partition,
+          inputs=[("processed", GRAPH_FILE)],
+          outputs=[("processed", CRP_PARTITION_FILE)],
+          code=["crp.py", "arc_flags.py", "compact_graph.py", "search_algorithms.py"]),
+]
+
+STAGES_BY_NAME = {stage.name: stage for stage in STAGES}
+
+
+def dependencies(stage):
+    produced = {out: s.name for s in STAGES for out in s.outputs}
+    return {produced[i] for i in stage.inputs if i in produced}
+
+
+# ----------------------------------
+# Hashing and cache state
+# ----------------------------------
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Pipeline:
+
+    def __init__(self, raw_dir=RAW_DATA_DIR, data_dir=DEFAULT_DATA_DIR, jobs=2, order=None):
+        self.dirs = {"raw": Path(raw_dir), "processed": Path(data_dir)}
+        self.jobs = jobs
+        self.options = {"order": order}
+        self.state_path = self.dirs["processed"] / STATE_FILE
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+        except FileNotFoundError:
+            self.state = {}
+
+    def path(self, ref):
+        where, name = ref
+        return self.dirs[where] / name
+
+    def cache_key(self, stage):
+        digest = hashlib.sha256()
+        for ref in stage.inputs:
+            digest.update(f"{ref}:{file_hash(self.path(ref))}".encode())
+        for module in stage.code:
+            digest.update(f"{module}:{file_hash(ROOT / module)}".encode())
+        for param in stage.params:
+            digest.update(f"{param}={self.options[param]}".encode())
+        return digest.hexdigest()
+
+    def up_to_date(self, stage, key):
+        entry = self.state.get(stage.name)
+        if not entry or entry["key"] != key:
+            return False
+        for ref in stage.outputs:
+            path = self.path(ref)
+            if not path.exists() or file_hash(path) != entry["outputs"].get(path.name):
+                return False
+        return True
+
+    def save_state(self):
+        self.dirs["processed"].mkdir(parents=True, exist_ok=True)
+        with open(self.state_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+
+    # ----------------------------------
+    # Execution
+    # ----------------------------------
+    def run(self, only=None, force=False):
+        selected = [s for s in STAGES if not only or s.name in only]
+        pending = {s.name: s for s in selected}
+        done = set(STAGES_BY_NAME) - set(pending)
+        report = []
+
+        executor = _executor(self.jobs)
+        running = {}
+
+        while pending or running:
+            # Submit everything whose upstream stages have finished
+            for name, stage in list(pending.items()):
+                if not dependencies(stage) <= done:
+                    continue
+                del pending[name]
+
+                key = self.cache_key(stage)
+                if not force and self.up_to_date(stage, key):
+                    report.append((name, "cached", 0.0, None))
+                    done.add(name)
+                    continue
+
+                inputs = [str(self.path(r)) for r in stage.inputs]
+                outputs = [str(self.path(r)) for r in stage.outputs]
+                params = {p: self.options[p] for p in stage.params}
+                running[executor.submit(_run_stage, name, inputs, outputs, params)] = (stage, key)
+
+            if not running:
+                if pending:
+                    raise RuntimeError(f"unsatisfiable stages: {sorted(pending)}")
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, key = running.pop(future)
+                seconds, peak_kb = future.result()
+
+                self.state[stage.name] = {
+                    "key": key,
+                    "outputs": {self.path(r).name: file_hash(self.path(r)) for r in stage.outputs},
+                    "seconds": seconds,
+                    "peak_rss_kb": peak_kb,
+                }
+                self.save_state()
+                report.append((stage.name, "ran", seconds, peak_kb))
+                done.add(stage.name)
+
+        executor.shutdown()
+        return report
+
+
+def _executor(jobs):
+    # A fresh process per stage so the peak RSS belongs to that stage alone
+    try:
+        return ProcessPoolExecutor(max_workers=jobs, max_tasks_per_child=1)
+    except TypeError:  # Python < 3.11
+        return ProcessPoolExecutor(max_workers=jobs)
+
+
+def _run_stage(name, inputs, outputs, params):
+    t0 = time.perf_counter()
+    STAGES_BY_NAME[name].func([Path(p) for p in inputs], [Path(p) for p in outputs], **params)
+    seconds = time.perf_counter() - t0
+
+    peak_kb = None
+    if resource is not None:
+        peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin":
+            peak_kb //= 1024  # bytes on macOS
+    return seconds, peak_kb
+
+
+# ----------------------------------
+# CLI
+# ----------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Run the data pipeline")
+    parser.add_argument("--only", nargs="+", choices=list(STAGES_BY_NAME),
+                        help="run only these stages")
+    parser.add_argument("--force", action="store_true", help="ignore the cache")
+    parser.add_argument("--jobs", type=int, default=2, help="parallel stage processes")
+    parser.add_argument("--raw-dir", default=RAW_DATA_DIR)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--order", choices=sorted(ORDERINGS),
+                        help="renumber graph nodes for memory locality")
+    parser.add_argument("--list", action="store_true", help="show stages and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for stage in STAGES:
+            deps = ", ".join(sorted(dependencies(stage))) or "-"
+            outs = ", ".join(name for _, name in stage.outputs)
+            print(f"{stage.name:<10} after: {deps:<14} -> {outs}")
+        return
+
+    pipeline = Pipeline(args.raw_dir, args.data_dir, args.jobs, args.order)
+
+    t0 = time.perf_counter()
+    report = pipeline.run(args.only, args.force)
+    total = time.perf_counter() - t0
+
+    print(f"\n{'stage':<10} {'status':<8} {'time (s)':>9} {'peak RSS (MB)':>14}")
+    for name, status, seconds, peak_kb in report:
+        peak = f"{peak_kb / 1024:.1f}" if peak_kb else "-"
+        print(f"{name:<10} {status:<8} {seconds:>9.2f} {peak:>14}")
+    print(f"total wall time {total:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Incremental graph update from a refreshed osm_roads.geojson.
+
+Instead of rebuilding everything, the stored road_graph.json is patched:
+
+1. Diff: features are matched by osm_id and compared by a hash of their
+   geometry and tags (the "features" index build_graph.py stores).
+2. Patch: edges of removed and changed features are dropped, edges of
+   new and changed ones added. Existing nodes keep their ids (nodes are
+   keyed by coordinate); new intersections get ids after the last one.
+   Nodes left without edges stay in place until the next full build.
+3. Derived data, only where the change set reaches:
+   - SCCs: ComponentIndex.apply_changes re-splits / merges only the
+     components an edge touches
+   - places: only those on nodes that left the largest component, or
+     near nodes that joined it, are re-snapped
+   - landmarks: distances are repaired from the changed edges outward
+   - road_graph.npz and road_edges.bin are re-exported if present
+   - arc_flags.npz and service_areas.npz are not repaired: they go stale
+     (and unused) until the pipeline's arcflags / areas stages run again
+
+    python scripts/update_graph.py --roads new_roads.geojson --changes changes.json
+
+A graph built before the features index existed needs the extract it
+was built from once: ``--old data/raw/osm_roads.geojson``. A full
+``pipeline.py`` run rebuilds everything from data/raw as before.
+"""
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(SCRIPTS))
+
+from build_graph import ROADS_FILE, add_feature, feature_hash, road_features
+from compact_graph import DEFAULT_PROFILE
+from data_context import (
+    BINARY_GRAPH_FILE, DEFAULT_DATA_DIR, EDGE_BUFFER_FILE, GRAPH_FILE, LANDMARKS_FILE, PLACES_FILE
+)
+from graph_components import ComponentIndex
+from map_places_to_nodes import resnap_places, snap_places
+
+
+# ----------------------------------
+# Feature index and diff
+# ----------------------------------
+def index_features(graph, geo):
+    """Rebuild the "features" index of a graph from the extract it was built from."""
+    coord_to_id = {(node["lng"], node["lat"]): nid for nid, node in graph["nodes"].items()}
+    return {
+        key: {
+            "hash": feature_hash(feature),
+            "nodes": [coord_to_id[tuple(c)] for c in feature["geometry"]["coordinates"]]
+        }
+        for key, feature in road_features(geo).items()
+    }
+
+
+def diff_features(index, features):
+    """(added, removed, modified) feature keys between the index and new features."""
+    hashes = {key: feature_hash(feature) for key, feature in features.items()}
+    added = [key for key in features if key not in index]
+    removed = [key for key in index if key not in features]
+    modified = [key for key in features if key in index and index[key]["hash"] != hashes[key]]
+    return added, removed, modified, hashes
+
+
+def _belongs_to(edge, key):
+    osm_id = edge.get("osm_id")
+    if osm_id is None:
+        return key.startswith("geom:")
+    return str(osm_id) == key
+
+
+def edge_weight(edge, profile=DEFAULT_PROFILE):
+    """Search weight of a road_graph.json edge, as CompactGraph.weights computes it."""
+    factor = profile.road_factors.get(edge.get("road_type"), profile.default_factor)
+    return edge["cost"] * factor + profile.intersection_penalty
+
+
+# ----------------------------------
+# Patching
+# ----------------------------------
+def patch_graph(graph, geo):
+    """
+    Patch ``graph`` in place to match ``geo``. Returns the change set;
+    its "edges_added" / "edges_removed" are (u, v, weight) with edges
+    that were removed and re-added unchanged cancelled out.
+    """
+    nodes = graph["nodes"]
+    edges = graph["edges"]
+    index = graph["features"]
+
+    features = road_features(geo)
+    added, removed, modified, hashes = diff_features(index, features)
+
+    dropped = []
+    for key in removed + modified:
+        along = set(index.pop(key)["nodes"])
+        for u in along:
+            keep = []
+            for edge in edges[u]:
+                if edge["to"] in along and _belongs_to(edge, key):
+                    dropped.append((u, edge["to"], edge_weight(edge)))
+                else:
+                    keep.append(edge)
+            edges[u] = keep
+
+    new_nodes = []
+    created = []
+    if added or modified:
+        coord_to_id = {(node["lng"], node["lat"]): nid for nid, node in nodes.items()}
+        next_id = len(nodes)
+
+        def get_node_id(coord):
+            nonlocal next_id
+            if coord not in coord_to_id:
+                while str(next_id) in nodes:
+                    next_id += 1
+                new_id = str(next_id)
+                coord_to_id[coord] = new_id
+                lon, lat = coord
+                nodes[new_id] = {"lat": lat, "lng": lon}
+                edges[new_id] = []
+                new_nodes.append(new_id)
+            return coord_to_id[coord]
+
+        for key in added + modified:
+            node_ids, pairs = add_feature(features[key], get_node_id, edges)
+            index[key] = {"hash": hashes[key], "nodes": node_ids}
+            created.extend((u, edge["to"], edge_weight(edge)) for u, edge in pairs)
+
+    if "original_ids" in graph:
+        graph["original_ids"].extend(new_nodes)  # no builder id: keep their own
+
+    # A changed name or tag re-adds identical edges; those change nothing
+    same = Counter(dropped) & Counter(created)
+    edges_removed = list((Counter(dropped) - same).elements())
+    edges_added = list((Counter(created) - same).elements())
+
+    return {
+        "features": {"added": added, "removed": removed, "modified": modified},
+        "nodes_added": new_nodes,
+        "edges_added": edges_added,
+        "edges_removed": edges_removed,
+    }
+
+
+def update_components(graph, changes):
+    """Patch the SCC index; returns (summary, gained, lost) for re-snapping."""
+    components = ComponentIndex.from_json(graph["components"])
+    old_largest = components.largest
+
+    summary = components.apply_changes(
+        graph["edges"],
+        [(u, v) for u, v, _ in changes["edges_added"]],
+        [(u, v) for u, v, _ in changes["edges_removed"]],
+        changes["nodes_added"],
+    )
+    graph["components"] = components.to_json()
+
+    moved = summary.pop("moved")
+    if components.largest != old_largest:
+        return summary, None, None  # a different component is largest: snap everything
+    gained = [n for n, old in moved.items() if old != old_largest and components.in_largest(n)]
+    lost = {n for n, old in moved.items() if old == old_largest and not components.in_largest(n)}
+    summary["relabelled"] = len(moved)
+    return summary, gained, lost
+
+
+# ----------------------------------
+# CLI
+# ----------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Patch the road graph from a new OSM extract")
+    parser.add_argument("--roads", default=ROADS_FILE, help="the new osm_roads.geojson")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--old", help="extract the stored graph was built from "
+                                      "(only for graphs without a features index)")
+    parser.add_argument("--changes", help="write the change set here (JSON)")
+    args = parser.parse_args()
+
+    data_dir = Path(args.data_dir)
+    graph_file = data_dir / GRAPH_FILE
+    timings = {}
+    t0 = time.perf_counter()
+
+    def lap(name):
+        nonlocal t0
+        now = time.perf_counter()
+        timings[name] = round(now - t0, 4)
+        t0 = now
+
+    # Derived files made for the current graph (older ones are not worth repairing)
+    graph_mtime = graph_file.stat().st_mtime
+    fresh = {
+        name for name in (LANDMARKS_FILE, BINARY_GRAPH_FILE, EDGE_BUFFER_FILE)
+        if (data_dir / name).exists() and (data_dir / name).stat().st_mtime >= graph_mtime
+    }
+
+    with open(graph_file, "r", encoding="utf-8") as f:
+        graph = json.load(f)
+    with open(args.roads, "r", encoding="utf-8") as f:
+        geo = json.load(f)
+    if "features" not in graph:
+        if not args.old:
+            sys.exit("The stored graph has no features index: pass --old <extract it was built "
+                     "from> once, or rebuild it with build_graph.py")
+        with open(args.old, "r", encoding="utf-8") as f:
+            graph["features"] = index_features(graph, json.load(f))
+    lap("load")
+
+    changes = patch_graph(graph, geo)
+    lap("patch")
+
+    summary, gained, lost = update_components(graph, changes)
+    changes["components"] = summary
+    lap("components")
+
+    places_file = data_dir / PLACES_FILE
+    if places_file.exists():
+        with open(places_file, "r", encoding="utf-8") as f:
+            places = json.load(f)["places"]
+        if gained is None:
+            snapped = snap_places(places, graph)
+            moved = [p["id"] for p, q in zip(places, snapped) if p["node_id"] != q["node_id"]]
+        else:
+            snapped, moved = resnap_places(places, graph, gained, lost)
+        changes["places_moved"] = moved
+        lap("places")
+
+    with open(graph_file, "w", encoding="utf-8") as f:
+        json.dump(graph, f, indent=2)
+    if places_file.exists():
+        with open(places_file, "w", encoding="utf-8") as f:
+            json.dump({"places": snapped}, f, indent=2)
+    lap("write")
+
+    if fresh:
+        from compact_graph import CompactGraph
+        compact = CompactGraph.from_json(graph)
+        if LANDMARKS_FILE in fresh:
+            from landmarks import LandmarkTable
+            from compact_graph import DEFAULT_PROFILE
+            table = LandmarkTable.load(data_dir / LANDMARKS_FILE)
+            # Tables from other cost factors are left stale for pipeline.py to rebuild
+            if table.profile == DEFAULT_PROFILE.fingerprint():
+                ix = compact.index_of
+                changes["landmark_distances"] = table.update(
+                    compact,
+                    [(ix[u], ix[v], w) for u, v, w in changes["edges_removed"]],
+                    [(ix[u], ix[v], w) for u, v, w in changes["edges_added"]],
+                )
+                table.save(data_dir / LANDMARKS_FILE)
+        if BINARY_GRAPH_FILE in fresh:
+            compact.save(data_dir / BINARY_GRAPH_FILE)
+        if EDGE_BUFFER_FILE in fresh:
+            from edge_buffer import build_edge_buffer
+            with open(data_dir / EDGE_BUFFER_FILE, "wb") as f:
+                f.write(build_edge_buffer(compact))
+        lap("derived")
+
+    changes["timing"] = timings
+    if args.changes:
+        with open(args.changes, "w", encoding="utf-8") as f:
+            json.dump(changes, f, indent=2)
+
+    features = changes["features"]
+    print(f"✅ Patched {graph_file}: {len(features['added'])} added, "
+          f"{len(features['modified'])} modified, {len(features['removed'])} removed features")
+    print(f"   {len(changes['nodes_added'])} new nodes, +{len(changes['edges_added'])} / "
+          f"-{len(changes['edges_removed'])} edges, components {summary}")
+    if "places_moved" in changes:
+        print(f"   {len(changes['places_moved'])} places re-snapped")
+    if "landmark_distances" in changes:
+        print(f"   {changes['landmark_distances']} landmark distances repaired")
+    print("   " + ", ".join(f"{k} {v:.3f}s" for k, v in timings.items()))
+
+
+if __name__ == "__main__":
+    main()
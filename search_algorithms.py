@@ -1,39 +1,12 @@
+import contextlib
 import math
-import json
 
-# Open and load the places.json file
-with open("data/processed/places_with_nodes.json", "r", encoding="utf-8") as f:
-    data = json.load(f)
+from data_context import get_context
 
-# Dictionary to store: name -> (lat, lon)
-locations = {}
 
-# Loop through the list of places
-for place in data["places"]:
-    name = place["name"]
-    lat = place["lat"]
-    lon = place["lon"]
-
-    locations[name] = (lat, lon)
-
-# (Optional) print to check
-print(locations)
-
-def get_start_goal_nodes(start, goal):
-    with open("data/processed/places_nodes.json", "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    start_node = None
-    goal_node = None
-
-    for place in data["places"]:
-        if place["name"] == start:
-            start_node = place["node_id"]
-
-        if place["name"] == goal:
-            goal_node = place["node_id"]
-
-    return start_node, goal_node
+def get_start_goal_nodes(start, goal, ctx=None):
+    ctx = ctx or get_context()
+    return ctx.place_index.node_id(start), ctx.place_index.node_id(goal)
 
 # ----------------------------------
 # Configuration (easy to tweak)
@@ -55,11 +28,16 @@ DEFAULT_ROAD_FACTOR = 1.3
 # ----------------------------------
 # Uniform Cost Search (Realistic)
 # ----------------------------------
-def ucs(start_node, goal_node):
-    with open("data/processed/road_graph.json", "r", encoding="utf-8") as f:
-        graph = json.load(f)
+def ucs(start_node, goal_node, ctx=None, arc_flags=False):
+    """``arc_flags=True`` skips edges not flagged for the goal's cell (arc_flags.py)."""
+    ctx = ctx or get_context()
+    edges = ctx.edges
 
-    edges = graph["edges"]
+    # Goal component unreachable in the SCC condensation: skip the search
+    if not ctx.components.reachable(start_node, goal_node):
+        return None, float("inf"), 0
+
+    flagged = arc_flag_filter(ctx, goal_node) if arc_flags else None
 
     open_list = [(0, start_node, [start_node])]
     closed_list = {}
@@ -81,7 +59,10 @@ def ucs(start_node, goal_node):
             return path, current_cost, expanded
 
         # Expand neighbors
-        for edge in edges.get(current_node, []):
+        out_edges = edges.get(current_node, [])
+        if flagged:
+            out_edges = flagged(current_node, out_edges)
+        for edge in out_edges:
             next_node = edge["to"]
 
             # --- Option B: road type realism ---
@@ -101,15 +82,23 @@ def ucs(start_node, goal_node):
 # ----------------------------------
 # A* Search
 # ----------------------------------
-def a_star(start_node, goal_node):
-    with open("data/processed/road_graph.json", "r", encoding="utf-8") as f:
-        graph = json.load(f)
-
-    edges = graph["edges"]
-    nodes = graph["nodes"]
-
-    goal_lat = nodes[goal_node]["lat"]
-    goal_lon = nodes[goal_node]["lng"]
+def a_star(start_node, goal_node, ctx=None, arc_flags=False):
+    """
+    ``arc_flags=True`` skips edges not flagged for the goal's cell (arc_flags.py).
+    With the pipeline's landmark tables loaded, the heuristic is raised to
+    the landmark (ALT) lower bound where that is larger.
+    """
+    ctx = ctx or get_context()
+    edges = ctx.edges
+    coords = ctx.coords
+
+    # Goal component unreachable in the SCC condensation: skip the search
+    if not ctx.components.reachable(start_node, goal_node):
+        return None, float("inf"), 0
+
+    flagged = arc_flag_filter(ctx, goal_node) if arc_flags else None
+    alt = landmark_heuristic(ctx, goal_node)
+    goal_lat, goal_lon = coords[goal_node]
 
     # OPEN: (f, g, node, path)
     open_list = [(0, 0, start_node, [start_node])]
@@ -134,7 +123,10 @@ def a_star(start_node, goal_node):
             return path, g_cost, expanded
 
         # Expand neighbors
-        for edge in edges.get(current_node, []):
+        out_edges = edges.get(current_node, [])
+        if flagged:
+            out_edges = flagged(current_node, out_edges)
+        for edge in out_edges:
             next_node = edge["to"]
 
             # --- Realistic edge cost ---
@@ -144,9 +136,10 @@ def a_star(start_node, goal_node):
             new_g = g_cost + step_cost
 
             # --- Heuristic ---
-            lat = nodes[next_node]["lat"]
-            lon = nodes[next_node]["lng"]
+            lat, lon = coords[next_node]
             h = haversine(lat, lon, goal_lat, goal_lon)
+            if alt:
+                h = max(h, alt(next_node))
 
             new_f = new_g + h
             new_path = path + [next_node]
@@ -156,6 +149,18 @@ def a_star(start_node, goal_node):
     return None, float("inf"), expanded
 
 
+def arc_flag_filter(ctx, goal_node):
+    """Edge filter for the goal's cell, or None when no arc flags are built."""
+    from arc_flags import edge_filter
+    return edge_filter(ctx, goal_node)
+
+
+def landmark_heuristic(ctx, goal_node):
+    """ALT lower bound on the cost to the goal, or None when no landmarks are loaded."""
+    from landmarks import goal_heuristic
+    return goal_heuristic(ctx, goal_node)
+
+
 # ----------------------------------
 # Heuristic: straight-line distance
 # ----------------------------------
@@ -171,15 +176,16 @@ def haversine(lat1, lon1, lat2, lon2):
 # ----------------------------------
 # Greedy Best-First Search
 # ----------------------------------
-def greedy(start_node, goal_node):
-    with open("data/processed/road_graph.json", "r", encoding="utf-8") as f:
-        graph = json.load(f)
+def greedy(start_node, goal_node, ctx=None):
+    ctx = ctx or get_context()
+    edges = ctx.edges
+    coords = ctx.coords
 
-    edges = graph["edges"]
-    nodes = graph["nodes"]
+    # Goal component unreachable in the SCC condensation: skip the search
+    if not ctx.components.reachable(start_node, goal_node):
+        return None, float("inf"), 0
 
-    goal_lat = nodes[goal_node]["lat"]
-    goal_lon = nodes[goal_node]["lng"]
+    goal_lat, goal_lon = coords[goal_node]
 
     # OPEN: (heuristic, cost_so_far, node, path)
     open_list = [(0, 0, start_node, [start_node])]
@@ -213,8 +219,7 @@ def greedy(start_node, goal_node):
             new_cost = current_cost + edge_cost
 
             # --- Heuristic ONLY drives priority ---
-            lat = nodes[next_node]["lat"]
-            lon = nodes[next_node]["lng"]
+            lat, lon = coords[next_node]
             heuristic = haversine(lat, lon, goal_lat, goal_lon)
 
             open_list.append((heuristic, new_cost, next_node, path + [next_node]))
@@ -242,12 +247,14 @@ def build_reverse_edges(edges):
 # ----------------------------------
 # Bidirectional UCS
 # ----------------------------------
-def bidirectional_ucs(start_node, goal_node):
-    with open("data/processed/road_graph.json", "r", encoding="utf-8") as f:
-        graph = json.load(f)
+def bidirectional_ucs(start_node, goal_node, ctx=None):
+    ctx = ctx or get_context()
+    edges = ctx.edges
+    reverse_edges = ctx.reverse_edges
 
-    edges = graph["edges"]
-    reverse_edges = build_reverse_edges(edges)
+    # Goal component unreachable in the SCC condensation: skip the search
+    if not ctx.components.reachable(start_node, goal_node):
+        return None, float("inf"), 0
 
     # OPEN lists: (cost, node, path)
     open_fwd = [(0, start_node, [start_node])]
@@ -306,11 +313,14 @@ def bidirectional_ucs(start_node, goal_node):
 
     return None, float("inf"), expanded
 
-def main():
+def main(profile_dir=None):
+    """Interactive CLI. With ``profile_dir`` the searches are profiled."""
+    ctx = get_context()
+
     print("===== City Network Path Analysis =====\n")
 
     print("Available Locations:")
-    for loc in locations:
+    for loc in ctx.locations:
         print("-", loc)
 
     print("\nEnter start and goal locations exactly as shown above.\n")
@@ -323,8 +333,33 @@ def main():
     print(f"Goal : {goal}")
     print("====================================\n")
 
-    start_id, goal_id = get_start_goal_nodes(start, goal)
+    start_id, goal_id = get_start_goal_nodes(start, goal, ctx)
+
+    for name, node in ((start, start_id), (goal, goal_id)):
+        if node is None:
+            suggestions = [p["name"] for p in ctx.place_index.fuzzy(name, limit=3)]
+            print(f"Unknown location: {name}")
+            if suggestions:
+                print("Did you mean:", ", ".join(suggestions))
+            return
+
+    if profile_dir:
+        from query_profiler import QueryProfile
+        ctx.warm_up()  # profile the query, not the lazy data loading
+        profiler = QueryProfile()
+    else:
+        profiler = contextlib.nullcontext()
+
+    with profiler:
+        run_all(start_id, goal_id)
 
+    if profile_dir:
+        print_profile(profiler, profile_dir, f"{start}-{goal}")
+
+    print("===== End of Analysis =====")
+
+
+def run_all(start_id, goal_id):
     # ---------- UCS ----------
     path, cost, expanded = ucs(start_id, goal_id)
     print("Algorithm: Uniform Cost Search (UCS)")
@@ -366,8 +401,31 @@ def main():
     print(f"Total Travel Time: {cost:.2f} minutes")
     print(f"Nodes Expanded: {expanded}\n")
 
-    print("===== End of Analysis =====")
+
+def print_profile(profiler, profile_dir, label):
+    files = profiler.save(profile_dir, label)
+    summary = profiler.summary()
+
+    print("===== Profile =====")
+    print(f"Wall time: {summary['wall_ms']:.1f} ms, peak traced memory: {summary['peak_kb']:.1f} KB\n")
+    print(f"{'self ms':>9} {'cum ms':>9} {'calls':>8}  function")
+    for row in summary["hot_functions"]:
+        print(f"{row['self_ms']:>9.2f} {row['cumulative_ms']:>9.2f} {row['calls']:>8}  {row['function']}")
+    print("\nTop allocations:")
+    for row in summary["top_allocations"][:5]:
+        print(f"{row['kb']:>9.1f} KB  {row['where']}")
+    print()
+    for kind, path in files.items():
+        print(f"{kind:<12} {path}")
+    print()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+    from query_profiler import PROFILE_DIR
+
+    parser = argparse.ArgumentParser(description="City Network Path Analysis")
+    parser.add_argument("--profile", nargs="?", const=str(PROFILE_DIR), metavar="DIR",
+                        help=f"profile the searches and write stats to DIR (default {PROFILE_DIR})")
+    args = parser.parse_args()
+    main(args.profile)
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""
+Shortest-path backends over the CompactGraph, for batch work.
+
+Every backend answers the same three questions for one cost profile,
+on node indices:
+
+    shortest_path(source, target)           -> (path or None, cost)
+    one_to_many(source, targets, limit)     -> float64[len(targets)]
+    matrix(sources, targets, limit)         -> float64[len(sources), len(targets)]
+
+Unreachable (or farther than ``limit``) is inf; ``limit`` must be >= 0
+(not NaN), which validate_limit() checks. Backends:
+
+- "python": heap Dijkstra in plain Python (the default; no extra
+  dependencies). Stops as soon as the target(s) are settled or the
+  search passes ``limit``.
+- "scipy":  scipy.sparse.csgraph.dijkstra on a csr_matrix built once per
+  graph and profile. Sources go in batches through ``indices=``, bounded
+  by ``limit=``. Only listed when SciPy is installed.
+
+Costs agree between backends; paths may differ where several are
+equally short. get_backend() caches instances per graph, so the
+conversion happens once (a shared-graph reload gives a new graph and
+new instances).
+"""
+import heapq
+import weakref
+
+import numpy as np
+
+from compact_graph import DEFAULT_PROFILE
+
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+except ImportError:  # optional: only the pure-Python backend then
+    csr_matrix = csgraph_dijkstra = None
+
+DEFAULT_BACKEND = "python"
+SCIPY_BATCH = 64    # sources per csgraph call (bounds the [batch, n] result)
+
+
+def validate_limit(limit):
+    """``limit`` as a float; ValueError unless it is >= 0 (inf allowed, NaN not)."""
+    limit = float(limit)
+    if not limit >= 0:
+        raise ValueError(f"limit must be >= 0, got {limit}")
+    return limit
+
+
+# ----------------------------------
+# Pure Python
+# ----------------------------------
+class PythonBackend:
+    name = "python"
+
+    def __init__(self, graph, profile=DEFAULT_PROFILE):
+        self.graph = graph
+        self.profile = profile
+        self._weights = graph.weights(profile).tolist()
+        self._indptr = graph.indptr.tolist()
+        self._indices = graph.indices.tolist()
+
+    def _search(self, source, targets, limit):
+        """(dist, parent) dicts of a Dijkstra that stops once ``targets`` are settled."""
+        weights, indptr, indices = self._weights, self._indptr, self._indices
+        remaining = set(targets)
+        dist = {source: 0.0}
+        parent = {source: -1}
+        done = set()
+        heap = [(0.0, source)]
+        while heap and remaining:
+            d, u = heapq.heappop(heap)
+            if u in done:
+                continue
+            if d > limit:
+                break
+            done.add(u)
+            remaining.discard(u)
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                nd = d + weights[e]
+                if nd < dist.get(v, float("inf")):
+                    dist[v] = nd
+                    parent[v] = u
+                    heapq.heappush(heap, (nd, v))
+        return {u: dist[u] for u in done}, parent
+
+    def shortest_path(self, source, target):
+        dist, parent = self._search(source, (target,), float("inf"))
+        if target not in dist:
+            return None, float("inf")
+        path = [target]
+        while parent[path[-1]] >= 0:
+            path.append(parent[path[-1]])
+        return path[::-1], dist[target]
+
+    def one_to_many(self, source, targets, limit=float("inf")):
+        dist, _ = self._search(source, targets, validate_limit(limit))
+        return np.array([dist.get(t, float("inf")) for t in targets], dtype=np.float64)
+
+    def matrix(self, sources, targets, limit=float("inf")):
+        validate_limit(limit)
+        targets = list(targets)
+        return np.array([self.one_to_many(s, targets, limit) for s in sources],
+                        dtype=np.float64).reshape(len(sources), len(targets))
+
+
+# ----------------------------------
+# scipy.sparse.csgraph
+# ----------------------------------
+class ScipyBackend:
+    name = "scipy"
+
+    def __init__(self, graph, profile=DEFAULT_PROFILE):
+        if csr_matrix is None:
+            raise RuntimeError("the scipy backend needs SciPy installed")
+        self.graph = graph
+        self.profile = profile
+        self.csr = to_csr(graph, profile)
+
+    def _dijkstra(self, sources, limit, predecessors=False):
+        return csgraph_dijkstra(self.csr, directed=True, indices=sources, limit=limit,
+                                return_predecessors=predecessors)
+
+    def shortest_path(self, source, target):
+        dist, pred = self._dijkstra(source, np.inf, predecessors=True)
+        if not np.isfinite(dist[target]):
+            return None, float("inf")
+        path = [target]
+        while path[-1] != source:
+            path.append(int(pred[path[-1]]))
+        return path[::-1], float(dist[target])
+
+    def one_to_many(self, source, targets, limit=float("inf")):
+        return self.matrix([source], targets, limit)[0]
+
+    def matrix(self, sources, targets, limit=float("inf")):
+        limit = validate_limit(limit)
+        sources = np.asarray(sources, dtype=np.int64)
+        columns = np.asarray(targets, dtype=np.int64)
+        out = np.empty((len(sources), len(columns)), dtype=np.float64)
+        for i in range(0, len(sources), SCIPY_BATCH):
+            batch = sources[i:i + SCIPY_BATCH]
+            out[i:i + len(batch)] = self._dijkstra(batch, limit)[:, columns]
+        return out
+
+
+def to_csr(graph, profile=DEFAULT_PROFILE):
+    """
+    n x n csr_matrix of edge weights. Parallel edges keep the cheapest
+    (a csr_matrix would add them up) and self-loops are dropped.
+    """
+    n = graph.num_nodes
+    weights = graph.weights(profile)
+    src = np.repeat(np.arange(n, dtype=np.int64), np.diff(graph.indptr))
+    dst = graph.indices.astype(np.int64)
+    keep = src != dst
+    src, dst, weights = src[keep], dst[keep], weights[keep]
+
+    order = np.lexsort((weights, dst, src))
+    src, dst, weights = src[order], dst[order], weights[order]
+    first = np.ones(len(src), dtype=bool)
+    first[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+    return csr_matrix((weights[first], (src[first], dst[first])), shape=(n, n))
+
+
+# ----------------------------------
+# Registry
+# ----------------------------------
+BACKENDS = {"python": PythonBackend, "scipy": ScipyBackend}
+
+_instances = weakref.WeakKeyDictionary()    # graph -> {(name, profile key): backend}
+
+
+def available_backends():
+    return [name for name in BACKENDS if name != "scipy" or csr_matrix is not None]
+
+
+def get_backend(name=DEFAULT_BACKEND, ctx=None, profile=DEFAULT_PROFILE):
+    """The ``name`` backend for ctx's compact graph (built on first use)."""
+    if name not in BACKENDS:
+        raise ValueError(f"unknown backend: {name}")
+    if name not in available_backends():
+        raise ValueError(f"backend not installed: {name}")
+    from data_context import get_context
+    graph = (ctx or get_context()).compact
+    cache = _instances.setdefault(graph, {})
+    key = (name, profile.key())
+    if key not in cache:
+        cache[key] = BACKENDS[name](graph, profile)
+    return cache[key]
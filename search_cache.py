@@ -0,0 +1,231 @@
+"""
+Resumable UCS trees, cached per origin.
+
+Many queries share an origin (a depot, a hospital) with different goals.
+Instead of running ucs from scratch each time, a SearchTree keeps the
+suspended Dijkstra state (heap, settled costs, parents) of one origin:
+
+- goal already settled  -> the path is read back from the parents,
+                           O(path length), no expansion
+- goal not settled yet  -> the search resumes from where it stopped and
+                           suspends again as soon as the goal is settled
+
+Costs, paths and tie-breaking are the same as ``search_algorithms.ucs``.
+With ``arc_flags=True`` a tree only follows the edges flagged for one
+goal cell (arc_flags.py), so trees are kept per (origin, goal cell) and
+match ``ucs(..., arc_flags=True)`` instead.
+
+SearchTreeCache holds the trees under a memory budget and evicts by cost
+(GreedyDual-Size with frequency): a tree's priority is how often its
+origin is asked for times the work it saves (nodes settled) per byte,
+plus an inflation value that ages out trees nobody asks for any more.
+Each tree has its own lock: queries on different trees search in
+parallel, the cache-wide lock only guards the maps and eviction.
+"""
+import heapq
+import itertools
+import threading
+
+from data_context import get_context
+from search_algorithms import DEFAULT_ROAD_FACTOR, INTERSECTION_PENALTY, ROAD_TYPE_FACTOR
+
+# Approximate CPython footprint of one settled node (two dict slots and a
+# float) and of one queued heap entry (a 4-tuple, a float and an int).
+# Node id strings are shared with the graph and not counted.
+BYTES_PER_SETTLED = 85
+BYTES_PER_QUEUED = 130
+
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class SearchTree:
+
+    def __init__(self, origin, ctx=None, flagged=None):
+        self.origin = origin
+        self.ctx = ctx or get_context()
+        self.flagged = flagged    # arc-flag edge filter, or None
+        self.lock = threading.Lock()
+        self.cost = {}      # settled node -> cost
+        self.parent = {}    # settled node -> predecessor (None for origin)
+        self._seq = itertools.count()
+        self.heap = [(0, next(self._seq), origin, None)]
+
+    @property
+    def settled(self):
+        return len(self.cost)
+
+    @property
+    def exhausted(self):
+        return not self.heap
+
+    def nbytes(self):
+        return self.settled * BYTES_PER_SETTLED + len(self.heap) * BYTES_PER_QUEUED
+
+    def path_to(self, goal):
+        path = []
+        node = goal
+        while node is not None:
+            path.append(node)
+            node = self.parent[node]
+        path.reverse()
+        return path
+
+    def query(self, goal):
+        """
+        (path, cost, expanded) like ucs; ``expanded`` counts only the
+        nodes settled by this call.
+        """
+        if goal not in self.cost:
+            expanded = self._resume(goal)
+            if goal not in self.cost:
+                return None, float("inf"), expanded
+        else:
+            expanded = 0
+        return self.path_to(goal), self.cost[goal], expanded
+
+    def _resume(self, goal):
+        edges = self.ctx.edges
+        flagged = self.flagged
+        heap = self.heap
+        cost = self.cost
+        parent = self.parent
+        expanded = 0
+
+        while heap:
+            current_cost, _, node, prev = heapq.heappop(heap)
+            if node in cost:
+                continue
+
+            cost[node] = current_cost
+            parent[node] = prev
+            expanded += 1
+
+            out_edges = edges.get(node, [])
+            if flagged:
+                out_edges = flagged(node, out_edges)
+            for edge in out_edges:
+                next_node = edge["to"]
+                if next_node in cost:
+                    continue
+                factor = ROAD_TYPE_FACTOR.get(edge.get("road_type"), DEFAULT_ROAD_FACTOR)
+                new_cost = current_cost + edge["cost"] * factor + INTERSECTION_PENALTY
+                heapq.heappush(heap, (new_cost, next(self._seq), next_node, node))
+
+            # Suspend with the goal settled; its neighbours are already queued
+            if node == goal:
+                break
+
+        return expanded
+
+
+class SearchTreeCache:
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES, ctx=None, arc_flags=False):
+        self.max_bytes = max_bytes
+        self.ctx = ctx
+        self.arc_flags = arc_flags
+        self.trees = {}         # key -> SearchTree; key is the origin, or (origin, cell)
+        self.priority = {}      # key -> eviction priority
+        self.frequency = {}     # key -> queries while cached
+        self.inflation = 0.0
+        self._graph = None
+        self._lock = threading.Lock()
+        self.counters = {
+            "queries": 0,
+            "hits": 0,          # goal already settled
+            "resumes": 0,       # search continued on a cached tree
+            "misses": 0,        # new tree for this origin
+            "evictions": 0,
+            "expanded": 0,      # nodes settled on behalf of queries
+        }
+
+    def ucs(self, start_node, goal_node, ctx=None):
+        """Drop-in for search_algorithms.ucs backed by the cache."""
+        ctx = ctx or self.ctx or get_context()
+
+        # Goal component unreachable in the SCC condensation: skip the search
+        if not ctx.components.reachable(start_node, goal_node):
+            return None, float("inf"), 0
+
+        key, cell = start_node, None
+        if self.arc_flags:
+            from arc_flags import goal_cell
+            cell = goal_cell(ctx, goal_node)
+            if cell is not None:
+                key = (start_node, cell)
+
+        with self._lock:
+            self._check_graph(ctx)
+            self.counters["queries"] += 1
+            tree = self.trees.get(key)
+            if tree is None:
+                flagged = None
+                if cell is not None:
+                    from arc_flags import edge_filter
+                    flagged = edge_filter(ctx, goal_node, cell)
+                tree = self.trees[key] = SearchTree(start_node, ctx, flagged)
+                self.frequency[key] = 0
+                self.priority[key] = self.inflation
+                self.counters["misses"] += 1
+                outcome = None
+            else:
+                outcome = "hits"
+
+        # Only this tree is locked while it searches
+        with tree.lock:
+            if outcome and goal_node not in tree.cost:
+                outcome = "resumes"
+            result = tree.query(goal_node)
+
+        with self._lock:
+            if outcome:
+                self.counters[outcome] += 1
+            self.counters["expanded"] += result[2]
+            # Evicted (or cleared by a reload) while searching: nothing to update
+            if self.trees.get(key) is tree:
+                freq = self.frequency[key] = self.frequency.get(key, 0) + 1
+                self.priority[key] = self.inflation + freq * tree.settled / max(tree.nbytes(), 1)
+                self._evict(keep=key)
+        return result
+
+    def nbytes(self):
+        return sum(tree.nbytes() for tree in self.trees.values())
+
+    def _evict(self, keep):
+        total = self.nbytes()
+        while total > self.max_bytes:
+            # Trees still searching for another query are left alone
+            idle = [o for o, tree in self.trees.items() if o != keep and not tree.lock.locked()]
+            if not idle:
+                break
+            victim = min(idle, key=self.priority.__getitem__)
+            self.inflation = self.priority.pop(victim)
+            del self.frequency[victim]
+            total -= self.trees.pop(victim).nbytes()
+            self.counters["evictions"] += 1
+
+        # A single tree over budget is not worth keeping either
+        if total > self.max_bytes and len(self.trees) == 1:
+            self.clear()
+
+    def _check_graph(self, ctx):
+        # A shared-graph hot reload invalidates every tree
+        graph = ctx.compact if ctx.shared_dir else None
+        if graph is not self._graph:
+            self.clear()
+            self._graph = graph
+
+    def clear(self):
+        self.trees.clear()
+        self.priority.clear()
+        self.frequency.clear()
+        self.inflation = 0.0
+
+    def stats(self):
+        with self._lock:
+            out = dict(self.counters)
+            out["origins"] = len(self.trees)
+            out["bytes"] = self.nbytes()
+            out["max_bytes"] = self.max_bytes
+            out["hit_rate"] = out["hits"] / out["queries"] if out["queries"] else 0.0
+            return out
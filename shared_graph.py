@@ -0,0 +1,313 @@
+"""
+One copy of the compact graph shared by every worker process.
+
+A master process (the server's pre-fork hook, or this module's CLI)
+publishes the CompactGraph arrays into a single shared-memory segment
+and writes a small manifest describing where each array lives. Workers
+attach to the segment and wrap the arrays as read-only NumPy views, so
+adding workers does not add graph copies. The graph's extras go along:
+the CLI adds the SCC index and, when the pipeline made fresh ones, the
+landmark and arc-flag tables, which DataContext then reads from the
+segment instead of loading (or, for the SCCs, computing) per worker.
+
+Hot reload publishes a new segment and atomically replaces the manifest
+(os.replace). Each segment header carries a reference count; a retired
+segment is unlinked by whoever drops the last reference.
+
+    python shared_graph.py publish --run-dir /tmp/city-graph
+    python shared_graph.py reload  --run-dir /tmp/city-graph
+    python shared_graph.py status  --run-dir /tmp/city-graph
+    python shared_graph.py unpublish --run-dir /tmp/city-graph
+"""
+import argparse
+import json
+import os
+import secrets
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory, util
+from pathlib import Path
+
+import numpy as np
+
+from compact_graph import ARRAY_FIELDS, CompactGraph
+
+try:
+    import fcntl
+except ImportError:  # Windows: no pre-fork servers, locking is moot
+    fcntl = None
+
+MANIFEST = "graph.current.json"
+LOCK_FILE = "graph.lock"
+
+# Header: int64 slots at the start of every segment
+HEADER_SLOTS = 8
+REFCOUNT, RETIRED = 0, 1
+ALIGN = 64
+
+
+def _align(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _open_segment(name):
+    """Attach without letting this process's resource tracker unlink it at exit."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _unlink(shm):
+    # unlink() also unregisters from the resource tracker, which we opted
+    # out of when opening; register first so the bookkeeping balances
+    if getattr(shm, "_track", True):
+        resource_tracker.register(shm._name, "shared_memory")
+    shm.unlink()
+
+
+class SharedGraphStore:
+
+    def __init__(self, run_dir):
+        self.run_dir = Path(run_dir)
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        self._handle = None
+        self._manifest_mtime = None
+
+    @property
+    def manifest_path(self):
+        return self.run_dir / MANIFEST
+
+    @contextmanager
+    def _locked(self):
+        with open(self.run_dir / LOCK_FILE, "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def read_manifest(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    # ----------------------------------
+    # Master side
+    # ----------------------------------
+    def publish(self, graph, source=None):
+        """Copy ``graph`` into a new segment and make it current."""
+        arrays = graph.arrays()
+
+        layout = {}
+        offset = HEADER_SLOTS * 8
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            offset = _align(offset)
+            layout[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+            offset += arr.nbytes
+
+        previous = self.read_manifest()
+        generation = previous["generation"] + 1 if previous else 1
+        name = f"citygraph_{generation}_{secrets.token_hex(4)}"
+
+        shm = shared_memory.SharedMemory(name=name, create=True, size=max(offset, 1))
+        # The segment must outlive this process (the CLI exits right away)
+        resource_tracker.unregister(shm._name, "shared_memory")
+
+        header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        for name_, spec in layout.items():
+            view = np.ndarray(spec["shape"], dtype=spec["dtype"], buffer=shm.buf, offset=spec["offset"])
+            view[...] = arrays[name_]
+        del header, view
+
+        manifest = {
+            "generation": generation,
+            "segment": name,
+            "size": offset,
+            "extras": [k for k in arrays if k not in ARRAY_FIELDS],
+            "layout": layout,
+            "source": str(source) if source else None,
+        }
+
+        tmp = self.manifest_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        with self._locked():
+            os.replace(tmp, self.manifest_path)
+            if previous:
+                self._retire(previous["segment"])
+
+        shm.close()
+        return manifest
+
+    def unpublish(self, force=False):
+        """
+        Retire the current segment. ``force`` unlinks it even if workers
+        still hold references (e.g. after workers were killed).
+        """
+        manifest = self.read_manifest()
+        if not manifest:
+            return
+        with self._locked():
+            os.remove(self.manifest_path)
+            self._retire(manifest["segment"], force)
+
+    def _retire(self, segment, force=False):
+        """Mark a segment retired; unlink now if nobody holds it. Caller holds the lock."""
+        try:
+            shm = _open_segment(segment)
+        except FileNotFoundError:
+            return
+        header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+        header[RETIRED] = 1
+        unused = force or header[REFCOUNT] <= 0
+        del header
+        shm.close()
+        if unused:
+            _unlink(shm)
+
+    # ----------------------------------
+    # Worker side
+    # ----------------------------------
+    def attach(self):
+        """Attach to the current segment. Returns a SharedGraphHandle or None."""
+        with self._locked():
+            manifest = self.read_manifest()
+            if manifest is None:
+                return None
+            shm = _open_segment(manifest["segment"])
+            header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+            header[REFCOUNT] += 1
+            del header
+
+        handle = SharedGraphHandle(self, shm, manifest)
+        # Give the reference back when the handle is collected or the
+        # process exits (runs for multiprocessing children too)
+        util.Finalize(handle, handle.release, exitpriority=10)
+        return handle
+
+    def current(self):
+        """
+        The handle for the current generation, re-attaching when the
+        manifest has been swapped since the last call (hot reload).
+        """
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+
+        if self._handle is None or mtime != self._manifest_mtime:
+            manifest = self.read_manifest()
+            # After an unpublish keep serving the segment we already hold
+            if self._handle is None or (manifest is not None and
+                                        manifest["generation"] != self._handle.generation):
+                old = self._handle
+                self._handle = self.attach()
+                if old is not None:
+                    old.release()
+            self._manifest_mtime = mtime
+
+        return self._handle
+
+
+class SharedGraphHandle:
+    """A reference to one published segment and the read-only graph over it."""
+
+    def __init__(self, store, shm, manifest):
+        self.store = store
+        self.generation = manifest["generation"]
+        self._shm = shm
+
+        arrays = {}
+        for name, spec in manifest["layout"].items():
+            arr = np.ndarray(spec["shape"], dtype=spec["dtype"], buffer=shm.buf, offset=spec["offset"])
+            arr.flags.writeable = False
+            arrays[name] = arr
+
+        extras = {k: arrays.pop(k) for k in manifest["extras"]}
+        self.graph = CompactGraph(arrays, extras)
+
+    def release(self):
+        if self._shm is None:
+            return
+        shm, self._shm = self._shm, None
+
+        with self.store._locked():
+            header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+            header[REFCOUNT] -= 1
+            unlink = header[RETIRED] and header[REFCOUNT] <= 0
+            del header
+            if unlink:
+                _unlink(shm)
+
+        self.graph = None
+        try:
+            shm.close()
+        except BufferError:
+            # Someone still holds an array view; the mapping goes away
+            # with the last view, the name is already unlinked above
+            pass
+
+
+# ----------------------------------
+# CLI
+# ----------------------------------
+def _load_compact(data_dir=None):
+    """The graph with its SCC index, landmarks and arc flags (if fresh) as extras."""
+    from data_context import DataContext
+    ctx = DataContext(data_dir)
+    graph = CompactGraph.from_json(ctx.graph)
+    graph.extras.update(ctx.components.arrays(graph))
+    landmarks, arc_flags = ctx.landmarks, ctx.arc_flags
+    if landmarks is not None and landmarks.dist_from.shape[1] == graph.num_nodes:
+        graph.extras.update(landmarks.arrays())
+    if arc_flags is not None and len(arc_flags.flags) == graph.num_edges:
+        graph.extras.update(arc_flags.arrays())
+    return graph, ctx.path(ctx.graph_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish the road graph into shared memory")
+    parser.add_argument("command", choices=["publish", "reload", "status", "unpublish"])
+    parser.add_argument("--run-dir", required=True)
+    parser.add_argument("--data-dir", default=None)
+    parser.add_argument("--force", action="store_true",
+                        help="unpublish even if workers still hold the segment")
+    args = parser.parse_args()
+
+    store = SharedGraphStore(args.run_dir)
+
+    if args.command in ("publish", "reload"):
+        graph, source = _load_compact(args.data_dir)
+        manifest = store.publish(graph, source)
+        print(f"Published generation {manifest['generation']} "
+              f"({manifest['size'] / 1024:.1f} KB) as {manifest['segment']}")
+
+    elif args.command == "status":
+        manifest = store.read_manifest()
+        if manifest is None:
+            print("Nothing published")
+            return
+        handle = store.attach()
+        header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=handle._shm.buf)
+        refs = int(header[REFCOUNT]) - 1
+        del header
+        handle.release()
+        print(f"Generation {manifest['generation']}: {manifest['segment']}, "
+              f"{manifest['size'] / 1024:.1f} KB, {refs} attached")
+
+    else:
+        store.unpublish(args.force)
+        print("Unpublished")
+
+
+if __name__ == "__main__":
+    main()
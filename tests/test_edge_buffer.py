@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from compact_graph import ROAD_CLASSES, UNKNOWN_CLASS, CompactGraph
+from edge_buffer import (
+    HEADER, MAGIC, buffer_version, build_edge_buffer, graph_version, read_edge_buffer
+)
+
+
+def make_graph(back_road_type="primary"):
+    """
+    0 <-> 1 two-way (residential one way, ``back_road_type`` the other),
+    1 -> 2 one-way motorway, a self-loop on 2, 2 -> 3 of an unknown type.
+    """
+    nodes = {
+        "0": {"lat": 25.0, "lng": -80.0},
+        "1": {"lat": 25.1, "lng": -80.1},
+        "2": {"lat": 25.2, "lng": -80.2},
+        "3": {"lat": 25.3, "lng": -80.3},
+    }
+    edges = {
+        "0": [{"to": "1", "cost": 1.0, "road_type": "residential"}],
+        "1": [{"to": "0", "cost": 1.0, "road_type": back_road_type},
+              {"to": "2", "cost": 2.0, "road_type": "motorway"}],
+        "2": [{"to": "2", "cost": 0.5, "road_type": "residential"},
+              {"to": "3", "cost": 1.5, "road_type": "service"}],
+    }
+    return CompactGraph.from_json({"nodes": nodes, "edges": edges})
+
+
+def segment_map(graph, coords, classes):
+    """{(node a, node b): road class} with a < b, read back from the coordinates."""
+    point = {(np.float32(graph.lat[i]), np.float32(graph.lng[i])): i
+             for i in range(graph.num_nodes)}
+    out = {}
+    for (lat1, lng1, lat2, lng2), road_class in zip(coords, classes):
+        a, b = point[(lat1, lng1)], point[(lat2, lng2)]
+        assert a < b
+        out[(a, b)] = int(road_class)
+    return out
+
+
+def test_header_and_version():
+    graph = make_graph()
+    data = build_edge_buffer(graph)
+
+    magic, count, num_classes, reserved, version = HEADER.unpack_from(data)
+    assert magic == MAGIC
+    assert count == 3
+    assert num_classes == UNKNOWN_CLASS + 1
+    assert reserved == 0
+    assert version == graph_version(graph)
+    assert buffer_version(data) == version.hex()
+    assert len(data) == HEADER.size + 16 * count + count
+
+
+def test_version_follows_content():
+    assert graph_version(make_graph()) == graph_version(make_graph())
+    assert graph_version(make_graph()) != graph_version(make_graph("secondary"))
+
+
+def test_round_trip():
+    graph = make_graph()
+    version, coords, classes = read_edge_buffer(build_edge_buffer(graph))
+
+    assert version == graph_version(graph).hex()
+    assert coords.dtype == np.float32 and coords.shape == (3, 4)
+    assert classes.dtype == np.uint8 and classes.shape == (3,)
+    assert set(segment_map(graph, coords, classes)) == {(0, 1), (1, 2), (2, 3)}
+
+
+def test_two_way_street_is_one_segment():
+    graph = make_graph()
+    _, coords, classes = read_edge_buffer(build_edge_buffer(graph))
+    segments = segment_map(graph, coords, classes)
+
+    assert len(segments) == 3           # 0-1 once, the self-loop dropped
+    assert (0, 1) in segments and (2, 2) not in segments
+
+
+@pytest.mark.parametrize("back_road_type, expected", [
+    ("primary", "primary"),             # more important than residential
+    ("residential", "residential"),
+    (None, "residential"),              # unknown never wins over a known class
+])
+def test_two_way_keeps_most_important_class(back_road_type, expected):
+    graph = make_graph(back_road_type)
+    _, coords, classes = read_edge_buffer(build_edge_buffer(graph))
+    assert segment_map(graph, coords, classes)[(0, 1)] == ROAD_CLASSES.index(expected)
+
+
+def test_road_classes():
+    graph = make_graph()
+    _, coords, classes = read_edge_buffer(build_edge_buffer(graph))
+    segments = segment_map(graph, coords, classes)
+
+    assert segments[(1, 2)] == ROAD_CLASSES.index("motorway")
+    assert segments[(2, 3)] == UNKNOWN_CLASS
+
+
+def test_rejects_other_data():
+    data = bytearray(build_edge_buffer(make_graph()))
+    data[:4] = b"XXXX"
+    with pytest.raises(ValueError):
+        read_edge_buffer(bytes(data))
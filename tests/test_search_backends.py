@@ -0,0 +1,101 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from compact_graph import ROAD_CLASSES, CompactGraph
+from search_backends import PythonBackend, ScipyBackend, available_backends, validate_limit
+
+needs_scipy = pytest.mark.skipif("scipy" not in available_backends(),
+                                 reason="SciPy not installed")
+
+
+@pytest.fixture(scope="module")
+def graph():
+    """A random 10x10 street grid with one-way streets and an unreachable node."""
+    rng = random.Random(7)
+    size = 10
+    nodes = {str(i): {"lat": 25.0 + (i // size) * 0.001, "lng": -80.0 + (i % size) * 0.001}
+             for i in range(size * size)}
+    nodes[str(size * size)] = {"lat": 26.0, "lng": -81.0}    # isolated
+    edges = {nid: [] for nid in nodes}
+
+    def add(u, v):
+        edges[str(u)].append({"to": str(v), "cost": rng.uniform(0.1, 2.0),
+                              "road_type": rng.choice(ROAD_CLASSES + ("service",))})
+
+    for i in range(size * size):
+        right = [i + 1] if (i + 1) % size else []
+        down = [i + size] if i + size < size * size else []
+        for j in right + down:
+            add(i, j)
+            if rng.random() < 0.8:      # the rest are one-way
+                add(j, i)
+    add(3, 3)                               # a self-loop
+    add(5, 6)                               # a parallel edge
+    return CompactGraph.from_json({"nodes": nodes, "edges": edges})
+
+
+@pytest.fixture(scope="module")
+def backends(graph):
+    return PythonBackend(graph), ScipyBackend(graph)
+
+
+def assert_same_costs(a, b):
+    assert np.array_equal(np.isfinite(a), np.isfinite(b))
+    assert np.allclose(a[np.isfinite(a)], b[np.isfinite(b)], rtol=0, atol=1e-9)
+
+
+@needs_scipy
+def test_shortest_path_costs_agree(graph, backends):
+    python, scipy = backends
+    rng = random.Random(1)
+    pairs = [(rng.randrange(100), rng.randrange(100)) for _ in range(30)]
+    for s, t in pairs + [(0, graph.num_nodes - 1), (graph.num_nodes - 1, 0)]:
+        (_, a), (_, b) = python.shortest_path(s, t), scipy.shortest_path(s, t)
+        assert a == pytest.approx(b, abs=1e-9)
+
+
+@needs_scipy
+@pytest.mark.parametrize("limit", [math.inf, 3.0, 0.5, 0.0])
+def test_one_to_many_costs_agree(graph, backends, limit):
+    python, scipy = backends
+    targets = list(range(graph.num_nodes))
+    for source in (0, 42, graph.num_nodes - 1):
+        a = python.one_to_many(source, targets, limit)
+        b = scipy.one_to_many(source, targets, limit)
+        assert_same_costs(a, b)
+        assert np.all(a[np.isfinite(a)] <= limit)
+
+
+@needs_scipy
+@pytest.mark.parametrize("limit", [math.inf, 2.5])
+def test_matrix_costs_agree(graph, backends, limit):
+    python, scipy = backends
+    sources = [0, 9, 55, 99, graph.num_nodes - 1]
+    targets = [1, 12, 50, 99, graph.num_nodes - 1]
+    a, b = python.matrix(sources, targets, limit), scipy.matrix(sources, targets, limit)
+    assert a.shape == b.shape == (len(sources), len(targets))
+    assert_same_costs(a, b)
+
+
+@pytest.mark.parametrize("limit, expected", [(0, 0.0), ("2.5", 2.5), (math.inf, math.inf)])
+def test_validate_limit_accepts(limit, expected):
+    assert validate_limit(limit) == expected
+
+
+@pytest.mark.parametrize("limit", [-1, -math.inf, math.nan, "abc"])
+def test_validate_limit_rejects(limit):
+    with pytest.raises(ValueError):
+        validate_limit(limit)
+
+
+@pytest.mark.parametrize("name", available_backends())
+@pytest.mark.parametrize("limit", [-1.0, math.nan])
+def test_backends_reject_bad_limits(graph, name, limit):
+    backend = {"python": PythonBackend, "scipy": ScipyBackend}[name](graph)
+    with pytest.raises(ValueError):
+        backend.one_to_many(0, [1, 2], limit)
+    with pytest.raises(ValueError):
+        backend.matrix([0, 1], [1, 2], limit)
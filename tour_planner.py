@@ -0,0 +1,320 @@
+"""
+Multi-stop tours: visit a list of places in the cheapest order.
+
+Two phases, timed separately:
+
+1. Matrix.  TravelTimeMatrix runs one one-to-all search (delta-stepping
+   on the CompactGraph, same weights as ucs) per stop and keeps the
+   (dist, parent) arrays of recent origins, so a depot or a stop used by
+   many tours is searched once. The k x k matrix is a gather from them.
+
+2. Order.   plan_tour() builds a route with nearest neighbour, then
+   improves it with 2-opt (reverse a segment) and Or-opt (move a run of
+   1-3 stops elsewhere) until no move helps or the time limit is hit.
+   The matrix is asymmetric (one-way streets), so a reversal is priced
+   with prefix sums of the forward and backward leg costs; without time
+   windows every candidate move is scored at once with NumPy.
+
+Time windows are soft: arriving early means waiting, arriving after
+``latest`` costs LATE_PENALTY per minute, and the result says whether
+every window was met. Times are minutes after leaving the first stop.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from compact_graph import DEFAULT_PROFILE
+from data_context import get_context
+from delta_stepping import delta_stepping, path_to
+
+DEFAULT_MAX_TREES = 64
+DEFAULT_TIME_LIMIT_MS = 1000
+LATE_PENALTY = 1000.0     # cost per minute late, dwarfs any travel time
+OR_OPT_LENGTHS = (1, 2, 3)
+
+
+# ----------------------------------
+# Travel-time matrix
+# ----------------------------------
+class TravelTimeMatrix:
+    """One-to-all trees per origin node, LRU-bounded by ``max_trees``."""
+
+    def __init__(self, max_trees=DEFAULT_MAX_TREES, ctx=None, profile=DEFAULT_PROFILE):
+        self.max_trees = max_trees
+        self.ctx = ctx
+        self.profile = profile
+        self.trees = OrderedDict()
+        self.counters = {"hits": 0, "misses": 0}
+        self._graph = None
+        self._lock = threading.Lock()
+
+    @property
+    def graph(self):
+        return (self.ctx or get_context()).compact
+
+    def tree(self, node_id):
+        """(dist, parent) arrays of the search from ``node_id``."""
+        graph = self.graph
+        with self._lock:
+            # A shared-graph hot reload gives a new CompactGraph
+            if graph is not self._graph:
+                self.trees.clear()
+                self._graph = graph
+            entry = self.trees.get(node_id)
+            if entry is not None:
+                self.trees.move_to_end(node_id)
+                self.counters["hits"] += 1
+                return entry
+
+        # Search outside the lock; a concurrent duplicate is harmless
+        entry = delta_stepping(graph, graph.index_of[node_id], self.profile)
+        with self._lock:
+            self.counters["misses"] += 1
+            if graph is self._graph:
+                self.trees[node_id] = entry
+                while len(self.trees) > self.max_trees:
+                    self.trees.popitem(last=False)
+        return entry
+
+    def matrix(self, node_ids):
+        """float64[k, k] travel times between the nodes (inf if unreachable)."""
+        graph = self.graph
+        columns = np.array([graph.index_of[nid] for nid in node_ids], dtype=np.int64)
+        return np.stack([self.tree(nid)[0][columns] for nid in node_ids])
+
+    def leg(self, a, b):
+        """Node indices of the shortest path a -> b."""
+        graph = self.graph
+        _, parent = self.tree(a)
+        return path_to(parent, graph.index_of[a], graph.index_of[b])
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, trees=len(self.trees), max_trees=self.max_trees)
+
+
+# ----------------------------------
+# Route evaluation
+# ----------------------------------
+def route_travel(matrix, route):
+    return float(matrix[route[:-1], route[1:]].sum())
+
+
+def schedule(matrix, route, windows=None, service=None):
+    """
+    Arrival time at every position of ``route`` and the total lateness.
+    ``windows`` is float[k, 2] (earliest, latest), ``service`` float[k].
+    """
+    arrival = np.zeros(len(route))
+    late = 0.0
+    clock = 0.0
+    for pos in range(1, len(route)):
+        prev, stop = route[pos - 1], route[pos]
+        clock += (service[prev] if service is not None else 0.0) + matrix[prev, stop]
+        if windows is not None:
+            clock = max(clock, windows[stop, 0])
+            late += max(0.0, clock - windows[stop, 1])
+        arrival[pos] = clock
+    return arrival, late
+
+
+def route_cost(matrix, route, windows=None, service=None):
+    if windows is None:
+        return route_travel(matrix, route)
+    arrival, late = schedule(matrix, route, windows, service)
+    return arrival[-1] + LATE_PENALTY * late
+
+
+# ----------------------------------
+# Construction
+# ----------------------------------
+def nearest_neighbour(matrix, roundtrip=True, windows=None, service=None):
+    """Start at stop 0, always go to the closest (or soonest open) stop."""
+    k = len(matrix)
+    route = [0]
+    visited = np.zeros(k, dtype=bool)
+    visited[0] = True
+    clock = 0.0
+    for _ in range(k - 1):
+        here = route[-1]
+        ready = clock + (service[here] if service is not None else 0.0) + matrix[here]
+        if windows is not None:
+            ready = np.maximum(ready, windows[:, 0])
+        ready = np.where(visited, np.inf, ready)
+        nxt = int(np.argmin(ready))
+        route.append(nxt)
+        visited[nxt] = True
+        clock = ready[nxt]
+    if roundtrip:
+        route.append(0)
+    return np.array(route, dtype=np.int64)
+
+
+# ----------------------------------
+# Local search (the first and last positions stay fixed)
+# ----------------------------------
+def _two_opt_deltas(matrix, route):
+    """
+    delta[i, j]: change in travel when route[i..j] is reversed. Leg sums
+    come from prefix sums, so all O(n^2) moves are scored in one shot.
+    """
+    forward = matrix[route[:-1], route[1:]]
+    backward = matrix[route[1:], route[:-1]]
+    F = np.concatenate([[0.0], np.cumsum(forward)])
+    B = np.concatenate([[0.0], np.cumsum(backward)])
+
+    n = len(route)
+    i = np.arange(n)[:, None]
+    j = np.arange(n)[None, :]
+    valid = (i >= 1) & (j > i) & (j <= n - 2)
+    ii, jj = np.where(valid, i, 1), np.where(valid, j, 2)
+
+    before, first, last, after = route[ii - 1], route[ii], route[jj], route[jj + 1]
+    old = matrix[before, first] + (F[jj] - F[ii]) + matrix[last, after]
+    new = matrix[before, last] + (B[jj] - B[ii]) + matrix[first, after]
+    return np.where(valid, new - old, np.inf)
+
+
+def _or_opt_deltas(matrix, route, i, length):
+    """
+    Change in travel when route[i:i+length] moves to between p and p + 1,
+    for every p (inf where the move is not allowed).
+    """
+    n = len(route)
+    a, b = route[i], route[i + length - 1]
+    before, after = route[i - 1], route[i + length]
+    removed = matrix[before, after] - matrix[before, a] - matrix[b, after]
+
+    p = np.arange(n - 1)
+    left, right = route[p], route[p + 1]
+    inserted = matrix[left, a] + matrix[b, right] - matrix[left, right]
+    allowed = (p < i - 1) | (p >= i + length)
+    return np.where(allowed, removed + inserted, np.inf)
+
+
+def _move_segment(route, i, length, p):
+    segment = route[i:i + length]
+    rest = np.concatenate([route[:i], route[i + length:]])
+    at = p + 1 if p < i else p + 1 - length
+    return np.concatenate([rest[:at], segment, rest[at:]])
+
+
+def _neighbours(route):
+    """Every 2-opt and Or-opt neighbour (for exact scoring with windows)."""
+    n = len(route)
+    for i in range(1, n - 2):
+        for j in range(i + 1, n - 1):
+            yield "two_opt", np.concatenate([route[:i], route[i:j + 1][::-1], route[j + 1:]])
+    for length in OR_OPT_LENGTHS:
+        for i in range(1, n - length):
+            for p in range(n - 1):
+                if p < i - 1 or p >= i + length:
+                    yield "or_opt", _move_segment(route, i, length, p)
+
+
+def improve(matrix, route, roundtrip=True, windows=None, service=None, deadline=None,
+            stats=None):
+    """2-opt + Or-opt until a local optimum or ``deadline`` (perf_counter)."""
+    stats = stats if stats is not None else {}
+    stats.setdefault("two_opt", 0)
+    stats.setdefault("or_opt", 0)
+    stats["timed_out"] = False
+
+    # An open route gets a free dummy end so the same moves apply
+    if not roundtrip:
+        k = len(matrix)
+        padded = np.zeros((k + 1, k + 1))
+        padded[:k, :k] = matrix
+        padded[k, :] = np.inf
+        padded[k, k] = 0.0
+        matrix = padded
+        route = np.append(route, k)
+        if windows is not None:
+            windows = np.vstack([windows, [0.0, np.inf]])
+        if service is not None:
+            service = np.append(service, 0.0)
+
+    eps = 1e-9
+    cost = route_cost(matrix, route, windows, service)
+    improved = True
+    while improved:
+        if deadline is not None and time.perf_counter() > deadline:
+            stats["timed_out"] = True
+            break
+        improved = False
+
+        if windows is None:
+            delta = _two_opt_deltas(matrix, route)
+            i, j = np.unravel_index(np.argmin(delta), delta.shape)
+            if delta[i, j] < -eps:
+                route = np.concatenate([route[:i], route[i:j + 1][::-1], route[j + 1:]])
+                cost += delta[i, j]
+                stats["two_opt"] += 1
+                improved = True
+                continue
+
+            for length in OR_OPT_LENGTHS:
+                for i in range(1, len(route) - length - 1):
+                    d = _or_opt_deltas(matrix, route, i, length)
+                    p = int(np.argmin(d))
+                    if d[p] < -eps:
+                        route = _move_segment(route, i, length, p)
+                        cost += d[p]
+                        stats["or_opt"] += 1
+                        improved = True
+                        break
+                if improved:
+                    break
+        else:
+            for move, candidate in _neighbours(route):
+                c = route_cost(matrix, candidate, windows, service)
+                if c < cost - eps:
+                    route, cost = candidate, c
+                    stats[move] += 1
+                    improved = True
+                    break
+                if deadline is not None and time.perf_counter() > deadline:
+                    stats["timed_out"] = True
+                    break
+
+    if not roundtrip:
+        route = route[:-1]
+    return route
+
+
+def plan_tour(matrix, roundtrip=True, windows=None, service=None,
+              time_limit_ms=DEFAULT_TIME_LIMIT_MS, stats=None):
+    """
+    Visiting order over a travel-time matrix; stop 0 is where the tour
+    starts (and ends, for a round trip). Returns
+    {"route", "travel", "arrival", "late", "feasible"} with ``route`` as
+    matrix indices in visiting order. ``time_limit_ms=None`` improves to a
+    local optimum; 0 (or less) keeps the nearest-neighbour tour.
+    """
+    stats = stats if stats is not None else {}
+    matrix = np.asarray(matrix, dtype=np.float64)
+    if windows is not None:
+        windows = np.asarray(windows, dtype=np.float64)
+    if service is not None:
+        service = np.asarray(service, dtype=np.float64)
+
+    t0 = time.perf_counter()
+    deadline = t0 + time_limit_ms / 1000 if time_limit_ms is not None else None
+
+    route = nearest_neighbour(matrix, roundtrip, windows, service)
+    stats["initial_travel"] = round(route_travel(matrix, route), 4)
+    if len(matrix) > 3 and (time_limit_ms is None or time_limit_ms > 0):
+        route = improve(matrix, route, roundtrip, windows, service, deadline, stats)
+
+    arrival, late = schedule(matrix, route, windows, service)
+    stats["final_travel"] = round(route_travel(matrix, route), 4)
+    stats["solve_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+    return {
+        "route": [int(s) for s in route],
+        "travel": route_travel(matrix, route),
+        "arrival": arrival.tolist(),
+        "late": float(late),
+        "feasible": bool(late <= 1e-9),
+    }